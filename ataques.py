@@ -1,9 +1,53 @@
+import codecs
+import os
+import pathlib
+import time
 from collections import Counter
-from matplotlib import pyplot as plt
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import lru_cache, partial
+
+from types import SimpleNamespace
+
 from cifrados import Cifrados
+from dependencias import importar_diferido
+from progreso import Seguimiento
+import paralelo
+
+# numpy se carga en el primer cálculo, no al importar el módulo
+np = importar_diferido("numpy")
+
 
+@lru_cache(maxsize=1)
+def _tablas():
+    """Tablas por byte latin-1 para trabajar con el texto como array uint8 (se crean en el primer uso)"""
+    frecuencias = np.array([AtaqueFrecuencias.FRECUENCIAS_ESPANOL[chr(97 + i)] for i in range(26)])
+    return SimpleNamespace(
+        es_letra=np.array([chr(b).isalpha() for b in range(256)]),
+        es_espacio=np.array([chr(b).isspace() for b in range(256)]),
+        codigo_letra=np.array([(ord(chr(b).lower()) - 97) % 26 if chr(b).isalpha() else 0 for b in range(256)],
+                              dtype=np.uint8),
+        base_letra=np.array([65 if chr(b).isupper() else 97 for b in range(256)], dtype=np.uint8),
+        minuscula=np.array([ord(chr(b).lower()) for b in range(256)], dtype=np.uint8),
+        # Frecuencias del español de la 'a' a la 'z' normalizadas a proporciones (sin la 'ñ',
+        # que César no desplaza dentro del alfabeto de 26 letras)
+        frecuencias_esperadas=frecuencias / frecuencias.sum(),
+        potencias_cuadrigrama=np.array([26 ** 3, 26 ** 2, 26, 1]),
+    )
 
-def fuerza_bruta(texto_cifrado):
+
+def fuerza_bruta(texto_cifrado, vectorizado=True, progreso=None, cancelacion=None):
+    """
+    Descifra el texto con las 25 claves. `progreso` y `cancelacion` se comprueban una vez
+    por clave (ver progreso.py)
+    """
+    if vectorizado:
+        columnas = fuerza_bruta_columnas(texto_cifrado, progreso, cancelacion)
+        return [
+            {'Clave': int(clave), 'Texto descifrado': texto, 'N° Palabras': int(palabras), '% Letras': float(letras)}
+            for clave, texto, palabras, letras in zip(*columnas.values())
+        ]
+
+    seguimiento = Seguimiento(25, progreso, cancelacion)
     resultados = []
     for clave in range(1, 26):
         texto_descifrado = Cifrados.cifrado_cesar(texto_cifrado, -clave)
@@ -17,8 +61,199 @@ def fuerza_bruta(texto_cifrado):
             'N° Palabras': len(palabras),
             '% Letras': round(porcentaje_letras, 1)
         })
+        seguimiento.avanzar()
+    seguimiento.terminar()
     return resultados
 
+
+def matriz_fuerza_bruta(texto_cifrado):
+    """
+    Descifra las 25 claves de una vez: devuelve una matriz uint8 (25, n) cuya fila i
+    es el texto latin-1 descifrado con la clave i + 1, o None si el texto no es latin-1
+    """
+    try:
+        datos = texto_cifrado.encode('latin-1')
+    except UnicodeEncodeError:
+        return None
+
+    original = np.frombuffer(datos, dtype=np.uint8)
+    claves = np.arange(1, 26, dtype=np.uint8)[:, None]
+    matriz = np.repeat(original[None, :], 25, axis=0)
+
+    # Una sola suma con broadcast módulo 26 sobre las posiciones que son letras
+    tablas = _tablas()
+    es_letra = tablas.es_letra[original]
+    letras = original[es_letra]
+    matriz[:, es_letra] = (tablas.codigo_letra[letras] + 26 - claves) % 26 + tablas.base_letra[letras]
+    return matriz
+
+
+def fuerza_bruta_columnas(texto_cifrado, progreso=None, cancelacion=None):
+    """
+    Versión vectorizada de fuerza_bruta que devuelve columnas (arrays) en lugar de filas,
+    lista para pd.DataFrame sin construir un diccionario por clave
+    """
+    claves = np.arange(1, 26)
+    seguimiento = Seguimiento(25, progreso, cancelacion)
+    seguimiento.comprobar()
+    matriz = matriz_fuerza_bruta(texto_cifrado)
+
+    def por_clave(textos):
+        # Cada texto descifrado cuenta como un intento
+        for texto in textos:
+            yield texto
+            seguimiento.avanzar()
+
+    if matriz is None:
+        textos = list(por_clave(Cifrados.cifrado_cesar(texto_cifrado, -clave) for clave in range(1, 26)))
+        num_palabras = len(texto_cifrado.split())
+        num_letras = sum(c.isalpha() for c in texto_cifrado)
+    else:
+        textos = list(por_clave(fila.tobytes().decode('latin-1') for fila in matriz))
+        # César solo cambia letras por letras: palabras y % de letras son iguales para todas
+        # las claves, así que se calculan una vez sobre la primera fila
+        fila = matriz[0]
+        espacios = _tablas().es_espacio[fila]
+        inicios_palabra = ~espacios[1:] & espacios[:-1]
+        num_palabras = int(np.count_nonzero(inicios_palabra)) + int(len(fila) > 0 and not espacios[0])
+        num_letras = int(np.count_nonzero(_tablas().es_letra[fila]))
+
+    porcentaje_letras = num_letras / len(texto_cifrado) * 100 if texto_cifrado else 0
+    seguimiento.terminar()
+    return {
+        'Clave': claves,
+        'Texto descifrado': textos,
+        'N° Palabras': np.full(25, num_palabras),
+        '% Letras': np.full(25, round(porcentaje_letras, 1)),
+    }
+
+
+def histograma_letras(texto):
+    """Histograma de 26 posiciones con los códigos de letra (0 = a) que usa el cifrado César"""
+    try:
+        datos = np.frombuffer(texto.encode('latin-1'), dtype=np.uint8)
+    except UnicodeEncodeError:
+        codigos = [(ord(c.lower()) - 97) % 26 for c in texto if c.isalpha()]
+        return np.bincount(np.array(codigos, dtype=np.int64), minlength=26)
+    tablas = _tablas()
+    return np.bincount(tablas.codigo_letra[datos[tablas.es_letra[datos]]], minlength=26)
+
+
+def _histograma_trozo(trozo, siguiente, inicio):
+    return histograma_letras(trozo)
+
+
+# Caracteres que se descifran de un fichero para mostrar junto al ranking
+_VISTA_PREVIA = 2000
+
+
+def ranking_claves_cesar(texto_cifrado, top_k=5, solo_mejor=False, procesos=None):
+    """
+    Ordena las claves César por chi-cuadrado frente a FRECUENCIAS_ESPANOL.
+    Usa un único histograma del texto cifrado rotado 25 veces, sin descifrar por clave:
+    solo se descifran las claves devueltas (únicamente la mejor con solo_mejor=True).
+    El texto puede ser la ruta de un fichero (pathlib.Path); el histograma se suma por trozos
+    en paralelo y de un fichero solo se descifra el principio
+    """
+    histograma = sum(paralelo.mapear_trozos(texto_cifrado, _histograma_trozo, procesos=procesos),
+                     np.zeros(26, dtype=np.int64))
+    if paralelo.es_fichero(texto_cifrado):
+        texto_cifrado = paralelo.leer(texto_cifrado, 0, min(paralelo.longitud(texto_cifrado), _VISTA_PREVIA))
+    total = histograma.sum()
+    if total == 0:
+        return []
+
+    # Al descifrar con la clave k, la letra cifrada (p + k) % 26 pasa a ser p
+    claves = np.arange(1, 26)
+    rotados = histograma[(np.arange(26)[None, :] + claves[:, None]) % 26]
+    esperados = _tablas().frecuencias_esperadas * total
+    chi2 = ((rotados - esperados) ** 2 / esperados).sum(axis=1)
+
+    orden = np.argsort(chi2, kind='stable')[:1 if solo_mejor else top_k]
+    return [
+        {
+            'Clave': int(claves[i]),
+            'Chi²': round(float(chi2[i]), 2),
+            'Texto descifrado': Cifrados.cifrado_cesar(texto_cifrado, -int(claves[i]))
+        }
+        for i in orden
+    ]
+
+class _ContadorLetras:
+    """
+    Acumula cuántas veces aparece cada letra en bloques sucesivos de texto, con memoria fija:
+    un array de 256 posiciones para latin-1 y un diccionario para el resto de caracteres.
+    Guarda también la primera aparición de cada letra para ordenar los empates igual que Counter
+    """
+
+    def __init__(self):
+        self.conteos_latin1 = np.zeros(256, dtype=np.int64)
+        self.primeras_latin1 = np.full(256, -1, dtype=np.int64)
+        self.otros = {}
+        self.posicion = 0
+
+    def añadir(self, bloque):
+        try:
+            datos = np.frombuffer(bloque.encode('latin-1'), dtype=np.uint8)
+        except UnicodeEncodeError:
+            self._añadir_unicode(bloque)
+        else:
+            conteos = np.bincount(datos, minlength=256)
+            for valor in np.flatnonzero((conteos > 0) & (self.primeras_latin1 < 0)):
+                self.primeras_latin1[valor] = self.posicion + int(np.argmax(datos == valor))
+            self.conteos_latin1 += conteos
+        self.posicion += len(bloque)
+
+    def _añadir_unicode(self, bloque):
+        datos = np.frombuffer(bloque.encode('utf-32-le'), dtype=np.uint32)
+        valores, primeras, conteos = np.unique(datos, return_index=True, return_counts=True)
+        for valor, primera, conteo in zip(valores.tolist(), primeras.tolist(), conteos.tolist()):
+            if valor < 256:
+                if self.primeras_latin1[valor] < 0:
+                    self.primeras_latin1[valor] = self.posicion + primera
+                self.conteos_latin1[valor] += conteo
+            elif chr(valor).isalpha():
+                datos_letra = self.otros.setdefault(valor, [0, self.posicion + primera])
+                datos_letra[0] += conteo
+
+    def fusionar(self, otro):
+        """Suma los conteos de otro contador (de un trozo posterior del mismo texto)"""
+        ambos = (self.primeras_latin1 >= 0) & (otro.primeras_latin1 >= 0)
+        self.primeras_latin1 = np.where(ambos, np.minimum(self.primeras_latin1, otro.primeras_latin1),
+                                        np.maximum(self.primeras_latin1, otro.primeras_latin1))
+        self.conteos_latin1 += otro.conteos_latin1
+        for valor, (conteo, primera) in otro.otros.items():
+            datos_letra = self.otros.setdefault(valor, [0, primera])
+            datos_letra[0] += conteo
+            datos_letra[1] = min(datos_letra[1], primera)
+
+    def frecuencias(self):
+        letras = {}
+        apariciones = [(int(v), int(self.conteos_latin1[v]), int(self.primeras_latin1[v]))
+                       for v in np.flatnonzero(self.conteos_latin1) if _tablas().es_letra[v]]
+        apariciones += [(v, conteo, primera) for v, (conteo, primera) in self.otros.items()]
+        for valor, conteo, primera in apariciones:
+            letra = chr(valor).lower()
+            total_letra, primera_letra = letras.get(letra, (0, primera))
+            letras[letra] = (total_letra + conteo, min(primera, primera_letra))
+
+        total = sum(conteo for conteo, _ in letras.values())
+        if total == 0:
+            return {}
+        # Más frecuentes primero; a igualdad, la que aparece antes en el texto
+        orden = sorted(letras.items(), key=lambda x: (-x[1][0], x[1][1]))
+        return {letra: (conteo / total) * 100 for letra, (conteo, _) in orden}
+
+
+def _contar_trozo(trozo, siguiente, inicio):
+    # Las primeras apariciones se numeran desde el inicio del trozo para poder compararlas entre trozos
+    contador = _ContadorLetras()
+    contador.posicion = inicio
+    for a in range(0, len(trozo), AtaqueFrecuencias.TAMAÑO_BLOQUE):
+        contador.añadir(trozo[a:a + AtaqueFrecuencias.TAMAÑO_BLOQUE])
+    return contador
+
+
 class AtaqueFrecuencias:
     FRECUENCIAS_ESPANOL = {
         'a': 12.53, 'b': 1.42, 'c': 4.68, 'd': 5.86, 'e': 13.68,
@@ -29,58 +264,170 @@ class AtaqueFrecuencias:
         'y': 0.90, 'z': 0.52
     }
 
+    TAMAÑO_BLOQUE = 1 << 20
+
     @staticmethod
-    def calcular_frecuencias(texto):
-        letras = [c.lower() for c in texto if c.isalpha()]
-        total = len(letras)
-        if total == 0:
-            return {}
-        contador = Counter(letras)
-        frecuencias = {letra: (count / total) * 100 for letra, count in contador.items()}
-        return dict(sorted(frecuencias.items(), key=lambda x: x[1], reverse=True))
+    def calcular_frecuencias(texto, procesos=None):
+        """
+        Frecuencias de las letras en %, de la más a la menos frecuente. El texto puede ser la
+        ruta de un fichero (pathlib.Path); los textos grandes se cuentan por trozos en paralelo
+        """
+        contador = _ContadorLetras()
+        for parte in paralelo.mapear_trozos(texto, _contar_trozo, procesos=procesos):
+            contador.fusionar(parte)
+        return contador.frecuencias()
+
+    @staticmethod
+    def calcular_frecuencias_flujo(origen, tamaño_bloque=TAMAÑO_BLOQUE, codificacion='utf-8'):
+        """
+        Frecuencias de un fichero (ruta u objeto tipo fichero) leído por bloques de tamaño fijo,
+        sin cargarlo entero en memoria. Con una ruta, `tamaño_bloque` es el tamaño en bytes de los
+        trozos que se reparten entre procesos. Devuelve lo mismo que calcular_frecuencias
+        """
+        if isinstance(origen, (str, os.PathLike)):
+            if codecs.lookup(codificacion).name in paralelo._CODIFICACIONES_ALINEABLES:
+                # Con una ruta se puede partir el fichero y contar los trozos en paralelo
+                contador = _ContadorLetras()
+                for parte in paralelo.mapear_trozos(pathlib.Path(origen), _contar_trozo, tamaño_trozo=tamaño_bloque,
+                                                    codificacion=codificacion):
+                    contador.fusionar(parte)
+                return contador.frecuencias()
+            with open(origen, 'rb') as fichero:
+                return AtaqueFrecuencias.calcular_frecuencias_flujo(fichero, tamaño_bloque, codificacion)
+
+        contador = _ContadorLetras()
+        decodificador = codecs.getincrementaldecoder(codificacion)(errors='replace')
+        while True:
+            bloque = origen.read(tamaño_bloque)
+            if not bloque:
+                break
+            # Los ficheros abiertos en modo texto ya devuelven str
+            contador.añadir(decodificador.decode(bloque) if isinstance(bloque, bytes) else bloque)
+        contador.añadir(decodificador.decode(b'', final=True))
+        return contador.frecuencias()
 
     @staticmethod
     def visualizar(texto_cifrado):
-        frec_cifrado = AtaqueFrecuencias.calcular_frecuencias(texto_cifrado)
+        # matplotlib solo se carga al dibujar, para poder usar los ataques sin interfaz gráfica
+        import graficas
+
+        return graficas.frecuencias(AtaqueFrecuencias.calcular_frecuencias(texto_cifrado),
+                                    AtaqueFrecuencias.FRECUENCIAS_ESPANOL)
+
+
 
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 5))
+def letras_minusculas(texto):
+    """
+    Devuelve el texto reducido a sus letras en minúsculas y el mismo texto como array
+    de códigos (uint8 si es latin-1, uint32 en otro caso)
+    """
+    try:
+        datos = np.frombuffer(texto.encode('latin-1'), dtype=np.uint8)
+    except UnicodeEncodeError:
+        texto_limpio = ''.join(c.lower() for c in texto if c.isalpha())
+        return texto_limpio, np.array([ord(c) for c in texto_limpio], dtype=np.uint32)
+    tablas = _tablas()
+    codigos = tablas.minuscula[datos[tablas.es_letra[datos]]]
+    return codigos.tobytes().decode('latin-1'), codigos
 
-        # Gráfica 1: Frecuencias en texto cifrado
-        letras_cifrado = list(frec_cifrado.keys())[:10]
-        frecs_cifrado = list(frec_cifrado.values())[:10]
 
-        ax1.bar(letras_cifrado, frecs_cifrado, color='skyblue', edgecolor='navy')
-        ax1.set_title('Frecuencias en Texto Cifrado', fontsize=14, fontweight='bold')
-        ax1.set_xlabel('Letras')
-        ax1.set_ylabel('Frecuencia (%)')
-        ax1.grid(axis='y', alpha=0.3)
+def _ngramas_ordenados(codigos, lon, propias):
+    """
+    N-gramas de `lon` letras que empiezan en las `propias` primeras posiciones, cada uno como un
+    único valor comparable (bloque de bytes), ordenados, junto con su posición
+    """
+    ngramas = np.ascontiguousarray(np.lib.stride_tricks.sliding_window_view(codigos, lon)[:propias])
+    ngramas = ngramas.view(np.dtype((np.void, lon * codigos.itemsize))).ravel()
+    orden = np.argsort(ngramas, kind='stable')
+    return ngramas[orden], orden
 
-        # Gráfica 2: Frecuencias en español
-        letras_espanol = list(AtaqueFrecuencias.FRECUENCIAS_ESPANOL.keys())[:10]
-        frecs_espanol = [AtaqueFrecuencias.FRECUENCIAS_ESPANOL[l] for l in letras_espanol]
 
-        ax2.bar(letras_espanol, frecs_espanol, color='lightcoral', edgecolor='darkred')
-        ax2.set_title('Frecuencias en Español', fontsize=14, fontweight='bold')
-        ax2.set_xlabel('Letras')
-        ax2.set_ylabel('Frecuencia (%)')
-        ax2.grid(axis='y', alpha=0.3)
+def _ngramas_trozo(trozo, siguiente, inicio, longitud_min, longitud_max):
+    """N-gramas ordenados de un trozo, completando los del final con las letras siguientes"""
+    _, codigos = letras_minusculas(trozo)
+    _, extra = letras_minusculas(siguiente)
+    extra = extra[:longitud_max - 1]
+    if extra.dtype != codigos.dtype:
+        codigos, extra = codigos.astype(np.uint32), extra.astype(np.uint32)
+    todos = np.concatenate((codigos, extra))
+    return len(codigos), {lon: _ngramas_ordenados(todos, lon, len(codigos))
+                          for lon in range(longitud_min, longitud_max + 1) if len(todos) >= lon}
 
-        plt.tight_layout()
-        return fig
 
-def encontrar_repeticiones(texto, longitud_min=3):
-    texto_limpio = ''.join(c.lower() for c in texto if c.isalpha())
+def _ensanchar(ngramas, lon):
+    """Pasa n-gramas de códigos uint8 a uint32 (para unirlos con trozos que no son latin-1)"""
+    if ngramas.dtype.itemsize == 4 * lon:
+        return ngramas
+    codigos = np.frombuffer(ngramas.tobytes(), dtype=np.uint8).astype(np.uint32)
+    return codigos.view(np.dtype((np.void, 4 * lon)))
+
+
+def encontrar_repeticiones(texto, longitud_min=3, longitud_max=5, procesos=None, progreso=None, cancelacion=None):
+    """
+    Busca las secuencias de longitud_min a longitud_max letras que se repiten y las distancias
+    entre cada par de apariciones que no se solapan.
+    Los n-gramas se agrupan ordenándolos con NumPy (O(n log n) por longitud) en lugar de
+    comparar cada posición con todas las demás. El texto puede ser la ruta de un fichero
+    (pathlib.Path); los textos grandes se ordenan por trozos en paralelo y se mezclan después.
+    Para `progreso` cada trozo ordenado y cada longitud agrupada cuentan como un paso
+    """
+    seguimiento = Seguimiento(longitud_max - longitud_min + 1, progreso, cancelacion)
+    seguimiento.comprobar()
+    funcion = partial(_ngramas_trozo, longitud_min=longitud_min, longitud_max=longitud_max)
+    partes = paralelo.mapear_trozos(texto, funcion, letras_solape=longitud_max - 1, procesos=procesos,
+                                    seguimiento=seguimiento)
+    letras = [propias for propias, _ in partes]
+    total = sum(letras)
     repeticiones = {}
 
-    for lon in range(longitud_min, min(6, len(texto_limpio) // 2)):
-        for i in range(len(texto_limpio) - lon):
-            secuencia = texto_limpio[i:i + lon]
-            for j in range(i + lon, len(texto_limpio) - lon):
-                if texto_limpio[j:j + lon] == secuencia:
-                    distancia = j - i
-                    if secuencia not in repeticiones:
-                        repeticiones[secuencia] = []
-                    repeticiones[secuencia].append(distancia)
+    for lon in range(longitud_min, longitud_max + 1):
+        if lon >= total // 2:
+            seguimiento.avanzar()  # Texto demasiado corto para esta longitud
+            continue
+        if len(partes) == 1:
+            ordenados, orden = partes[0][1][lon]
+        else:
+            # Cada trozo ya viene ordenado: se unen con sus posiciones globales y el ordenamiento
+            # estable (timsort) aprovecha esas rachas y respeta el orden de aparición
+            ancho = max(p[1][lon][0].dtype.itemsize for p in partes if lon in p[1])
+            bloques = [(_ensanchar(p[1][lon][0], lon) if ancho == 4 * lon else p[1][lon][0],
+                        p[1][lon][1] + desplazamiento)
+                       for p, desplazamiento in zip(partes, paralelo.desplazamientos(letras)) if lon in p[1]]
+            ngramas = np.concatenate([b[0] for b in bloques])
+            posiciones = np.concatenate([b[1] for b in bloques])
+            mezcla = np.argsort(ngramas, kind='stable')
+            ordenados, orden = ngramas[mezcla], posiciones[mezcla]
+
+        # Límites de cada grupo de n-gramas iguales; solo interesan los que aparecen 2+ veces
+        limites = np.flatnonzero(ordenados[1:] != ordenados[:-1]) + 1
+        inicios = np.concatenate(([0], limites))
+        finales = np.concatenate((limites, [len(orden)]))
+        repetidos = np.flatnonzero(finales - inicios >= 2)
+
+        encontradas = []
+        for num, g in enumerate(repetidos):
+            if num % 4096 == 4095:
+                seguimiento.comprobar()
+            posiciones = orden[inicios[g]:finales[g]]
+            if posiciones[-1] - posiciones[0] < lon:
+                continue
+            # Distancias de todos los pares (i < j) en orden de i y luego j, sin solapamiento
+            filas, columnas = np.triu_indices(len(posiciones), 1)
+            distancias = posiciones[columnas] - posiciones[filas]
+            validas = distancias >= lon
+            if validas.any():
+                primera = posiciones[filas[np.argmax(validas)]]
+                encontradas.append((primera, g, distancias[validas].tolist()))
+
+        # Mismo orden que la búsqueda secuencial: por la primera aparición con repetición
+        encontradas.sort(key=lambda x: x[0])
+        for _, g, distancias in encontradas:
+            ngrama = ordenados[inicios[g]].tobytes()
+            ancho = len(ngrama) // lon
+            codigos = np.frombuffer(ngrama, dtype=np.uint8 if ancho == 1 else np.uint32)
+            repeticiones[''.join(map(chr, codigos.tolist()))] = distancias
+        seguimiento.avanzar()
+    seguimiento.terminar()
     return repeticiones
 
 def estimar_longitud_clave(repeticiones):
@@ -100,6 +447,82 @@ def estimar_longitud_clave(repeticiones):
     contador = Counter(posibles_longitudes)
     return contador.most_common()
 
+# Letras mínimas por columna para que el IC de un periodo sea fiable
+_LETRAS_MIN_COLUMNA = 10
+# Letras por bloque al barrer todos los periodos a la vez: acota la matriz (periodos x letras)
+_LETRAS_BARRIDO = 1 << 16
+
+
+def _codigos_densos(texto):
+    """Letras del texto como códigos consecutivos 0..k-1 (k = letras distintas)"""
+    _, codigos = letras_minusculas(texto)
+    _, densos = np.unique(codigos, return_inverse=True)
+    return densos.ravel(), int(densos.max()) + 1 if len(densos) else 0
+
+
+def estimar_longitud_clave_ic(texto, longitud_max=20):
+    """
+    Estima la longitud de la clave con el índice de coincidencia (IC) medio de las columnas
+    de cada periodo 1..longitud_max. Con la longitud correcta cada columna es un César y su IC
+    se parece al del español (~7,5 %) en lugar del de un texto aleatorio (~3,8 %).
+    Devuelve [(longitud, IC en %)] ordenado como Counter.most_common()
+    """
+    codigos, num_simbolos = _codigos_densos(texto)
+    n = len(codigos)
+    # Con columnas de muy pocas letras el IC es puro ruido y favorece claves largas
+    num_periodos = min(longitud_max, n // _LETRAS_MIN_COLUMNA)
+    if num_periodos < 1:
+        return []
+
+    # Histograma de todos los periodos y columnas en un solo barrido:
+    # celda (periodo, columna, letra), con las columnas de cada periodo a partir de 0
+    periodos = np.arange(1, num_periodos + 1)[:, None]
+    desplazamientos = (periodos - 1) * num_periodos * num_simbolos
+    conteos = np.zeros(num_periodos * num_periodos * num_simbolos, dtype=np.int64)
+    for inicio in range(0, n, _LETRAS_BARRIDO):
+        bloque = codigos[inicio:inicio + _LETRAS_BARRIDO]
+        columnas = np.arange(inicio, inicio + len(bloque)) % periodos
+        conteos += np.bincount((desplazamientos + columnas * num_simbolos + bloque).ravel(),
+                               minlength=len(conteos))
+    conteos = conteos.reshape(num_periodos, num_periodos, num_simbolos)
+
+    # Las columnas que no existen en un periodo (columna >= periodo) quedan fuera de la media
+    tamaños = conteos.sum(axis=2)
+    existe = np.arange(num_periodos) < periodos
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ic = np.where(existe, (conteos * (conteos - 1)).sum(axis=2) / (tamaños * (tamaños - 1)), 0.0)
+    medias = ic.sum(axis=1) / periodos.ravel()
+    puntuaciones = [(periodo, round(float(media) * 100, 1)) for periodo, media in enumerate(medias, 1)]
+
+    # A igual IC gana la longitud más corta (los múltiplos de la clave también puntúan alto)
+    return sorted(puntuaciones, key=lambda x: (-x[1], x[0]))
+
+
+def estimar_longitud_clave_autocorrelacion(texto, longitud_max=20):
+    """
+    Estima la longitud de la clave comparando el texto consigo mismo desplazado 1..longitud_max
+    letras: cuando el desplazamiento es múltiplo de la clave coinciden muchas más letras.
+    Devuelve [(desplazamiento, % coincidencias)] ordenado como Counter.most_common()
+    """
+    codigos, num_simbolos = _codigos_densos(texto)
+    n = len(codigos)
+    maximo = min(longitud_max, n // 2)
+    if maximo < 1:
+        return []
+
+    # Fila i = letra i seguida de las `maximo` siguientes; tras el final van códigos que no
+    # coinciden con ninguna letra, así cada desplazamiento solo cuenta sus n - d parejas
+    relleno = np.arange(num_simbolos, num_simbolos + maximo, dtype=codigos.dtype)
+    ventanas = np.lib.stride_tricks.sliding_window_view(np.concatenate([codigos, relleno]), maximo + 1)
+    coincidencias = np.zeros(maximo, dtype=np.int64)
+    for inicio in range(0, n, _LETRAS_BARRIDO):
+        bloque = ventanas[inicio:inicio + _LETRAS_BARRIDO]
+        coincidencias += np.count_nonzero(bloque[:, 1:] == bloque[:, :1], axis=0)
+
+    puntuaciones = [(d, round(int(c) / (n - d) * 100, 1)) for d, c in enumerate(coincidencias, 1)]
+
+    return sorted(puntuaciones, key=lambda x: (-x[1], x[0]))
+
 def obtener_longitudes_mas_probables(sugerencias):
     if not sugerencias:
         return []
@@ -114,3 +537,228 @@ def obtener_longitudes_mas_probables(sugerencias):
     ]
 
     return longitudes
+
+
+def _resolver_columna(columna):
+    """
+    Resuelve una columna como un César: correla su histograma, rotado por cada uno de los
+    26 desplazamientos, con las frecuencias del español y devuelve el que mejor encaja
+    """
+    histograma = np.bincount(columna, minlength=26)
+    rotados = histograma[(np.arange(26)[None, :] + np.arange(26)[:, None]) % 26]
+    return int(np.argmax(rotados @ _tablas().frecuencias_esperadas))
+
+
+def _recuperar_con_longitud(texto_cifrado, codigos, longitud):
+    inicio = time.perf_counter()
+
+    # Cada columna es una vista con paso `longitud` sobre el array de letras (sin copias)
+    desplazamientos = [_resolver_columna(codigos[i::longitud]) for i in range(longitud)]
+    clave = ''.join(chr(97 + d) for d in desplazamientos)
+    t_clave = time.perf_counter()
+
+    # Descifrar es cifrar con la clave inversa (26 - desplazamiento)
+    clave_inversa = ''.join(chr(97 + (26 - d) % 26) for d in desplazamientos)
+    texto_descifrado = Cifrados.cifrado_vigenere(texto_cifrado, clave_inversa)
+    t_descifrado = time.perf_counter()
+
+    histograma = histograma_letras(texto_descifrado)
+    esperados = _tablas().frecuencias_esperadas * histograma.sum()
+    chi2 = float(((histograma - esperados) ** 2 / esperados).sum())
+
+    return {
+        'Longitud': longitud,
+        'Clave': clave,
+        'Chi²': round(chi2, 2),
+        'Texto descifrado': texto_descifrado,
+        'Tiempo clave (ms)': round((t_clave - inicio) * 1000, 3),
+        'Tiempo descifrado (ms)': round((t_descifrado - t_clave) * 1000, 3),
+    }
+
+
+def recuperar_clave_vigenere(texto_cifrado, longitudes):
+    """
+    Recupera la clave de Vigenère para cada longitud candidata (p. ej. la salida de
+    obtener_longitudes_mas_probables) resolviendo cada columna como un César.
+    Las longitudes se evalúan en paralelo; devuelve un resultado por longitud, del más
+    parecido al español (menor chi-cuadrado) al menos, con el tiempo de cada etapa
+    """
+    try:
+        datos = np.frombuffer(texto_cifrado.encode('latin-1'), dtype=np.uint8)
+        tablas = _tablas()
+        codigos = tablas.codigo_letra[datos[tablas.es_letra[datos]]]
+    except UnicodeEncodeError:
+        codigos = np.array([(ord(c.lower()) - 97) % 26 for c in texto_cifrado if c.isalpha()], dtype=np.uint8)
+
+    longitudes = sorted({int(l) for l in longitudes if 0 < l <= len(codigos)})
+    if not longitudes:
+        return []
+
+    with ThreadPoolExecutor(max_workers=len(longitudes)) as ejecutor:
+        resultados = list(ejecutor.map(lambda l: _recuperar_con_longitud(texto_cifrado, codigos, l), longitudes))
+
+    # A igual puntuación gana la clave más corta (una clave repetida da el mismo texto)
+    return sorted(resultados, key=lambda r: (r['Chi²'], r['Longitud']))
+
+
+RUTA_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'datos', 'corpus_es.txt')
+
+# Pesos de la interpolación entre cuadrigramas, trigramas, bigramas y letras sueltas
+_PESOS_INTERPOLACION = (0.5, 0.3, 0.15, 0.05)
+
+
+def _codigos_az(texto):
+    """Solo las letras a-z (en minúscula) del texto como códigos 0..25"""
+    datos = np.frombuffer(texto.lower().encode('latin-1', errors='ignore'), dtype=np.uint8)
+    return (datos[(datos >= 97) & (datos <= 122)] - 97).astype(np.int64)
+
+
+@lru_cache(maxsize=1)
+def tabla_cuadrigramas(ruta_corpus=RUTA_CORPUS):
+    """
+    Tabla (26^4,) float32 con log P(d | abc) del español, estimada a partir del corpus e
+    interpolada con trigramas, bigramas y letras para no dejar cuadrigramas a cero.
+    Se calcula una sola vez por proceso
+    """
+    with open(ruta_corpus, encoding='utf-8') as f:
+        codigos = _codigos_az(f.read())
+
+    def condicional(orden):
+        # P(última letra | las orden-1 anteriores) para todas las combinaciones de `orden` letras
+        indices = sum(codigos[i:len(codigos) - orden + 1 + i] * 26 ** (orden - 1 - i) for i in range(orden))
+        conteos = np.bincount(indices, minlength=26 ** orden).reshape(-1, 26).astype(np.float64)
+        contextos = conteos.sum(axis=1, keepdims=True)
+        return np.divide(conteos, contextos, out=np.zeros_like(conteos), where=contextos > 0).ravel()
+
+    letras = (np.bincount(codigos, minlength=26) + 1) / (len(codigos) + 26)
+    p4, p3, p2 = condicional(4), condicional(3), condicional(2)
+    l4, l3, l2, l1 = _PESOS_INTERPOLACION
+    # Cada modelo menor se repite sobre las letras de contexto que no usa
+    probabilidad = (l4 * p4 + l3 * np.tile(p3, 26) + l2 * np.tile(p2, 26 ** 2) + l1 * np.tile(letras, 26 ** 3))
+    return np.log(probabilidad).astype(np.float32)
+
+
+def _escalada(codigos, tabla, clave, limite):
+    """
+    Hill-climbing sobre la clave de descifrado (clave[letra cifrada] = letra plana)
+    probando intercambios de dos letras. La puntuación se actualiza con la diferencia
+    en los cuadrigramas que tocan las letras intercambiadas, sin volver a descifrar todo
+    """
+    n = len(codigos)
+    ventana = np.arange(4)
+    potencias = _tablas().potencias_cuadrigrama
+    plano = clave[codigos]
+
+    # Posiciones de cada letra cifrada y cuadrigramas (por su inicio) en los que participa
+    posiciones = [np.flatnonzero(codigos == c) for c in range(26)]
+    afectados = [np.unique(np.clip(p[:, None] - ventana, 0, n - 4)) for p in posiciones]
+
+    mejora = True
+    while mejora and time.time() < limite:
+        mejora = False
+        for x in range(26):
+            for y in range(x + 1, 26):
+                if not len(posiciones[x]) and not len(posiciones[y]):
+                    continue
+                inicios = np.union1d(afectados[x], afectados[y])
+                antes = plano[inicios[:, None] + ventana]
+                a, b = clave[x], clave[y]
+                despues = np.where(antes == a, b, np.where(antes == b, a, antes))
+                delta = float(tabla[despues @ potencias].sum()
+                              - tabla[antes @ potencias].sum())
+                if delta > 1e-9:
+                    clave[x], clave[y] = b, a
+                    plano[posiciones[x]] = b
+                    plano[posiciones[y]] = a
+                    mejora = True
+
+    # Puntuación final calculada de una vez para que claves iguales puntúen exactamente igual
+    cuadrigramas = np.lib.stride_tricks.sliding_window_view(plano, 4)
+    puntuacion = float(tabla[cuadrigramas @ potencias].sum(dtype=np.float64))
+    return puntuacion, clave
+
+
+def _reinicio(codigos, semilla, limite, clave_inicial=None):
+    """Un reinicio completo de la escalada (se ejecuta en un proceso del pool)"""
+    tabla = tabla_cuadrigramas()
+    if clave_inicial is None:
+        clave_inicial = np.random.default_rng(semilla).permutation(26)
+    puntuacion, clave = _escalada(codigos, tabla, np.array(clave_inicial), limite)
+    return puntuacion, clave.tolist()
+
+
+class AtaqueSustitucion:
+    """
+    Rompe automáticamente un cifrado de sustitución monoalfabética
+    (el que produce Cifrados.cifrado_sustitucion)
+    """
+
+    @staticmethod
+    def clave_por_frecuencias(codigos):
+        """Clave inicial que empareja las letras por orden de frecuencia con el español"""
+        orden_cifrado = np.argsort(-np.bincount(codigos, minlength=26), kind='stable')
+        orden_espanol = np.argsort(-_tablas().frecuencias_esperadas, kind='stable')
+        clave = np.empty(26, dtype=np.int64)
+        clave[orden_cifrado] = orden_espanol
+        return clave
+
+    @staticmethod
+    def resolver(texto_cifrado, tiempo_max=10.0, procesos=None, reinicios_convergencia=3, semilla=None):
+        """
+        Busca la clave con hill-climbing y reinicios aleatorios repartidos en un pool de procesos.
+        Para al agotar tiempo_max segundos o cuando reinicios_convergencia reinicios han llegado
+        a la misma mejor puntuación
+        """
+        inicio = time.time()
+        limite = inicio + tiempo_max
+        codigos = _codigos_az(texto_cifrado)
+        if len(codigos) < 4:
+            return None
+
+        procesos = procesos or os.cpu_count() or 1
+        semillas = np.random.SeedSequence(semilla)
+        mejor = (float('-inf'), None)
+        convergencias = 0
+        reinicios = 0
+
+        def registrar(resultado):
+            nonlocal mejor, convergencias, reinicios
+            reinicios += 1
+            if resultado[0] > mejor[0] + 1e-6:
+                mejor = resultado
+                convergencias = 1
+            elif abs(resultado[0] - mejor[0]) <= 1e-6:
+                convergencias += 1
+
+        def terminar():
+            return time.time() >= limite or convergencias >= reinicios_convergencia
+
+        # El primer reinicio parte del emparejamiento por frecuencias
+        clave_inicial = AtaqueSustitucion.clave_por_frecuencias(codigos)
+        if procesos == 1:
+            registrar(_reinicio(codigos, None, limite, clave_inicial))
+            while not terminar():
+                registrar(_reinicio(codigos, semillas.spawn(1)[0], limite))
+        else:
+            with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+                pendientes = {ejecutor.submit(_reinicio, codigos, None, limite, clave_inicial)}
+                pendientes |= {ejecutor.submit(_reinicio, codigos, semillas.spawn(1)[0], limite)
+                               for _ in range(procesos - 1)}
+                while pendientes:
+                    hechos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                    for futuro in hechos:
+                        registrar(futuro.result())
+                    if not terminar():
+                        pendientes |= {ejecutor.submit(_reinicio, codigos, semillas.spawn(1)[0], limite)
+                                       for _ in hechos}
+
+        puntuacion, clave = mejor
+        clave_descifrado = {chr(97 + c): chr(97 + p) for c, p in enumerate(clave)}
+        return {
+            'clave': {plana: cifrada for cifrada, plana in clave_descifrado.items()},
+            'clave_descifrado': clave_descifrado,
+            'texto_descifrado': Cifrados.cifrado_sustitucion(texto_cifrado, clave_descifrado)[0],
+            'puntuacion': round(puntuacion / max(len(codigos) - 3, 1), 4),
+            'reinicios': reinicios,
+            'tiempo': round(time.time() - inicio, 3),
+        }
@@ -1,5 +1,187 @@
 import hashlib
-import matplotlib.pyplot as plt
+import itertools
+import json
+import math
+import mmap
+import os
+import platform
+import ssl
+import string
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+
+from dependencias import importar_diferido
+from progreso import Seguimiento
+
+# numpy se carga en el primer cálculo, no al importar el módulo
+np = importar_diferido("numpy")
+
+# Directorio de los ficheros que se calculan una vez y se reutilizan (calibración, índices)
+DIRECTORIO_CACHE = os.environ.get("SIMULADOR_CACHE",
+                                  os.path.join(os.path.expanduser("~"), ".cache", "simulador_ataques"))
+
+# Conjuntos de caracteres de las máscaras al estilo hashcat
+CONJUNTOS_MASCARA = {
+    "l": string.ascii_lowercase,
+    "u": string.ascii_uppercase,
+    "d": string.digits,
+    "s": string.punctuation,
+}
+CONJUNTOS_MASCARA["a"] = "".join(CONJUNTOS_MASCARA.values())
+
+# Estado de cada proceso del pool de crackeo (se fija una vez en el inicializador)
+_objetivos_trabajador = set()
+_algoritmo_trabajador = None
+_mascara_trabajador = None
+
+
+def _inicializar_trabajador(objetivos, metodo, mascara=None):
+    global _objetivos_trabajador, _algoritmo_trabajador, _mascara_trabajador
+    _objetivos_trabajador = objetivos
+    _algoritmo_trabajador = AtaqueFuerzaBruta.ALGORITMOS[metodo]
+    _mascara_trabajador = Mascara(mascara) if mascara is not None else None
+
+
+def _crackear_lote(lote):
+    """Hashea un lote de candidatos (bytes) y devuelve los que coinciden con algún objetivo"""
+    algoritmo, objetivos = _algoritmo_trabajador, _objetivos_trabajador
+    return [candidato for candidato in lote if algoritmo(candidato).digest() in objetivos], len(lote)
+
+
+def _crackear_rango(rango):
+    """
+    Hashea los candidatos de la máscara con índices en [inicio, fin). Cada proceso genera
+    sus propios candidatos en un bytearray reutilizado, sin recibirlos por la cola
+    """
+    inicio, fin = rango
+    algoritmo, objetivos = _algoritmo_trabajador, _objetivos_trabajador
+    ancho = _mascara_trabajador.ancho
+    encontradas = []
+    for _, buffer in _mascara_trabajador.lotes(inicio, fin):
+        encontradas += [bytes(buffer[i:i + ancho]) for i in range(0, len(buffer), ancho)
+                        if algoritmo(buffer[i:i + ancho]).digest() in objetivos]
+    return encontradas, fin - inicio
+
+
+def _medir_velocidad(metodo, duracion):
+    """Hashes por segundo de un algoritmo en un núcleo, hasheando candidatos cortos durante `duracion` s"""
+    algoritmo = AtaqueFuerzaBruta.ALGORITMOS[metodo]
+    candidatos = [f"{i:08d}".encode() for i in range(10_000)]
+    hechos = 0
+    inicio = time.perf_counter()
+    while True:
+        for candidato in candidatos:
+            algoritmo(candidato).digest()
+        hechos += len(candidatos)
+        transcurrido = time.perf_counter() - inicio
+        if transcurrido >= duracion:
+            return hechos / transcurrido
+
+
+def _lotes(candidatos, tamaño_lote):
+    """Agrupa los candidatos (str) en listas de bytes de tamaño_lote elementos"""
+    candidatos = iter(candidatos)
+    while True:
+        lote = [c.encode('utf-8') for c in itertools.islice(candidatos, tamaño_lote)]
+        if not lote:
+            return
+        yield lote
+
+
+class Mascara:
+    """
+    Espacio de candidatos de una máscara al estilo hashcat: ?l minúsculas, ?u mayúsculas,
+    ?d dígitos, ?s símbolos, ?a todos, ?? el propio '?'; cualquier otro carácter es literal.
+    Cada índice de [0, espacio) corresponde directamente a un candidato, así que el espacio
+    se puede repartir en rangos disjuntos o reanudar desde un índice guardado
+    """
+
+    def __init__(self, mascara):
+        self.mascara = mascara
+        conjuntos = []
+        i = 0
+        while i < len(mascara):
+            if mascara[i] == "?" and i + 1 < len(mascara):
+                if mascara[i + 1] == "?":
+                    conjuntos.append("?")
+                elif mascara[i + 1] in CONJUNTOS_MASCARA:
+                    conjuntos.append(CONJUNTOS_MASCARA[mascara[i + 1]])
+                else:
+                    raise ValueError(f"Conjunto de máscara desconocido: ?{mascara[i + 1]}")
+                i += 2
+            else:
+                conjuntos.append(mascara[i])
+                i += 1
+
+        # Una tabla (caracteres, bytes por carácter) por posición
+        self.tablas = []
+        for conjunto in conjuntos:
+            codificados = [c.encode("utf-8") for c in conjunto]
+            if len({len(c) for c in codificados}) > 1:
+                raise ValueError(f"Los caracteres de '{conjunto}' deben ocupar los mismos bytes")
+            self.tablas.append(np.frombuffer(b"".join(codificados), dtype=np.uint8).reshape(len(codificados), -1))
+        self.tamaños = [len(t) for t in self.tablas]
+        self.ancho = sum(t.shape[1] for t in self.tablas)
+        self.espacio = 1
+        for tamaño in self.tamaños:
+            self.espacio *= tamaño
+
+    def candidato(self, indice):
+        """Candidato número `indice` (el último carácter es el que cambia más rápido)"""
+        if not 0 <= indice < self.espacio:
+            raise IndexError(indice)
+        caracteres = []
+        for tabla, tamaño in zip(reversed(self.tablas), reversed(self.tamaños)):
+            indice, digito = divmod(indice, tamaño)
+            caracteres.append(tabla[digito].tobytes())
+        return b"".join(reversed(caracteres)).decode("utf-8")
+
+    def rangos(self, partes, inicio=0):
+        """Divide [inicio, espacio) en `partes` rangos disjuntos, uno por trabajador"""
+        total = self.espacio - inicio
+        cortes = [inicio + total * i // partes for i in range(partes + 1)]
+        return [(a, b) for a, b in zip(cortes, cortes[1:]) if b > a]
+
+    def lotes(self, inicio=0, fin=None, tamaño_lote=4096):
+        """
+        Genera los candidatos de [inicio, fin) en lotes (índice inicial, memoryview). Todos los
+        lotes usan el mismo bytearray: cada candidato ocupa `ancho` bytes consecutivos y el
+        contenido solo es válido hasta pedir el siguiente lote
+        """
+        fin = self.espacio if fin is None else min(fin, self.espacio)
+        buffer = bytearray(tamaño_lote * self.ancho)
+        matriz = np.frombuffer(buffer, dtype=np.uint8).reshape(tamaño_lote, self.ancho)
+        vista = memoryview(buffer)
+        while inicio < fin:
+            num = min(tamaño_lote, fin - inicio)
+            self._rellenar(inicio, matriz[:num])
+            yield inicio, vista[:num * self.ancho]
+            inicio += num
+
+    def _rellenar(self, inicio, salida):
+        """
+        Escribe en `salida` los candidatos inicio, inicio + 1, ... sumando en base mixta los
+        dígitos de `inicio` (entero de Python, sin límite) y los del desplazamiento de cada fila
+        """
+        desplazamientos = np.arange(len(salida), dtype=np.int64)
+        acarreo = np.zeros(len(salida), dtype=np.int64)
+        columna = self.ancho
+        for tabla, tamaño in zip(reversed(self.tablas), reversed(self.tamaños)):
+            inicio, digito_inicio = divmod(inicio, tamaño)
+            total = digito_inicio + desplazamientos % tamaño + acarreo
+            desplazamientos //= tamaño
+            acarreo = total // tamaño
+            columna -= tabla.shape[1]
+            salida[:, columna:columna + tabla.shape[1]] = tabla[total % tamaño]
+
+    def __iter__(self):
+        for _, buffer in self.lotes():
+            datos = bytes(buffer)
+            for i in range(0, len(datos), self.ancho):
+                yield datos[i:i + self.ancho].decode("utf-8")
+
 
 class AtaqueFuerzaBruta:
     """
@@ -13,22 +195,134 @@ class AtaqueFuerzaBruta:
         "Botnet/Cloud": 1_000_000_000_000,  # 1 billón
     }
 
+    ALGORITMOS = {
+        "md5": hashlib.md5,
+        "sha1": hashlib.sha1,
+        "sha256": hashlib.sha256,
+    }
+
     @staticmethod
     def hash_password(contraseña, metodo="md5"):
         """
         Genera el hash de una contraseña
         ADVERTENCIA: MD5 y SHA1 son inseguros, se usan SOLO con fines educativos
         """
-        contraseña_bytes = contraseña.encode('utf-8')
+        algoritmo = AtaqueFuerzaBruta.ALGORITMOS.get(metodo, hashlib.md5)
+        return algoritmo(contraseña.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def candidatos_diccionario(palabras):
+        """Candidatos de un diccionario tal cual"""
+        yield from palabras
+
+    @staticmethod
+    def candidatos_reglas(palabras):
+        """Candidatos de un diccionario con las reglas de mutación aplicadas a cada palabra"""
+        return AtaqueDiccionarioReglas.generar_candidatos(palabras)
+
+    @staticmethod
+    def candidatos_mascara(mascara):
+        """Candidatos (str) de una máscara al estilo hashcat, p. ej. "?u?l?l?l?d?d" (ver Mascara)"""
+        return iter(Mascara(mascara))
+
+    @staticmethod
+    def crackear(hashes_objetivo, candidatos, metodo="md5", procesos=None, tamaño_lote=20_000, inicio=0):
+        """
+        Busca las contraseñas de un conjunto de hashes (hexadecimales) probando los candidatos.
+        Compara los digest() en bytes contra un set y reparte los lotes en un pool de procesos.
+        Si `candidatos` es una Mascara, los lotes son rangos de índices que cada proceso genera
+        por su cuenta, empezando en `inicio`; "indice_siguiente" permite reanudar el ataque.
+        Devuelve las contraseñas encontradas y la velocidad medida en hashes por segundo
+        """
+        if metodo not in AtaqueFuerzaBruta.ALGORITMOS:
+            raise ValueError(f"Algoritmo no soportado: {metodo}")
+        tamaño_digest = AtaqueFuerzaBruta.ALGORITMOS[metodo]().digest_size
+        objetivos = set()
+        for h in hashes_objetivo:
+            digest = bytes.fromhex(h.strip())
+            if len(digest) != tamaño_digest:
+                raise ValueError(f"'{h}' no es un hash {metodo} válido")
+            objetivos.add(digest)
 
-        if metodo == "md5":
-            return hashlib.md5(contraseña_bytes).hexdigest()
-        elif metodo == "sha1":
-            return hashlib.sha1(contraseña_bytes).hexdigest()
-        elif metodo == "sha256":
-            return hashlib.sha256(contraseña_bytes).hexdigest()
+        procesos = procesos or os.cpu_count() or 1
+        if isinstance(candidatos, Mascara):
+            mascara = candidatos.mascara
+            rangos = ((a, min(a + tamaño_lote, candidatos.espacio))
+                      for a in range(inicio, candidatos.espacio, tamaño_lote))
+            lotes, funcion = rangos, _crackear_rango
         else:
-            return hashlib.md5(contraseña_bytes).hexdigest()
+            mascara = None
+            lotes, funcion = _lotes(candidatos, tamaño_lote), _crackear_lote
+        encontradas = {}
+        intentos = 0
+        t_inicio = time.perf_counter()
+
+        def registrar(resultado):
+            nonlocal intentos
+            coincidencias, num = resultado
+            intentos += num
+            for candidato in coincidencias:
+                digest = AtaqueFuerzaBruta.ALGORITMOS[metodo](candidato).hexdigest()
+                encontradas[digest] = candidato.decode('utf-8')
+
+        if procesos == 1:
+            _inicializar_trabajador(objetivos, metodo, mascara)
+            for lote in lotes:
+                registrar(funcion(lote))
+                if len(encontradas) == len(objetivos):
+                    break
+        else:
+            with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_trabajador,
+                                     initargs=(objetivos, metodo, mascara)) as ejecutor:
+                # Solo unos pocos lotes en vuelo: los candidatos se generan a medida que se consumen
+                pendientes = {ejecutor.submit(funcion, lote)
+                              for lote in itertools.islice(lotes, 2 * procesos)}
+                while pendientes:
+                    hechos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                    for futuro in hechos:
+                        registrar(futuro.result())
+                    if len(encontradas) < len(objetivos):
+                        pendientes |= {ejecutor.submit(funcion, lote)
+                                       for lote in itertools.islice(lotes, len(hechos))}
+
+        segundos = time.perf_counter() - t_inicio
+        resultado = {
+            "encontradas": encontradas,
+            "intentos": intentos,
+            "segundos": segundos,
+            "hashes_por_segundo": intentos / segundos if segundos > 0 else 0.0,
+            "procesos": procesos,
+        }
+        if mascara is not None:
+            # Todos los rangos enviados han terminado: se puede seguir justo después del último
+            resultado["espacio"] = candidatos.espacio
+            resultado["indice_siguiente"] = inicio + intentos
+        return resultado
+
+    @staticmethod
+    def buscar_en_indice(hashes_objetivo, metodo="md5", indice=None):
+        """
+        Busca los hashes en un IndiceHashes (por defecto, el del diccionario común con reglas).
+        Devuelve lo mismo que crackear, contando cada búsqueda binaria como un intento
+        """
+        indice = indice or IndiceHashes.comun(metodo)
+        inicio = time.perf_counter()
+        encontradas = {}
+        intentos = 0
+        for h in hashes_objetivo:
+            intentos += 1
+            contraseña = indice.buscar(h)
+            if contraseña is not None:
+                encontradas[h.strip().lower()] = contraseña
+        segundos = time.perf_counter() - inicio
+        return {
+            "encontradas": encontradas,
+            "intentos": intentos,
+            "segundos": segundos,
+            "hashes_por_segundo": intentos / segundos if segundos > 0 else 0.0,
+            "procesos": 1,
+            "tamaño_indice": indice.num_registros,
+        }
 
     @staticmethod
     def generar_diccionario_comun():
@@ -44,6 +338,18 @@ class AtaqueFuerzaBruta:
             "superman", "batman", "pokemon", "michael", "jennifer"
         ]
 
+    @staticmethod
+    def conjunto_caracteres(incluye_mayus=True, incluye_numeros=True, incluye_simbolos=False):
+        """Caracteres que cuenta calcular_tiempo_estimado con las mismas opciones"""
+        caracteres = string.ascii_lowercase
+        if incluye_mayus:
+            caracteres += string.ascii_uppercase
+        if incluye_numeros:
+            caracteres += string.digits
+        if incluye_simbolos:
+            caracteres += string.punctuation
+        return caracteres
+
     @staticmethod
     def calcular_tiempo_estimado(longitud, incluye_mayus=True, incluye_numeros=True, incluye_simbolos=False,
                                  velocidad=1_000_000):
@@ -59,9 +365,14 @@ class AtaqueFuerzaBruta:
             charset_size += 32
 
         combinaciones = charset_size ** longitud
-        segundos = combinaciones / velocidad
+        try:
+            segundos = combinaciones / velocidad
+        except OverflowError:  # Más de 1e308 segundos (contraseñas de cientos de caracteres)
+            segundos = math.inf
 
-        if segundos < 60:
+        if math.isinf(segundos):
+            return "más de 10^300 años", segundos
+        elif segundos < 60:
             return f"{segundos:.1f} segundos", segundos
         elif segundos < 3600:
             return f"{segundos / 60:.1f} minutos", segundos
@@ -73,60 +384,39 @@ class AtaqueFuerzaBruta:
             return f"{segundos / 31536000:.1f} años", segundos
 
     @staticmethod
-    def analizar_seguridad_contraseña(contraseña):
+    def velocidades_escenarios(metodo="md5"):
         """
-        Analiza la seguridad de una contraseña
+        Escenarios de ataque con la velocidad medida en este equipo. Los de GPU y botnet se
+        extrapolan como múltiplos de lo medido con la misma proporción que la tabla VELOCIDADES
         """
-        resultado = {
-            "longitud": len(contraseña),
-            "tiene_minusculas": any(c.islower() for c in contraseña),
-            "tiene_mayusculas": any(c.isupper() for c in contraseña),
-            "tiene_numeros": any(c.isdigit() for c in contraseña),
-            "tiene_simbolos": any(c in "!@#$%^&*()_+-=[]{}|;:,.<>?" for c in contraseña),
-            "es_comun": False,
-            "fortaleza": "",
-            "tiempos": {}
-        }
+        medidas = CalibracionHashes.obtener()[metodo]
+        base = AtaqueFuerzaBruta.VELOCIDADES["PC doméstico"]
+        escenarios = {"Este equipo (1 núcleo)": medidas["un_nucleo"]}
+        if medidas["nucleos"] > 1:
+            escenarios[f"Este equipo ({medidas['nucleos']} núcleos)"] = medidas["todos_nucleos"]
+        escenarios["GPU dedicada"] = medidas["todos_nucleos"] * AtaqueFuerzaBruta.VELOCIDADES["GPU dedicada"] / base
+        escenarios["Botnet/Cloud"] = medidas["todos_nucleos"] * AtaqueFuerzaBruta.VELOCIDADES["Botnet/Cloud"] / base
+        return escenarios
 
-        # Verificar si está en diccionario común
-        diccionario = AtaqueFuerzaBruta.generar_diccionario_comun()
-        if contraseña.lower() in [p.lower() for p in diccionario]:
-            resultado["es_comun"] = True
-
-        # Calcular tiempos para diferentes escenarios
-        for escenario, velocidad in AtaqueFuerzaBruta.VELOCIDADES.items():
-            tiempo_str, _ = AtaqueFuerzaBruta.calcular_tiempo_estimado(
-                resultado["longitud"],
-                resultado["tiene_mayusculas"],
-                resultado["tiene_numeros"],
-                resultado["tiene_simbolos"],
-                velocidad
-            )
-            resultado["tiempos"][escenario] = tiempo_str
-
-        # Determinar fortaleza
-        puntuacion = 0
-        if resultado["longitud"] >= 12:
-            puntuacion += 3
-        elif resultado["longitud"] >= 8:
-            puntuacion += 2
-        else:
-            puntuacion += 1
-
-        puntuacion += sum([resultado["tiene_mayusculas"],
-                           resultado["tiene_numeros"],
-                           resultado["tiene_simbolos"]])
-
-        if resultado["es_comun"]:
-            resultado["fortaleza"] = "MUY DÉBIL"
-        elif puntuacion <= 3:
-            resultado["fortaleza"] = "DÉBIL"
-        elif puntuacion <= 5:
-            resultado["fortaleza"] = "MODERADA"
-        else:
-            resultado["fortaleza"] = "FUERTE"
+    @staticmethod
+    def analizar_seguridad_contraseña(contraseña, velocidades=None):
+        """
+        Analiza la seguridad de una contraseña.
+        Los tiempos usan las velocidades medidas en este equipo salvo que se pasen otras
+        """
+        if velocidades is None:
+            velocidades = AtaqueFuerzaBruta.velocidades_escenarios()
+        return _resultado_auditoria(len(contraseña), _clases_caracteres(contraseña),
+                                    contraseña.lower() in _contraseñas_comunes(), velocidades)
 
-        return resultado
+    @staticmethod
+    def auditar_contraseñas(contraseñas, velocidades=None, tamaño_lote=None):
+        """
+        Analiza muchas contraseñas (un iterable de str o la ruta pathlib.Path de un fichero con
+        una por línea) y devuelve un generador de filas con las columnas de
+        AuditoriaContraseñas.columnas. Ver AuditoriaContraseñas
+        """
+        return AuditoriaContraseñas(velocidades).filas(contraseñas, tamaño_lote)
 
     @staticmethod
     def visualizar_comparativa_tiempos(analisis):
@@ -134,204 +424,931 @@ class AtaqueFuerzaBruta:
         Crea una visualización de los tiempos estimados
         Maneja errores de renderizado gráfico
         """
+        # matplotlib solo se carga al dibujar, para poder usar los ataques sin interfaz gráfica
+        import graficas
+
+        return graficas.comparativa_tiempos(analisis)
+
+
+@lru_cache(maxsize=1)
+def _contraseñas_comunes():
+    """Diccionario común en minúsculas, cargado una sola vez por proceso"""
+    return frozenset(p.lower() for p in AtaqueFuerzaBruta.generar_diccionario_comun())
+
+
+# Clases de caracteres de la auditoría como bits de una máscara
+MINUSCULAS, MAYUSCULAS, NUMEROS, SIMBOLOS = 1, 2, 4, 8
+SIMBOLOS_AUDITORIA = "!@#$%^&*()_+-=[]{}|;:,.<>?"
+
+
+@lru_cache(maxsize=1)
+def _bits_ascii():
+    """Bits de clase de cada carácter ASCII (tabla de 128 posiciones, 0 si no es de ninguna clase)"""
+    bits = []
+    for codigo in range(128):
+        c = chr(codigo)
+        bits.append((MINUSCULAS if c.islower() else 0) | (MAYUSCULAS if c.isupper() else 0) |
+                    (NUMEROS if c.isdigit() else 0) | (SIMBOLOS if c in SIMBOLOS_AUDITORIA else 0))
+    return bits
+
+
+@lru_cache(maxsize=1)
+def _tabla_bits():
+    """_bits_ascii como tabla uint8 de 256 bytes para clasificar lotes con NumPy"""
+    return np.array(_bits_ascii() + [0] * 128, dtype=np.uint8)
+
+
+def _clases_caracteres(contraseña):
+    """Máscara con las clases de caracteres de la contraseña, en una pasada por sus caracteres distintos"""
+    bits_ascii = _bits_ascii()
+    mascara = 0
+    for c in set(contraseña):
+        codigo = ord(c)
+        if codigo < 128:
+            mascara |= bits_ascii[codigo]
+        else:
+            mascara |= (MINUSCULAS if c.islower() else 0) | (MAYUSCULAS if c.isupper() else 0) | \
+                       (NUMEROS if c.isdigit() else 0)
+    return mascara
+
+
+def _resultado_auditoria(longitud, mascara, es_comun, velocidades):
+    """El dict de analizar_seguridad_contraseña a partir de la longitud, las clases y si es común"""
+    resultado = {
+        "longitud": longitud,
+        "tiene_minusculas": bool(mascara & MINUSCULAS),
+        "tiene_mayusculas": bool(mascara & MAYUSCULAS),
+        "tiene_numeros": bool(mascara & NUMEROS),
+        "tiene_simbolos": bool(mascara & SIMBOLOS),
+        "es_comun": es_comun,
+        "fortaleza": "",
+        "tiempos": {},
+        "segundos": {}
+    }
+
+    # Calcular tiempos para diferentes escenarios
+    for escenario, velocidad in velocidades.items():
+        tiempo_str, segundos = AtaqueFuerzaBruta.calcular_tiempo_estimado(
+            longitud,
+            resultado["tiene_mayusculas"],
+            resultado["tiene_numeros"],
+            resultado["tiene_simbolos"],
+            velocidad
+        )
+        resultado["tiempos"][escenario] = tiempo_str
+        resultado["segundos"][escenario] = segundos
+
+    # Determinar fortaleza
+    puntuacion = 0
+    if longitud >= 12:
+        puntuacion += 3
+    elif longitud >= 8:
+        puntuacion += 2
+    else:
+        puntuacion += 1
+
+    puntuacion += sum([resultado["tiene_mayusculas"],
+                       resultado["tiene_numeros"],
+                       resultado["tiene_simbolos"]])
+
+    if es_comun:
+        resultado["fortaleza"] = "MUY DÉBIL"
+    elif puntuacion <= 3:
+        resultado["fortaleza"] = "DÉBIL"
+    elif puntuacion <= 5:
+        resultado["fortaleza"] = "MODERADA"
+    else:
+        resultado["fortaleza"] = "FUERTE"
+
+    return resultado
+
+
+class AuditoriaContraseñas:
+    """
+    Auditoría masiva con el mismo criterio que analizar_seguridad_contraseña, pensada para
+    millones de contraseñas (p. ej. las exportadas de un gestor de credenciales).
+    El resultado solo depende de la longitud, de las clases de caracteres y de si la contraseña
+    es común, así que los tiempos y la fortaleza se calculan una vez por combinación y cada
+    contraseña se reduce a una clave entera (longitud, máscara de clases, común). Las clases de
+    un lote ASCII salen de una sola pasada con NumPy sobre todas sus contraseñas juntas
+    """
+
+    TAMAÑO_LOTE = 1 << 16
+    COLUMNAS = ("contraseña", "longitud", "tiene_minusculas", "tiene_mayusculas", "tiene_numeros",
+                "tiene_simbolos", "es_comun", "fortaleza")
+
+    def __init__(self, velocidades=None):
+        self.velocidades = velocidades if velocidades is not None else AtaqueFuerzaBruta.velocidades_escenarios()
+        # Después de COLUMNAS, los segundos de cada escenario
+        self.columnas = self.COLUMNAS + tuple(f"segundos {escenario}" for escenario in self.velocidades)
+        self._comunes = _contraseñas_comunes()
+        self._longitudes_comunes = sorted({len(p) for p in self._comunes})
+        self._resultados = {}
+        self._filas = {}
+
+    def claves(self, lote):
+        """Clave entera de cada contraseña del lote: longitud << 5 | clases << 1 | común"""
+        if not lote:
+            return []
+        texto = "\n".join(lote) + "\n"
+        if texto.isascii() and texto.count("\n") == len(lote):
+            datos = np.frombuffer(texto.encode("ascii"), dtype=np.uint8)
+            finales = np.flatnonzero(datos == 10)
+            inicios = np.concatenate(([0], finales[:-1] + 1))
+            longitudes = finales - inicios
+            # Cada tramo acaba en su "\n" (bits 0), así que ninguno está vacío para reduceat
+            mascaras = np.bitwise_or.reduceat(_tabla_bits()[datos], inicios)
+            claves = (longitudes << 5) | (mascaras.astype(np.int64) << 1)
+            posibles = np.flatnonzero(np.isin(longitudes, self._longitudes_comunes)).tolist()
+            claves = claves.tolist()
+        else:
+            claves = [len(p) << 5 | _clases_caracteres(p) << 1 for p in lote]
+            posibles = [i for i, p in enumerate(lote) if len(p) in self._longitudes_comunes]
+        comunes = self._comunes
+        for i in posibles:
+            if lote[i].lower() in comunes:
+                claves[i] |= 1
+        return claves
+
+    def resultado(self, clave):
+        """El dict de analizar_seguridad_contraseña de una clave (compartido: no modificar)"""
+        resultado = self._resultados.get(clave)
+        if resultado is None:
+            resultado = self._resultados[clave] = _resultado_auditoria(
+                clave >> 5, (clave >> 1) & 0xF, bool(clave & 1), self.velocidades)
+        return resultado
+
+    def _fila(self, clave):
+        resultado = self.resultado(clave)
+        fila = self._filas[clave] = (
+            resultado["longitud"], resultado["tiene_minusculas"], resultado["tiene_mayusculas"],
+            resultado["tiene_numeros"], resultado["tiene_simbolos"], resultado["es_comun"],
+            resultado["fortaleza"], *resultado["segundos"].values())
+        return fila
+
+    def lotes(self, contraseñas, tamaño_lote=None):
+        """Listas de hasta tamaño_lote contraseñas de un iterable o de un fichero (pathlib.Path)"""
+        if isinstance(contraseñas, os.PathLike):
+            contraseñas = AtaqueDiccionarioReglas.leer_palabras(contraseñas)
+        contraseñas = iter(contraseñas)
+        while lote := list(itertools.islice(contraseñas, tamaño_lote or self.TAMAÑO_LOTE)):
+            yield lote
+
+    def filas(self, contraseñas, tamaño_lote=None):
+        """Genera una tupla por contraseña con las columnas de self.columnas, en el mismo orden"""
+        filas = self._filas
+        for lote in self.lotes(contraseñas, tamaño_lote):
+            for contraseña, clave in zip(lote, self.claves(lote)):
+                fila = filas.get(clave) or self._fila(clave)
+                yield (contraseña, *fila)
+
+    def lotes_arrow(self, contraseñas, tamaño_lote=None):
+        """Las mismas filas como pyarrow.RecordBatch, uno por lote (necesita pyarrow)"""
+        import pyarrow as pa
+
+        filas = self._filas
+        for lote in self.lotes(contraseñas, tamaño_lote):
+            datos = [filas.get(clave) or self._fila(clave) for clave in self.claves(lote)]
+            columnas = [pa.array(lote, pa.string())] + [pa.array(columna) for columna in zip(*datos)]
+            yield pa.RecordBatch.from_arrays(columnas, names=list(self.columnas))
+
+
+class CalibracionHashes:
+    """
+    Mide la velocidad real de md5/sha1/sha256 en este equipo (un núcleo y todos los núcleos)
+    y la guarda en disco por modelo de CPU, versión de Python y backend de hashlib
+    """
+
+    DURACION_MEDIDA = 0.2  # segundos por algoritmo y modo
+    RUTA_CACHE = os.path.join(DIRECTORIO_CACHE, "calibracion.json")
+
+    _en_memoria = {}
+
+    @staticmethod
+    def clave_equipo():
+        """Identificador del equipo: CPU, versión de Python y backend de hashlib"""
+        modelo = platform.processor()
+        try:
+            with open("/proc/cpuinfo", encoding="utf-8") as f:
+                modelo = next((l.split(":", 1)[1].strip() for l in f if l.startswith("model name")), modelo)
+        except OSError:
+            pass
+        backend = ssl.OPENSSL_VERSION if hashlib.md5.__name__.startswith("openssl") else "hashlib integrado"
+        python = f"{platform.python_implementation()} {platform.python_version()}"
+        return f"{modelo or platform.machine()} | {python} | {backend}"
+
+    @staticmethod
+    def medir(duracion=DURACION_MEDIDA):
+        """Micro-benchmark de cada algoritmo en un núcleo y en todos a la vez"""
+        nucleos = os.cpu_count() or 1
+        medidas = {}
+        for metodo in AtaqueFuerzaBruta.ALGORITMOS:
+            un_nucleo = _medir_velocidad(metodo, duracion)
+            if nucleos > 1:
+                with ProcessPoolExecutor(max_workers=nucleos) as ejecutor:
+                    todos = sum(ejecutor.map(_medir_velocidad, [metodo] * nucleos, [duracion] * nucleos))
+            else:
+                todos = un_nucleo
+            medidas[metodo] = {"un_nucleo": un_nucleo, "todos_nucleos": todos, "nucleos": nucleos}
+        return medidas
+
+    @staticmethod
+    def obtener(recalibrar=False):
+        """
+        Velocidades medidas de este equipo: primero de memoria, luego del fichero de caché
+        y, si no hay, se miden y se guardan
+        """
+        clave = CalibracionHashes.clave_equipo()
+        if not recalibrar and clave in CalibracionHashes._en_memoria:
+            return CalibracionHashes._en_memoria[clave]
+
+        cache = {}
         try:
-            fig, ax = plt.subplots(figsize=(10, 5))
-
-            escenarios = list(analisis["tiempos"].keys())
-            # Convertir tiempos a valores numéricos para la gráfica
-            tiempos_num = []
-            tiempos_str_limpios = []
-
-            for escenario in escenarios:
-                tiempo_str = analisis["tiempos"][escenario]
-                tiempos_str_limpios.append(tiempo_str)
-
-                # Limpiar el string para evitar caracteres problemáticos
-                try:
-                    if "segundos" in tiempo_str:
-                        tiempos_num.append(float(tiempo_str.split()[0]))
-                    elif "minutos" in tiempo_str:
-                        tiempos_num.append(float(tiempo_str.split()[0]) * 60)
-                    elif "horas" in tiempo_str:
-                        tiempos_num.append(float(tiempo_str.split()[0]) * 3600)
-                    elif "días" in tiempo_str:
-                        tiempos_num.append(float(tiempo_str.split()[0]) * 86400)
-                    else:  # años
-                        tiempos_num.append(float(tiempo_str.split()[0]) * 31536000)
-                except (ValueError, IndexError):
-                    # Si hay error al parsear, asignamos un valor por defecto
-                    tiempos_num.append(3600)  # 1 hora como valor por defecto
-
-            # Usar escala logarítmica
-            colors = ['red' if t < 3600 else 'orange' if t < 86400 else 'green' for t in tiempos_num]
-            bars = ax.bar(escenarios, tiempos_num, color=colors, edgecolor='black')
-            ax.set_yscale('log')
-            ax.set_ylabel('Tiempo (segundos, escala logarítmica)')
-            ax.set_title('Tiempo estimado para romper la contraseña')
-
-            # Añadir etiquetas con el tiempo en formato legible
-            for i, (bar, tiempo_str) in enumerate(zip(bars, tiempos_str_limpios)):
-                ax.text(bar.get_x() + bar.get_width() / 2, bar.get_height() * 1.1,
-                        tiempo_str, ha='center', va='bottom', rotation=45, fontsize=8)
-
-            plt.tight_layout()
-            return fig
-
-        except Exception as e:
-            # Si hay cualquier error en la gráfica, devolvemos None
-            plt.close('all')  # Cerrar todas las figuras para liberar memoria
-            print(f"Error al generar gráfica: {e}")  # Log del error
+            with open(CalibracionHashes.RUTA_CACHE, encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        if recalibrar or clave not in cache:
+            cache[clave] = CalibracionHashes.medir()
+            try:
+                os.makedirs(os.path.dirname(CalibracionHashes.RUTA_CACHE), exist_ok=True)
+                temporal = CalibracionHashes.RUTA_CACHE + ".tmp"
+                with open(temporal, "w", encoding="utf-8") as f:
+                    json.dump(cache, f, indent=2, ensure_ascii=False)
+                os.replace(temporal, CalibracionHashes.RUTA_CACHE)
+            except OSError:
+                pass  # Sin permisos de escritura: la medida se queda solo en memoria
+
+        CalibracionHashes._en_memoria[clave] = cache[clave]
+        return cache[clave]
+
+
+def _abrir_mmap(ruta):
+    """mmap de solo lectura de un fichero (b"" si está vacío, que mmap no admite)"""
+    with open(ruta, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _temporal_junto_a(ruta):
+    """Fichero temporal (binario, con nombre único) en el mismo directorio que ruta, para renombrarlo a ruta"""
+    directorio, nombre = os.path.split(ruta)
+    return tempfile.NamedTemporaryFile(dir=directorio or ".", prefix=f"{nombre}.", suffix=".tmp", delete=False)
+
+
+def _ordenar_digests(digests):
+    """Orden (como bytes) de una matriz (n, tamaño_digest) de digests, comparando de 8 en 8 bytes"""
+    relleno = -digests.shape[1] % 8
+    if relleno:
+        digests = np.hstack([digests, np.zeros((len(digests), relleno), dtype=np.uint8)])
+    palabras = np.ascontiguousarray(digests).view(">u8")
+    return np.lexsort(tuple(palabras[:, i] for i in reversed(range(palabras.shape[1]))))
+
+
+class IndiceHashes:
+    """
+    Índice persistente digest -> contraseña de un diccionario y sus variaciones con reglas.
+    Las contraseñas se guardan en <ruta_base>.txt, una por línea, y por cada algoritmo hay un
+    fichero <ruta_base>.<metodo> de registros (digest, desplazamiento en el .txt) ordenados por
+    digest. Ambos se abren con mmap: abrir el índice no lee nada y cada búsqueda es binaria
+    """
+
+    METODOS = ("md5", "sha1", "sha256")
+
+    def __init__(self, ruta_base, metodo="md5"):
+        self.metodo = metodo
+        self.tamaño_digest = AtaqueFuerzaBruta.ALGORITMOS[metodo]().digest_size
+        self.tamaño_registro = self.tamaño_digest + 8
+        self._registros = _abrir_mmap(f"{ruta_base}.{metodo}")
+        self._contraseñas = _abrir_mmap(f"{ruta_base}.txt")
+        self.num_registros = len(self._registros) // self.tamaño_registro
+
+    def buscar(self, hash_hex):
+        """Contraseña cuyo hash es hash_hex, o None si no está en el índice"""
+        digest = bytes.fromhex(hash_hex.strip())
+        if len(digest) != self.tamaño_digest:
+            raise ValueError(f"'{hash_hex}' no es un hash {self.metodo} válido")
+        registros, tamaño, d = self._registros, self.tamaño_registro, self.tamaño_digest
+        bajo, alto = 0, self.num_registros
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            if registros[medio * tamaño:medio * tamaño + d] < digest:
+                bajo = medio + 1
+            else:
+                alto = medio
+        if bajo == self.num_registros or registros[bajo * tamaño:bajo * tamaño + d] != digest:
             return None
+        desplazamiento = int.from_bytes(registros[bajo * tamaño + d:(bajo + 1) * tamaño], "little")
+        fin = self._contraseñas.find(b"\n", desplazamiento)
+        return self._contraseñas[desplazamiento:fin].decode("utf-8")
+
+    @staticmethod
+    def construir(palabras, ruta_base, metodos=METODOS, reglas=True):
+        """
+        Escribe el índice de las palabras (y sus variaciones si reglas=True) para cada algoritmo.
+        Los ficheros se escriben en temporales con nombre único y se renombran al final, así que
+        nunca quedan a medias y dos construcciones a la vez no se pisan
+        """
+        os.makedirs(os.path.dirname(ruta_base) or ".", exist_ok=True)
+        candidatos = AtaqueDiccionarioReglas.generar_candidatos(palabras) if reglas else palabras
+        temporales = []
+        try:
+            with _temporal_junto_a(f"{ruta_base}.txt") as f:
+                temporales.append(f.name)
+                for candidato in candidatos:
+                    if "\n" not in candidato:
+                        f.write(candidato.encode("utf-8") + b"\n")
+            texto = f.name
 
+            for metodo in metodos:
+                algoritmo = AtaqueFuerzaBruta.ALGORITMOS[metodo]
+                digests = bytearray()
+                desplazamientos = []
+                posicion = 0
+                with open(texto, "rb") as f:
+                    for linea in f:
+                        digests += algoritmo(linea[:-1]).digest()
+                        desplazamientos.append(posicion)
+                        posicion += len(linea)
 
-class AtaqueDiccionarioReglas:
+                tamaño_digest = algoritmo().digest_size
+                matriz = np.frombuffer(bytes(digests), dtype=np.uint8).reshape(-1, tamaño_digest)
+                orden = _ordenar_digests(matriz)
+                registros = np.empty((len(matriz), tamaño_digest + 8), dtype=np.uint8)
+                registros[:, :tamaño_digest] = matriz[orden]
+                registros[:, tamaño_digest:] = np.array(desplazamientos, dtype="<u8")[orden, None].view(np.uint8)
+                with _temporal_junto_a(f"{ruta_base}.{metodo}") as f:
+                    temporales.append(f.name)
+                    f.write(registros.tobytes())
+                os.replace(f.name, f"{ruta_base}.{metodo}")
+            os.replace(texto, f"{ruta_base}.txt")
+        finally:
+            # Si algo falla no se dejan temporales (los ya renombrados no existen)
+            for temporal in temporales:
+                if os.path.exists(temporal):
+                    os.remove(temporal)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def comun(metodo="md5"):
+        """
+        Índice del diccionario común con reglas. Se construye la primera vez en DIRECTORIO_CACHE;
+        el nombre lleva una huella de las palabras y las reglas, así que si cambian se rehace
+        """
+        palabras = AtaqueFuerzaBruta.generar_diccionario_comun()
+        contenido = "\n".join(palabras + [regla for _, regla in AtaqueDiccionarioReglas.REGLAS])
+        huella = hashlib.sha1(contenido.encode("utf-8")).hexdigest()[:12]
+        for directorio in (DIRECTORIO_CACHE, tempfile.gettempdir()):
+            ruta_base = os.path.join(directorio, f"indice_comun_{huella}")
+            try:
+                if not all(os.path.exists(f"{ruta_base}.{m}") for m in IndiceHashes.METODOS + ("txt",)):
+                    IndiceHashes.construir(palabras, ruta_base)
+                return IndiceHashes(ruta_base, metodo)
+            except OSError:
+                continue  # Sin permisos de escritura: se prueba en el directorio temporal
+        raise OSError("No se ha podido guardar el índice de hashes")
+
+
+def _recorrer_cadenas(argumentos):
+    """Extremo final de cada cadena de la tabla que empieza en los índices dados"""
+    tabla, inicios = argumentos
+    return [tabla._avanzar(inicio, 0, tabla.longitud_cadena) for inicio in inicios]
+
+
+class TablaArcoiris:
     """
-    Simulador de ataque de diccionario con reglas de mutación
+    Tabla arcoíris: compromiso tiempo-memoria para invertir hashes de contraseñas de
+    longitud_min a longitud_max caracteres. Cada cadena alterna hash y reducción (que usa
+    la posición en la cadena, para que dos cadenas solo se fusionen si coinciden en el mismo
+    paso) y solo se guardan sus extremos (final, inicio), ordenados por el final
     """
 
+    REDUCCIONES = ("suma", "xor")
+
+    def __init__(self, metodo="md5", caracteres=string.ascii_lowercase, longitud_min=1, longitud_max=4,
+                 longitud_cadena=100, reduccion="suma"):
+        if metodo not in AtaqueFuerzaBruta.ALGORITMOS:
+            raise ValueError(f"Algoritmo no soportado: {metodo}")
+        if reduccion not in TablaArcoiris.REDUCCIONES:
+            raise ValueError(f"Reducción desconocida: {reduccion}")
+        self.metodo = metodo
+        self.caracteres = caracteres
+        self.longitud_min = longitud_min
+        self.longitud_max = longitud_max
+        self.longitud_cadena = longitud_cadena
+        self.reduccion = reduccion
+        # (longitud, número de contraseñas de esa longitud), para pasar de índice a contraseña
+        self._bloques = [(n, len(caracteres) ** n) for n in range(longitud_min, longitud_max + 1)]
+        self.espacio = sum(cuenta for _, cuenta in self._bloques)
+        if self.espacio >= 2 ** 63:
+            raise ValueError("Espacio de contraseñas demasiado grande para la tabla")
+        self._tabla_bytes = caracteres.encode("latin-1")
+        self.finales = np.empty(0, dtype="<u8")
+        self.inicios = np.empty(0, dtype="<u8")
+        self.estadisticas = {}
+
+    def texto(self, indice):
+        """Contraseña (bytes) número `indice` del espacio"""
+        for longitud, cuenta in self._bloques:
+            if indice < cuenta:
+                break
+            indice -= cuenta
+        base, tabla = len(self._tabla_bytes), self._tabla_bytes
+        codigos = []
+        for _ in range(longitud):
+            indice, resto = divmod(indice, base)
+            codigos.append(tabla[resto])
+        return bytes(codigos)
+
+    def _reducir(self, digest, posicion):
+        h = int.from_bytes(digest[:8], "little")
+        if self.reduccion == "xor":
+            return (h ^ (posicion * 0x9E3779B97F4A7C15 & 0xFFFFFFFFFFFFFFFF)) % self.espacio
+        return (h + posicion) % self.espacio
+
+    def _avanzar(self, indice, desde, hasta):
+        """Aplica los pasos hash + reducción desde..hasta-1 a partir del índice dado"""
+        algoritmo = AtaqueFuerzaBruta.ALGORITMOS[self.metodo]
+        for posicion in range(desde, hasta):
+            indice = self._reducir(algoritmo(self.texto(indice)).digest(), posicion)
+        return indice
+
+    def generar(self, num_cadenas, procesos=None, semilla=0, tamaño_lote=2_000):
+        """
+        Calcula las cadenas en un pool de procesos, desde puntos de inicio aleatorios, y se queda
+        con una por cada final distinto. Devuelve la propia tabla
+        """
+        rng = np.random.default_rng(semilla)
+        inicios = np.unique(rng.integers(0, self.espacio, size=num_cadenas, dtype=np.uint64))
+        rng.shuffle(inicios)
+        lotes = [(self, [int(i) for i in inicios[a:a + tamaño_lote]])
+                 for a in range(0, len(inicios), tamaño_lote)]
+        procesos = procesos or os.cpu_count() or 1
+
+        t_inicio = time.perf_counter()
+        if procesos == 1:
+            finales = [final for lote in lotes for final in _recorrer_cadenas(lote)]
+        else:
+            with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+                finales = [final for parte in ejecutor.map(_recorrer_cadenas, lotes) for final in parte]
+        segundos = time.perf_counter() - t_inicio
+
+        finales = np.array(finales, dtype="<u8")
+        self.finales, primeros = np.unique(finales, return_index=True)
+        self.inicios = inicios[primeros].astype("<u8")
+        self.estadisticas = {
+            "hashes_calculados": len(inicios) * self.longitud_cadena,
+            "segundos": segundos,
+            "procesos": procesos,
+            "cadenas_fusionadas": len(inicios) - len(self.finales),
+        }
+        return self
+
+    @property
+    def tamaño_bytes(self):
+        """Tamaño de los extremos en disco: dos enteros de 64 bits por cadena"""
+        return 16 * len(self.finales)
+
+    def buscar(self, hash_hex):
+        """
+        Contraseña cuyo hash es hash_hex, o None. Supone que el hash está en cada posición de la
+        cadena (empezando por la última, la más barata), calcula el final que tendría y solo
+        reconstruye desde el inicio las cadenas cuyo final está en la tabla
+        """
+        algoritmo = AtaqueFuerzaBruta.ALGORITMOS[self.metodo]
+        objetivo = bytes.fromhex(hash_hex.strip())
+        if len(objetivo) != algoritmo().digest_size:
+            raise ValueError(f"'{hash_hex}' no es un hash {self.metodo} válido")
+        for posicion in reversed(range(self.longitud_cadena)):
+            final = self._avanzar(self._reducir(objetivo, posicion), posicion + 1, self.longitud_cadena)
+            i = np.searchsorted(self.finales, final)
+            if i < len(self.finales) and self.finales[i] == final:
+                candidato = self.texto(self._avanzar(int(self.inicios[i]), 0, posicion))
+                if algoritmo(candidato).digest() == objetivo:
+                    return candidato.decode("latin-1")
+                # Falsa alarma: la cadena se fusionó con otra después de esta posición
+        return None
+
+    def guardar(self, ruta):
+        """Cabecera JSON de una línea con los parámetros y después los pares (final, inicio)"""
+        cabecera = {"metodo": self.metodo, "caracteres": self.caracteres, "longitud_min": self.longitud_min,
+                    "longitud_max": self.longitud_max, "longitud_cadena": self.longitud_cadena,
+                    "reduccion": self.reduccion}
+        with open(ruta, "wb") as f:
+            f.write(json.dumps(cabecera, ensure_ascii=False).encode("utf-8") + b"\n")
+            f.write(np.column_stack([self.finales, self.inicios]).astype("<u8").tobytes())
+
     @staticmethod
-    def aplicar_reglas(palabra):
+    def cargar(ruta):
+        with open(ruta, "rb") as f:
+            tabla = TablaArcoiris(**json.loads(f.readline()))
+            pares = np.frombuffer(f.read(), dtype="<u8").reshape(-1, 2)
+        tabla.finales, tabla.inicios = pares[:, 0].copy(), pares[:, 1].copy()
+        return tabla
+
+
+# Operaciones de regla sin argumento (notación de hashcat)
+_OPERACIONES_SIMPLES = {
+    "l": str.lower,
+    "u": str.upper,
+    "c": str.capitalize,
+    "r": lambda palabra: palabra[::-1],
+    "d": lambda palabra: palabra + palabra,
+    "[": lambda palabra: palabra[1:],
+    "]": lambda palabra: palabra[:-1],
+}
+
+
+def _pasos_regla(regla):
+    """
+    Traduce una regla al estilo hashcat a una lista de pasos (operación, argumento).
+    Operaciones: ':' nada, 'l' minúsculas, 'u' mayúsculas, 'c' capitalizar, 'r' invertir,
+    'd' duplicar, '[' / ']' quitar primera / última letra, '$X' / '^X' añadir X al final /
+    principio, 'sXY' sustituir X por Y, '>N' / '<N' rechazar si la longitud no es mayor / menor
+    que N. Los '$', '^' y 's' seguidos se funden en un solo paso
+    """
+    pasos = []
+    i = 0
+    while i < len(regla):
+        op = regla[i]
+        if op in " :":
+            i += 1
+            continue
+        argumentos = 2 if op == "s" else 1 if op in "$^<>" else 0
+        if op not in _OPERACIONES_SIMPLES and not argumentos:
+            raise ValueError(f"Operación de regla desconocida: '{op}'")
+        arg = regla[i + 1:i + 1 + argumentos]
+        if len(arg) < argumentos:
+            raise ValueError(f"Falta el argumento de '{op}' en la regla '{regla}'")
+        i += 1 + argumentos
+
+        anterior = pasos[-1][0] if pasos else None
+        if op == "$" and anterior == "$":
+            pasos[-1] = ("$", pasos[-1][1] + arg)
+        elif op == "^" and anterior == "^":
+            pasos[-1] = ("^", arg + pasos[-1][1])
+        elif op == "s":
+            origen, destino = arg
+            tabla = dict(pasos.pop()[1]) if anterior == "s" else {}
+            for letra, valor in tabla.items():
+                if valor == origen:
+                    tabla[letra] = destino
+            tabla.setdefault(origen, destino)
+            pasos.append(("s", tabla))
+        else:
+            pasos.append((op, arg))
+    return pasos
+
+
+def compilar_regla(regla):
+    """
+    Compila una regla al estilo hashcat (ver _pasos_regla) en una función
+    palabra -> candidato, que devuelve None si la regla rechaza la palabra
+    """
+    funciones = []
+    for op, arg in _pasos_regla(regla):
+        if op == "$":
+            funciones.append(lambda palabra, sufijo=arg: palabra + sufijo)
+        elif op == "^":
+            funciones.append(lambda palabra, prefijo=arg: prefijo + palabra)
+        elif op == "s":
+            funciones.append(lambda palabra, tabla=str.maketrans(arg): palabra.translate(tabla))
+        elif op == ">":
+            funciones.append(lambda palabra, n=int(arg, 36): palabra if len(palabra) > n else None)
+        elif op == "<":
+            funciones.append(lambda palabra, n=int(arg, 36): palabra if len(palabra) < n else None)
+        else:
+            funciones.append(_OPERACIONES_SIMPLES[op])
+
+    if not funciones:
+        return lambda palabra: palabra
+    if len(funciones) == 1:
+        return funciones[0]
+
+    def aplicar(palabra):
+        for funcion in funciones:
+            palabra = funcion(palabra)
+            if palabra is None:
+                return None
+        return palabra
+    return aplicar
+
+
+def _deshacer_sustitucion(palabra, tabla):
+    """Palabras que la sustitución `tabla` convierte en `palabra`"""
+    opciones = []
+    for caracter in palabra:
+        origenes = [origen for origen, destino in tabla.items() if destino == caracter]
+        if caracter not in tabla:
+            origenes.append(caracter)
+        if not origenes:
+            return set()
+        opciones.append(origenes)
+    return {"".join(combinacion) for combinacion in itertools.product(*opciones)}
+
+
+def invertir_regla(regla):
+    """
+    Compila la inversa de una regla: una función (candidato, alfabeto) -> conjunto de posibles
+    palabras base. Las mayúsculas se ignoran (la búsqueda se hace en minúsculas), quitar una
+    letra se deshace probando cada letra del alfabeto y las comprobaciones de longitud no se
+    deshacen. El resultado puede tener palabras de más, nunca de menos: hay que confirmarlo
+    aplicando la regla hacia delante
+    """
+    # Ojo: deshacer una sustitución prueba todas las combinaciones de los caracteres ambiguos
+    def deshacer_paso(op, arg, palabra, alfabeto):
+        if op == "r":
+            return {palabra[::-1]}
+        if op == "d":
+            mitad = len(palabra) // 2
+            return {palabra[:mitad]} if len(palabra) % 2 == 0 and \
+                palabra[:mitad].lower() == palabra[mitad:].lower() else set()
+        if op == "$":
+            return {palabra[:-len(arg)]} if palabra.lower().endswith(arg.lower()) else set()
+        if op == "^":
+            return {palabra[len(arg):]} if palabra.lower().startswith(arg.lower()) else set()
+        if op == "]":
+            return {palabra + letra for letra in alfabeto}
+        if op == "[":
+            return {letra + palabra for letra in alfabeto}
+        if op == "s":
+            return _deshacer_sustitucion(palabra, arg)
+        return {palabra}  # ':', cambios de mayúsculas y comprobaciones de longitud
+
+    pasos = _pasos_regla(regla)
+
+    def deshacer(candidato, alfabeto):
+        posibles = {candidato}
+        for op, arg in reversed(pasos):
+            posibles = {base for palabra in posibles for base in deshacer_paso(op, arg, palabra, alfabeto)}
+            if not posibles:
+                break
+        return posibles
+    return deshacer
+
+
+class FiltroBloom:
+    """
+    Conjunto aproximado de memoria fija: nunca olvida un elemento ya visto, pero con
+    probabilidad tasa_error puede tomar por repetido uno nuevo. Usa hash(), así que solo
+    sirve dentro del mismo proceso
+    """
+
+    def __init__(self, capacidad, tasa_error=0.01):
+        self.num_bits = max(8, int(-capacidad * math.log(tasa_error) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacidad * math.log(2)))
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+
+    def _posiciones(self, hashes):
         """
-        Aplica reglas comunes de mutación a una palabra base
+        Posiciones (n, num_hashes) por doble hashing: h1 + i·h2 con las dos mitades de 32 bits
+        de cada hash
         """
-        variaciones = set()
-        variaciones.add(palabra)  # La palabra original
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        i = np.arange(self.num_hashes, dtype=np.uint64)
+        return (h1[:, None] + i * h2[:, None]) % np.uint64(self.num_bits)
+
+    def filtrar(self, elementos):
+        """Marca los elementos y devuelve, en orden, los que no estaban (sin repetidos)"""
+        elementos = list(dict.fromkeys(elementos))
+        if not elementos:
+            return []
+        posiciones = self._posiciones([hash(e) & 0xFFFFFFFFFFFFFFFF for e in elementos])
+        bytes_, mascaras = posiciones >> np.uint64(3), (1 << (posiciones & np.uint64(7))).astype(np.uint8)
+        nuevos = ~np.all(self.bits[bytes_] & mascaras, axis=1)
+        np.bitwise_or.at(self.bits, bytes_.ravel(), mascaras.ravel())
+        return [e for e, nuevo in zip(elementos, nuevos.tolist()) if nuevo]
+
+    def añadir(self, elemento):
+        """Marca el elemento y devuelve True si no estaba"""
+        return bool(self.filtrar([elemento]))
 
-        # Regla 1: Capitalizar primera letra
-        if palabra:
-            variaciones.add(palabra.capitalize())
+    def __contains__(self, elemento):
+        posiciones = self._posiciones([hash(elemento) & 0xFFFFFFFFFFFFFFFF])[0]
+        return bool(np.all(self.bits[posiciones >> np.uint64(3)] & (1 << (posiciones & np.uint64(7)))))
 
-        # Regla 2: Todo mayúsculas
-        variaciones.add(palabra.upper())
 
-        # Regla 3: Añadir números comunes al final
-        for num in ["123", "1234", "2024", "2025", "69", "420", "1", "12", "12345"]:
-            variaciones.add(palabra + num)
+@lru_cache(maxsize=1)
+def _reglas_por_defecto():
+    return AtaqueDiccionarioReglas.compilar_reglas(AtaqueDiccionarioReglas.REGLAS)
 
-        # Regla 4: Añadir año actual
-        variaciones.add(palabra + "2024")
-        variaciones.add(palabra + "2025")
 
-        # Regla 5: Duplicar palabra
-        variaciones.add(palabra + palabra)
+@lru_cache(maxsize=1)
+def _inversas_por_defecto():
+    return [invertir_regla(regla) for _, regla in AtaqueDiccionarioReglas.REGLAS]
+
+
+@lru_cache(maxsize=1)
+def _reglas_sustitucion():
+    """
+    Posiciones en REGLAS de las reglas con sustituciones: deshacerlas crece como 2^k con los
+    caracteres ambiguos del candidato, así que simular_ataque las busca hacia delante
+    """
+    return tuple(num for num, (_, regla) in enumerate(AtaqueDiccionarioReglas.REGLAS)
+                 if any(op == "s" for op, _ in _pasos_regla(regla)))
+
+
+class AtaqueDiccionarioReglas:
+    """
+    Simulador de ataque de diccionario con reglas de mutación
+    """
+
+    # (nombre, regla en notación de hashcat), en el orden en que se prueban
+    REGLAS = [
+        ("Palabra base", ":"),
+        ("Capitalizar primera letra", "c"),
+        ("TODO MAYÚSCULAS", "u"),
+        *[(f"Añadir '{num}' al final", "".join("$" + d for d in num))
+          for num in ["123", "1234", "2024", "2025", "69", "420", "1", "12", "12345"]],
+        ("Duplicar palabra", "d"),
+        ("Invertir palabra", "r"),
+        ("Leet speak (sustitución de letras por números)", "sa4 se3 si1 so0 ss5 st7"),
+        ("Eliminar última letra", ">3 ]"),
+        *[(f"Añadir '{simbolo}' al final", "$" + simbolo) for simbolo in "!@#$%&*"],
+        *[(f"Añadir '{simbolo}' al principio", "^" + simbolo) for simbolo in "!@#$%&*"],
+    ]
 
-        # Regla 6: Revertir palabra
-        variaciones.add(palabra[::-1])
+    @staticmethod
+    def compilar_reglas(reglas=None):
+        """
+        Lista de (nombre, función) a partir de reglas (nombre, regla) o de reglas sueltas,
+        p. ej. las líneas de un fichero de reglas de hashcat. Por defecto, REGLAS
+        """
+        if reglas is None:
+            return _reglas_por_defecto()
+        compiladas = []
+        for regla in reglas:
+            nombre, regla = (regla, regla) if isinstance(regla, str) else regla
+            compiladas.append((nombre, compilar_regla(regla)))
+        return compiladas
 
-        # Regla 7: Reemplazar letras por números (leet speak básico)
-        leet_map = {'a': '4', 'e': '3', 'i': '1', 'o': '0', 's': '5', 't': '7'}
-        leet_version = palabra
-        for letra, num in leet_map.items():
-            leet_version = leet_version.replace(letra, num)
-        if leet_version != palabra:
-            variaciones.add(leet_version)
+    @staticmethod
+    def variaciones(palabra, compiladas=None):
+        """Genera (nombre de la regla, candidato) para una palabra, sin repetir candidatos"""
+        vistos = set()
+        for nombre, funcion in compiladas or _reglas_por_defecto():
+            candidato = funcion(palabra)
+            if candidato is not None and candidato not in vistos:
+                vistos.add(candidato)
+                yield nombre, candidato
 
-        # Regla 8: Eliminar última letra
-        if len(palabra) > 3:
-            variaciones.add(palabra[:-1])
+    @staticmethod
+    def generar_candidatos(palabras_base, reglas=None, filtro=None):
+        """
+        Genera perezosamente los candidatos de aplicar las reglas a cada palabra base, listos
+        para AtaqueFuerzaBruta.crackear. Solo se recuerdan los candidatos de la palabra actual;
+        con un FiltroBloom se descartan también las repeticiones entre palabras distintas
+        sin que la memoria crezca con el diccionario
+        """
+        compiladas = AtaqueDiccionarioReglas.compilar_reglas(reglas)
+        candidatos = (candidato for palabra in palabras_base
+                      for _, candidato in AtaqueDiccionarioReglas.variaciones(palabra, compiladas))
+        if filtro is None:
+            yield from candidatos
+            return
+        # El filtro se consulta por lotes para vectorizar los hashes
+        while lote := list(itertools.islice(candidatos, 4096)):
+            yield from filtro.filtrar(lote)
 
-        # Regla 9: Añadir símbolo común
-        for simbolo in ["!", "@", "#", "$", "%", "&", "*"]:
-            variaciones.add(palabra + simbolo)
-            variaciones.add(simbolo + palabra)
+    @staticmethod
+    def leer_palabras(ruta, codificacion="utf-8"):
+        """Lee un diccionario línea a línea sin cargarlo entero en memoria"""
+        with open(ruta, encoding=codificacion, errors="ignore") as f:
+            for linea in f:
+                palabra = linea.rstrip("\r\n")
+                if palabra:
+                    yield palabra
 
-        return list(variaciones)
+    @staticmethod
+    def aplicar_reglas(palabra):
+        """
+        Aplica reglas comunes de mutación a una palabra base
+        """
+        return [candidato for _, candidato in AtaqueDiccionarioReglas.variaciones(palabra)]
 
     @staticmethod
     def generar_diccionario_con_reglas(palabras_base, max_por_palabra=20):
         """
         Genera un diccionario completo aplicando reglas a las palabras base
         """
-        diccionario_completo = []
+        diccionario_completo = {}  # dict en lugar de set para conservar el orden
         reglas_aplicadas = {}
 
         for palabra in palabras_base:
-            variaciones = AtaqueDiccionarioReglas.aplicar_reglas(palabra)
-            # Limitar el número de variaciones por palabra
-            variaciones = variaciones[:max_por_palabra]
-            diccionario_completo.extend(variaciones)
-            reglas_aplicadas[palabra] = len(variaciones)
+            variaciones = itertools.islice(AtaqueDiccionarioReglas.variaciones(palabra), max_por_palabra)
+            num = 0
+            for _, candidato in variaciones:
+                diccionario_completo[candidato] = None
+                num += 1
+            reglas_aplicadas[palabra] = num
 
-        return list(set(diccionario_completo)), reglas_aplicadas  # Eliminar duplicados
+        return list(diccionario_completo), reglas_aplicadas
 
     @staticmethod
-    def simular_ataque(contraseña_objetivo, palabras_base):
+    def indexar(palabras_base):
         """
-        Simula un ataque y dice si la encontraría y con qué regla
+        Índice de un diccionario para simular_ataque: palabra en minúsculas -> [(posición, palabra)],
+        el alfabeto (en minúsculas) de todas sus palabras y, para las reglas con sustituciones,
+        su imagen: candidato en minúsculas -> [(posición, palabra)]. Se puede reutilizar entre ataques
         """
+        palabras = {}
+        for posicion, palabra in enumerate(palabras_base):
+            palabras.setdefault(palabra.lower(), []).append((posicion, palabra))
+        reglas = _reglas_por_defecto()
+        imagenes = {}
+        for num_regla in _reglas_sustitucion():
+            aplicar = reglas[num_regla][1]
+            imagen = imagenes[num_regla] = {}
+            for entradas in palabras.values():
+                for posicion, palabra in entradas:
+                    candidato = aplicar(palabra)
+                    if candidato is not None:
+                        imagen.setdefault(candidato.lower(), []).append((posicion, palabra))
+        return {
+            "palabras": palabras,
+            "alfabeto": set("".join(palabras)),
+            "total": sum(len(entradas) for entradas in palabras.values()),
+            "imagenes": imagenes,
+        }
+
+    @staticmethod
+    def simular_ataque(contraseña_objetivo, palabras_base, indice=None, progreso=None, cancelacion=None):
+        """
+        Simula un ataque y dice si la encontraría y con qué regla. En lugar de generar todas
+        las variaciones, deshace cada regla sobre la contraseña y busca las posibles palabras
+        base en el índice; la regla y la palabra devueltas son las primeras que encontraría
+        el ataque recorriendo el diccionario en orden. Para `progreso` cada regla es un paso
+        """
+        reglas = _reglas_por_defecto()
+        seguimiento = Seguimiento(len(reglas) + 1, progreso, cancelacion)
+        seguimiento.comprobar()
+        if indice is None:
+            indice = AtaqueDiccionarioReglas.indexar(palabras_base)
+        palabras, total = indice["palabras"], indice["total"]
+
         # Primero, verificar si la contraseña está en el diccionario base
-        if contraseña_objetivo in palabras_base:
+        posiciones = [p for p, palabra in palabras.get(contraseña_objetivo.lower(), ())
+                      if palabra == contraseña_objetivo]
+        seguimiento.avanzar()
+        if posiciones:
+            seguimiento.terminar()
             return {
                 "encontrada": True,
                 "regla": "Palabra base",
                 "palabra_base": contraseña_objetivo,
-                "intentos": palabras_base.index(contraseña_objetivo) + 1
+                "intentos": posiciones[0] + 1,
+                "comprobaciones": 1
             }
 
-        # Si no, buscar entre las variaciones
-        intentos = len(palabras_base)
-        for palabra in palabras_base:
-            variaciones = AtaqueDiccionarioReglas.aplicar_reglas(palabra)
-            for i, var in enumerate(variaciones):
-                intentos += 1
-                if var == contraseña_objetivo:
-                    # Identificar qué regla se aplicó
-                    regla = AtaqueDiccionarioReglas._identificar_regla(palabra, contraseña_objetivo)
-                    return {
-                        "encontrada": True,
-                        "regla": regla,
-                        "palabra_base": palabra,
-                        "intentos": intentos
-                    }
+        # Si no, deshacer cada regla y confirmar las palabras base candidatas. Las reglas con
+        # sustituciones se buscan directamente en su imagen, sin deshacerlas
+        mejor = None
+        comprobaciones = 1
+        imagenes = indice["imagenes"]
+        for num_regla, ((nombre, aplicar), deshacer) in enumerate(zip(reglas, _inversas_por_defecto())):
+            if num_regla in imagenes:
+                comprobaciones += 1
+                entradas = imagenes[num_regla].get(contraseña_objetivo.lower(), ())
+            else:
+                entradas = []
+                for base in deshacer(contraseña_objetivo, indice["alfabeto"]):
+                    comprobaciones += 1
+                    entradas.extend(palabras.get(base.lower(), ()))
+            for posicion, palabra in entradas:
+                if (mejor is None or (posicion, num_regla) < mejor[:2]) and \
+                        aplicar(palabra) == contraseña_objetivo:
+                    mejor = (posicion, num_regla, palabra, nombre)
+            seguimiento.avanzar()
+        seguimiento.terminar()
+
+        if mejor is not None:
+            posicion, num_regla, palabra, nombre = mejor
+            return {
+                "encontrada": True,
+                "regla": nombre,
+                "palabra_base": palabra,
+                # Candidatos que habría probado el ataque antes (sin descontar repetidos)
+                "intentos": total + posicion * len(reglas) + num_regla + 1,
+                "comprobaciones": comprobaciones
+            }
 
         return {
             "encontrada": False,
             "regla": None,
             "palabra_base": None,
-            "intentos": intentos
+            "intentos": total * (len(reglas) + 1),
+            "comprobaciones": comprobaciones
         }
 
-    @staticmethod
-    def _identificar_regla(original, variacion):
-        """Identifica qué regla produjo la variación"""
-        if variacion == original.capitalize():
-            return "Capitalizar primera letra"
-        elif variacion == original.upper():
-            return "TODO MAYÚSCULAS"
-        elif variacion == original + original:
-            return "Duplicar palabra"
-        elif variacion == original[::-1]:
-            return "Invertir palabra"
-        elif any(num in variacion for num in ["123", "2024", "2025"]) and original in variacion:
-            return "Añadir números/año"
-        elif any(sim in variacion for sim in ["!", "@", "#"]) and original in variacion:
-            return "Añadir símbolos"
-        else:
-            # Verificar leet speak
-            leet_map = {'4': 'a', '3': 'e', '1': 'i', '0': 'o', '5': 's', '7': 't'}
-            posible_original = variacion
-            for num, letra in leet_map.items():
-                posible_original = posible_original.replace(num, letra)
-            if posible_original == original:
-                return "Leet speak (sustitución de letras por números)"
-
-            return "Otra regla"
-
     @staticmethod
     def visualizar_estadisticas(reglas_aplicadas):
         """
         Crea una visualización de las reglas aplicadas
         """
-        fig, ax = plt.subplots(figsize=(10, 5))
-
-        palabras = list(reglas_aplicadas.keys())[:10]  # Top 10
-        num_variaciones = list(reglas_aplicadas.values())[:10]
-
-        ax.bar(palabras, num_variaciones, color='lightcoral', edgecolor='darkred')
-        ax.set_xlabel('Palabra base')
-        ax.set_ylabel('Número de variaciones')
-        ax.set_title('Variaciones generadas por palabra base')
-        ax.tick_params(axis='x', rotation=45)
+        import graficas
 
-        plt.tight_layout()
-        return fig
\ No newline at end of file
+        return graficas.variaciones_por_palabra(reglas_aplicadas)
\ No newline at end of file
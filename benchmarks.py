@@ -0,0 +1,448 @@
+"""
+Benchmarks de rendimiento de los cifrados.
+
+Uso:
+    python benchmarks.py                 # 1 KB, 1 MB y 100 MB
+    python benchmarks.py 1KB 10MB        # tamaños a medida
+    python benchmarks.py --importacion   # presupuesto de tiempo de importación (sale con 1 si se supera)
+    python benchmarks.py --graficas      # latencia de cada página con gráficas según el modo de dibujo
+
+    python benchmarks.py --suite --json base.json             # todos los cifrados y ataques, en JSON
+    python benchmarks.py --suite 1KB 100MB --palabras 10 10M  # tamaños de texto y de diccionario a medida
+    python benchmarks.py --suite --comparar base.json         # sale con 1 si algo empeora más del umbral
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from functools import partial
+
+from ataques import encontrar_repeticiones, estimar_longitud_clave, fuerza_bruta, AtaqueFrecuencias
+from ataques_modernos import AtaqueDiccionarioReglas, AtaqueFuerzaBruta
+from cifrados import Cifrados
+
+TEXTO_BASE = ("En un lugar de la Mancha, de cuyo nombre no quiero acordarme, no ha mucho tiempo "
+              "que vivía un hidalgo de los de lanza en astillero, adarga antigua, rocín flaco y galgo corredor. ")
+
+TAMAÑOS_POR_DEFECTO = ["1KB", "1MB", "100MB"]
+
+# Módulos que se usan sin interfaz (consola, procesos del pool): solo biblioteca estándar al importar
+MODULOS_CALCULO = ["cifrados", "ataques", "ataques_modernos", "paralelo", "consola"]
+DEPENDENCIAS_PESADAS = {"numpy", "matplotlib", "pandas", "streamlit"}
+PRESUPUESTO_IMPORTACION_MS = 150
+
+# Tamaños de la suite: textos en bytes y diccionarios en número de palabras
+TAMAÑOS_SUITE = ["1KB", "1MB", "10MB"]
+PALABRAS_SUITE = ["10", "10K", "100K"]
+# Empeoramiento (en tanto por uno) a partir del cual --comparar marca una regresión
+UMBRAL_REGRESION = 0.10
+# Por debajo de esta diferencia de memoria no se considera regresión (ruido del intérprete)
+MEMORIA_MINIMA = 1 << 20
+# Cada caso se repite hasta este número de veces o estos segundos y se queda el mejor tiempo
+REPETICIONES_SUITE = 5
+PRESUPUESTO_CASO = 2.0
+CLAVE_SUSTITUCION = dict(zip("abcdefghijklmnopqrstuvwxyz", "qwertyuiopasdfghjklzxcvbnm"))
+
+# Páginas de main.py con gráficas y, si hace falta, el selector que lleva hasta la gráfica
+PAGINAS_GRAFICAS = {
+    "Análisis de Frecuencias": None,
+    "Ataque Kasiski": None,
+    "Ataque por fuerza bruta": ("tipo_ataque_selector", "Analizar seguridad de una contraseña"),
+    "Ataque diccionario con reglas": ("tipo_demo_selector", "Simular ataque a contraseña"),
+}
+# (columna, modo de la barra lateral, vaciar las cachés antes de cada ejecución)
+MODOS_DIBUJO = [
+    ("Antes: matplotlib sin caché", "Imagen (matplotlib)", True),
+    ("Matplotlib, PNG en caché", "Imagen (matplotlib)", False),
+    ("Nativas", "Nativas", False),
+]
+
+
+def _cesar_referencia(texto, desplazamiento):
+    """Implementación original carácter a carácter, usada como referencia"""
+    resultado = ""
+    for caracter in texto:
+        if caracter.isalpha():
+            mayus = caracter.isupper()
+            caracter = caracter.lower()
+            codigo = ord(caracter) - 97
+            nuevo_codigo = (codigo + desplazamiento) % 26
+            nuevo_caracter = chr(nuevo_codigo + 97)
+            if mayus:
+                nuevo_caracter = nuevo_caracter.upper()
+            resultado += nuevo_caracter
+        else:
+            resultado += caracter
+    return resultado
+
+
+def _vigenere_referencia(texto, clave):
+    """Implementación original carácter a carácter, usada como referencia"""
+    resultado = ""
+    clave = clave.lower()
+    indice_clave = 0
+
+    for caracter in texto:
+        if caracter.isalpha():
+            mayus = caracter.isupper()
+            caracter = caracter.lower()
+            desplazamiento = ord(clave[indice_clave % len(clave)]) - 97
+            codigo = ord(caracter) - 97
+            nuevo_codigo = (codigo + desplazamiento) % 26
+            nuevo_caracter = chr(nuevo_codigo + 97)
+            if mayus:
+                nuevo_caracter = nuevo_caracter.upper()
+            resultado += nuevo_caracter
+            indice_clave += 1
+        else:
+            resultado += caracter
+
+    return resultado
+
+
+def parsear_tamaño(tamaño):
+    """Convierte '1KB', '10MB', '1GB' o un número de bytes a entero"""
+    tamaño = tamaño.upper().strip()
+    for sufijo, factor in (("GB", 1024 ** 3), ("MB", 1024 ** 2), ("KB", 1024), ("B", 1)):
+        if tamaño.endswith(sufijo):
+            return int(float(tamaño[:-len(sufijo)]) * factor)
+    return int(tamaño)
+
+
+def generar_texto(num_bytes):
+    """Genera un texto en español de aproximadamente num_bytes caracteres"""
+    repeticiones = num_bytes // len(TEXTO_BASE) + 1
+    return (TEXTO_BASE * repeticiones)[:num_bytes]
+
+
+def medir(funcion, *args):
+    """Devuelve (resultado, segundos) de una llamada"""
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def benchmark_cifrados(tamaños=TAMAÑOS_POR_DEFECTO):
+    """
+    Compara el motor de tablas de traducción con la implementación original. Antes de medir
+    se llama una vez a cada uno (carga diferida de numpy, tablas en caché) y de cada tamaño
+    se queda el mejor tiempo
+    """
+    casos = [
+        ("César", Cifrados.cifrado_cesar, _cesar_referencia, 3),
+        ("Vigenère", Cifrados.cifrado_vigenere, _vigenere_referencia, "clave"),
+    ]
+    for _, rapido, referencia, clave in casos:
+        rapido(TEXTO_BASE, clave)
+        referencia(TEXTO_BASE, clave)
+    filas = []
+    for tamaño in tamaños:
+        texto = generar_texto(parsear_tamaño(tamaño))
+        for nombre, rapido, referencia, clave in casos:
+            if rapido(texto, clave) != referencia(texto, clave):
+                raise AssertionError(f"{nombre} ({tamaño}): la salida no coincide con la referencia")
+            t_rapido = mejor_tiempo(partial(rapido, texto, clave))
+            t_ref = mejor_tiempo(partial(referencia, texto, clave))
+            filas.append({
+                "Cifrado": nombre,
+                "Tamaño": tamaño,
+                "Original (s)": t_ref,
+                "Tablas (s)": t_rapido,
+                "Aceleración": t_ref / t_rapido if t_rapido else float("inf"),
+            })
+    return filas
+
+
+def tiempos_importacion(modulo):
+    """
+    Importa el módulo en un intérprete limpio con `python -X importtime` y devuelve
+    {módulo importado: microsegundos acumulados} de todo lo que se cargó
+    """
+    proceso = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+                             capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+    tiempos = {}
+    for linea in proceso.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        partes = linea.removeprefix("import time:").split("|")
+        if len(partes) == 3 and partes[1].strip().isdigit():
+            tiempos[partes[2].strip()] = int(partes[1])
+    return tiempos
+
+
+def benchmark_importacion(modulos=MODULOS_CALCULO, presupuesto_ms=PRESUPUESTO_IMPORTACION_MS):
+    """
+    Tiempo de importación de cada módulo de cálculo y dependencias pesadas que arrastra.
+    Lanza AssertionError si alguno supera el presupuesto o carga numpy, matplotlib...
+    """
+    filas = []
+    fallos = []
+    for modulo in modulos:
+        tiempos = tiempos_importacion(modulo)
+        ms = tiempos[modulo] / 1000
+        pesadas = sorted({nombre.split(".")[0] for nombre in tiempos} & DEPENDENCIAS_PESADAS)
+        filas.append({"Módulo": modulo, "Importación (ms)": ms, "Pesadas": ", ".join(pesadas) or "-"})
+        if ms > presupuesto_ms:
+            fallos.append(f"{modulo} tarda {ms:.1f} ms en importarse (presupuesto {presupuesto_ms} ms)")
+        if pesadas:
+            fallos.append(f"{modulo} importa {', '.join(pesadas)} al cargarse")
+    imprimir_tabla(filas)
+    if fallos:
+        raise AssertionError("\n".join(fallos))
+    return filas
+
+
+def benchmark_graficas(repeticiones=5):
+    """
+    Mediana de lo que tarda en el servidor cada nueva ejecución del script (cada interacción)
+    en las páginas con gráficas. El modo "antes" vacía las cachés en cada ejecución, como la
+    versión que recalculaba el ataque y rasterizaba la figura cada vez. Las gráficas nativas
+    las termina de dibujar el navegador, fuera de esta medida
+    """
+    # Solo para este benchmark: el resto del fichero no necesita Streamlit
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+    ruta = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    filas = []
+    for pagina, selector in PAGINAS_GRAFICAS.items():
+        fila = {"Página": pagina}
+        for columna, modo, vaciar in MODOS_DIBUJO:
+            app = AppTest.from_file(ruta, default_timeout=300).run()
+            app.sidebar.radio[0].set_value(pagina).run()
+            app.sidebar.radio(key="modo_graficas").set_value(modo).run()
+            if selector:
+                app.radio(key=selector[0]).set_value(selector[1]).run()
+            app.button[0].click().run()
+            # Los ataques largos terminan en segundo plano: se mide la página ya con el resultado
+            while any(clave.startswith("trabajo_") for clave in app.session_state.filtered_state):
+                time.sleep(0.1)
+                app.run()
+            tiempos = []
+            for _ in range(repeticiones):
+                if vaciar:
+                    st.cache_data.clear()
+                    st.cache_resource.clear()
+                tiempos.append(medir(app.run)[1])
+            if app.exception:
+                raise AssertionError(f"{pagina} ({modo}): {app.exception[0].value}")
+            fila[f"{columna} (ms)"] = statistics.median(tiempos) * 1000
+        filas.append(fila)
+    return filas
+
+
+def parsear_cantidad(cantidad):
+    """Convierte '10', '10K' o '10M' (potencias de 10) a entero"""
+    cantidad = cantidad.upper().strip()
+    for sufijo, factor in (("M", 10 ** 6), ("K", 10 ** 3)):
+        if cantidad.endswith(sufijo):
+            return int(float(cantidad[:-len(sufijo)]) * factor)
+    return int(cantidad)
+
+
+def generar_palabras(num_palabras):
+    """Diccionario de num_palabras palabras distintas a partir del diccionario común"""
+    base = AtaqueFuerzaBruta.generar_diccionario_comun()
+    return [f"{base[i % len(base)]}{i // len(base)}" for i in range(num_palabras)]
+
+
+def _hashear_todas(palabras):
+    for palabra in palabras:
+        AtaqueFuerzaBruta.hash_password(palabra)
+
+
+def _reglas_todas(palabras):
+    for palabra in palabras:
+        AtaqueDiccionarioReglas.aplicar_reglas(palabra)
+
+
+def _auditar_todas(palabras):
+    for _ in AtaqueFuerzaBruta.auditar_contraseñas(palabras, AtaqueFuerzaBruta.VELOCIDADES):
+        pass
+
+
+def _longitud_clave(texto):
+    # Lo que se mide es la estimación; las repeticiones se buscan al preparar el caso
+    return partial(estimar_longitud_clave, encontrar_repeticiones(texto, procesos=1))
+
+
+# Casos de la suite: nombre -> (entrada, tamaño máximo, preparar). preparar(entrada) devuelve la
+# llamada sin argumentos que se mide. Los ataques con pool se miden con un proceso para que
+# tracemalloc vea toda la memoria. Los máximos evitan tamaños que no caben en memoria: las
+# repeticiones de Kasiski crecen con el cuadrado del texto y fuerza_bruta guarda 25 copias
+CASOS = {
+    "cifrado_cesar": ("texto", None, lambda texto: partial(Cifrados.cifrado_cesar, texto, 3)),
+    "cifrado_sustitucion": ("texto", None,
+                            lambda texto: partial(Cifrados.cifrado_sustitucion, texto, CLAVE_SUSTITUCION)),
+    "cifrado_vigenere": ("texto", None, lambda texto: partial(Cifrados.cifrado_vigenere, texto, "clave")),
+    "fuerza_bruta": ("texto", "10MB", lambda texto: partial(fuerza_bruta, Cifrados.cifrado_cesar(texto, 3))),
+    "calcular_frecuencias": ("texto", None,
+                             lambda texto: partial(AtaqueFrecuencias.calcular_frecuencias, texto, procesos=1)),
+    "encontrar_repeticiones": ("texto", "30KB", lambda texto: partial(
+        encontrar_repeticiones, Cifrados.cifrado_vigenere(texto, "clave"), procesos=1)),
+    "estimar_longitud_clave": ("texto", "30KB",
+                               lambda texto: _longitud_clave(Cifrados.cifrado_vigenere(texto, "clave"))),
+    "hash_password": ("palabras", None, lambda palabras: partial(_hashear_todas, palabras)),
+    "aplicar_reglas": ("palabras", "1M", lambda palabras: partial(_reglas_todas, palabras)),
+    "generar_diccionario_con_reglas": ("palabras", "1M", lambda palabras: partial(
+        AtaqueDiccionarioReglas.generar_diccionario_con_reglas, palabras)),
+    # Velocidades fijas: la calibración del equipo no entra en la medida
+    "auditar_contraseñas": ("palabras", None, lambda palabras: partial(_auditar_todas, palabras)),
+    # Una contraseña que no está: se deshacen todas las reglas (el peor caso)
+    "simular_ataque": ("palabras", "1M", lambda palabras: partial(
+        AtaqueDiccionarioReglas.simular_ataque, "Noexiste!2024", palabras)),
+}
+
+
+def mejor_tiempo(funcion, repeticiones=REPETICIONES_SUITE, presupuesto=PRESUPUESTO_CASO):
+    """Mejor tiempo en segundos de hasta `repeticiones` llamadas o `presupuesto` segundos"""
+    tiempos = []
+    while len(tiempos) < repeticiones and sum(tiempos) < presupuesto:
+        tiempos.append(medir(funcion)[1])
+    return min(tiempos)
+
+
+def medir_caso(funcion, repeticiones=REPETICIONES_SUITE, presupuesto=PRESUPUESTO_CASO):
+    """
+    (mejor tiempo en segundos, pico de memoria en bytes). El tiempo se mide sin tracemalloc,
+    que frena las asignaciones, y el pico en una ejecución aparte
+    """
+    mejor = mejor_tiempo(funcion, repeticiones, presupuesto)
+    tracemalloc.start()
+    try:
+        funcion()
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return mejor, pico
+
+
+def benchmark_suite(tamaños=TAMAÑOS_SUITE, palabras=PALABRAS_SUITE, casos=None):
+    """
+    Rendimiento por segundo (bytes o palabras) y pico de memoria de cada cifrado y ataque en
+    cada tamaño. Devuelve un dict listo para guardar en JSON y comparar con otra ejecución
+    """
+    resultados = []
+    for nombre in casos or CASOS:
+        entrada, maximo, preparar = CASOS[nombre]
+        if entrada == "texto":
+            etiquetas, parsear, generar = tamaños, parsear_tamaño, generar_texto
+        else:
+            etiquetas, parsear, generar = palabras, parsear_cantidad, generar_palabras
+        for etiqueta in etiquetas:
+            cantidad = parsear(etiqueta)
+            if maximo is not None and cantidad > parsear(maximo):
+                print(f"{nombre} ({etiqueta}): omitido, el máximo es {maximo}", file=sys.stderr)
+                continue
+            print(f"{nombre} ({etiqueta})...", file=sys.stderr)
+            segundos, pico = medir_caso(preparar(generar(cantidad)))
+            resultados.append({
+                "caso": nombre,
+                "tamaño": etiqueta,
+                "unidad": "bytes" if entrada == "texto" else "palabras",
+                "cantidad": cantidad,
+                "segundos": segundos,
+                "por_segundo": cantidad / segundos if segundos else float("inf"),
+                "memoria_pico": pico,
+            })
+    return {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "resultados": resultados,
+    }
+
+
+def comparar(base, actual, umbral=UMBRAL_REGRESION):
+    """
+    Compara dos ejecuciones de benchmark_suite caso a caso. Es regresión si el rendimiento
+    baja más del umbral o si la memoria sube más del umbral (y de MEMORIA_MINIMA)
+    """
+    anteriores = {(r["caso"], r["tamaño"]): r for r in base["resultados"]}
+    filas = []
+    for r in actual["resultados"]:
+        anterior = anteriores.get((r["caso"], r["tamaño"]))
+        if anterior is None:
+            continue
+        rendimiento = r["por_segundo"] / anterior["por_segundo"] - 1
+        memoria = r["memoria_pico"] - anterior["memoria_pico"]
+        if rendimiento < -umbral or (memoria > MEMORIA_MINIMA and memoria > umbral * anterior["memoria_pico"]):
+            estado = "regresión"
+        elif rendimiento > umbral:
+            estado = "mejora"
+        else:
+            estado = "igual"
+        filas.append({
+            "Caso": r["caso"],
+            "Tamaño": r["tamaño"],
+            "Base (/s)": anterior["por_segundo"],
+            "Actual (/s)": r["por_segundo"],
+            "Rendimiento (%)": rendimiento * 100,
+            "Memoria (MB)": r["memoria_pico"] / (1 << 20),
+            "Δ memoria (MB)": memoria / (1 << 20),
+            "Estado": estado,
+        })
+    return filas
+
+
+def imprimir_tabla(filas):
+    if not filas:
+        return
+    columnas = list(filas[0].keys())
+    print(" | ".join(f"{c:>14}" for c in columnas))
+    for fila in filas:
+        celdas = []
+        for c in columnas:
+            valor = fila[c]
+            celdas.append(f"{valor:>14.4f}" if isinstance(valor, float) else f"{valor:>14}")
+        print(" | ".join(celdas))
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(prog="python benchmarks.py", description="Benchmarks de rendimiento")
+    parser.add_argument("tamaños", nargs="*", help="tamaños de texto (1KB, 10MB...)")
+    parser.add_argument("--importacion", action="store_true", help="presupuesto de tiempo de importación")
+    parser.add_argument("--graficas", action="store_true", help="latencia de las páginas con gráficas")
+    parser.add_argument("--suite", action="store_true", help="todos los cifrados y ataques")
+    parser.add_argument("--palabras", nargs="+", default=PALABRAS_SUITE, help="tamaños de diccionario (10, 10K, 1M...)")
+    parser.add_argument("--casos", nargs="+", choices=sorted(CASOS), help="solo estos casos de la suite")
+    parser.add_argument("--json", metavar="RUTA", help="guarda los resultados de la suite ('-' para la salida estándar)")
+    parser.add_argument("--comparar", metavar="BASE", help="compara la suite con unos resultados guardados")
+    parser.add_argument("--umbral", type=float, default=UMBRAL_REGRESION, help="empeoramiento tolerado (0.10 = 10 %%)")
+    args = parser.parse_args(argumentos)
+
+    if args.importacion:
+        try:
+            benchmark_importacion()
+        except AssertionError as e:
+            sys.exit(str(e))
+    elif args.graficas:
+        imprimir_tabla(benchmark_graficas())
+    elif args.suite or args.comparar:
+        resultados = benchmark_suite(args.tamaños or TAMAÑOS_SUITE, args.palabras, args.casos)
+        if args.json == "-":
+            json.dump(resultados, sys.stdout, indent=2, ensure_ascii=False)
+            print()
+        elif args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(resultados, f, indent=2, ensure_ascii=False)
+        if args.comparar:
+            with open(args.comparar, encoding="utf-8") as f:
+                filas = comparar(json.load(f), resultados, args.umbral)
+            imprimir_tabla(filas)
+            regresiones = [f"{f['Caso']} ({f['Tamaño']})" for f in filas if f["Estado"] == "regresión"]
+            if regresiones:
+                sys.exit(f"Regresiones por encima del {args.umbral:.0%}: {', '.join(regresiones)}")
+        elif args.json != "-":
+            imprimir_tabla([{"Caso": r["caso"], "Tamaño": r["tamaño"], "Por segundo": r["por_segundo"],
+                             "Memoria (MB)": r["memoria_pico"] / (1 << 20)} for r in resultados["resultados"]])
+    else:
+        imprimir_tabla(benchmark_cifrados(args.tamaños or TAMAÑOS_POR_DEFECTO))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,24 @@
 import random
+import re
 import string
+from functools import lru_cache
+
+from dependencias import importar_diferido
+
+# numpy solo hace falta para Vigenère sobre textos latin-1 y se carga en ese momento
+np = importar_diferido("numpy")
 
 class Cifrados:
     """Clase con implementaciones de cifrados clásicos"""
 
     @staticmethod
     def cifrado_cesar(texto, desplazamiento):
-        resultado = ""
-        for caracter in texto:
-            if caracter.isalpha():
-                mayus = caracter.isupper()
-                caracter = caracter.lower()
-                codigo = ord(caracter) - 97
-                nuevo_codigo = (codigo + desplazamiento) % 26
-                nuevo_caracter = chr(nuevo_codigo + 97)
-                if mayus:
-                    nuevo_caracter = nuevo_caracter.upper()
-                resultado += nuevo_caracter
-            else:
-                resultado += caracter
-        return resultado
+        desplazamiento %= 26
+        try:
+            datos = texto.encode("latin-1")
+        except UnicodeEncodeError:
+            return texto.translate(_tabla_cesar(desplazamiento, set(texto)))
+        return datos.translate(_TABLAS_CESAR_BYTES[desplazamiento]).decode("latin-1")
 
     @staticmethod
     def cifrado_sustitucion(texto, clave_sustitucion=None):
@@ -47,23 +46,101 @@ class Cifrados:
 
     @staticmethod
     def cifrado_vigenere(texto, clave):
-        resultado = ""
         clave = clave.lower()
-        indice_clave = 0
+        desplazamientos = [(ord(c) - 97) % 26 for c in clave]
+        try:
+            datos = texto.encode("latin-1")
+        except UnicodeEncodeError:
+            return _vigenere_unicode(texto, desplazamientos)
 
-        for caracter in texto:
-            if caracter.isalpha():
-                mayus = caracter.isupper()
-                caracter = caracter.lower()
-                desplazamiento = ord(clave[indice_clave % len(clave)]) - 97
-                codigo = ord(caracter) - 97
-                nuevo_codigo = (codigo + desplazamiento) % 26
-                nuevo_caracter = chr(nuevo_codigo + 97)
-                if mayus:
-                    nuevo_caracter = nuevo_caracter.upper()
-                resultado += nuevo_caracter
-                indice_clave += 1
-            else:
-                resultado += caracter
+        # Flujo de letras (sin espacios ni signos) cifrado columna a columna
+        letras = datos.translate(None, _NO_LETRAS_BYTES)
+        if not letras:
+            return texto
+        cifradas = _cifrar_columnas(letras, bytearray(letras), desplazamientos, _TABLAS_CESAR_BYTES)
+
+        # Devolver cada letra cifrada a su posición original
+        salida = np.frombuffer(datos, dtype=np.uint8).copy()
+        salida[_es_letra_bytes()[salida]] = np.frombuffer(cifradas, dtype=np.uint8)
+        return salida.tobytes().decode("latin-1")
+
+
+def _desplazar_caracter(caracter, desplazamiento):
+    """Desplaza una letra igual que el algoritmo carácter a carácter original"""
+    mayus = caracter.isupper()
+    codigo = ord(caracter.lower()) - 97
+    nuevo_caracter = chr((codigo + desplazamiento) % 26 + 97)
+    if mayus:
+        nuevo_caracter = nuevo_caracter.upper()
+    return nuevo_caracter
+
+
+# Tablas de traducción precalculadas para los 26 desplazamientos (mayúsculas y minúsculas)
+_TABLAS_CESAR = [
+    str.maketrans({c: _desplazar_caracter(c, d) for c in string.ascii_letters})
+    for d in range(26)
+]
+
+# Las mismas tablas sobre bytes latin-1 (cubre ñ y vocales acentuadas), mucho más rápidas
+_TABLAS_CESAR_BYTES = [
+    bytes(ord(_desplazar_caracter(chr(b), d)) if chr(b).isalpha() else b for b in range(256))
+    for d in range(26)
+]
+_NO_LETRAS_BYTES = bytes(b for b in range(256) if not chr(b).isalpha())
+
+
+@lru_cache(maxsize=1)
+def _es_letra_bytes():
+    """Máscara numpy de los bytes latin-1 que son letras (se crea en el primer uso)"""
+    return np.array([chr(b).isalpha() for b in range(256)])
+
+
+def _tabla_cesar(desplazamiento, caracteres=()):
+    """
+    Devuelve la tabla de traducción de un desplazamiento.
+    Las letras no ASCII presentes en el texto se añaden a una copia de la tabla
+    para conservar exactamente el resultado del algoritmo original.
+    """
+    tabla = _TABLAS_CESAR[desplazamiento]
+    extra = [c for c in caracteres if not c.isascii() and c.isalpha()]
+    if not extra:
+        return tabla
+    tabla = dict(tabla)
+    for c in extra:
+        tabla[ord(c)] = _desplazar_caracter(c, desplazamiento)
+    return tabla
+
+
+def _cifrar_columnas(letras, cifradas, desplazamientos, tablas):
+    """Traduce en bloque cada columna del periodo de la clave sobre el flujo de letras"""
+    if not desplazamientos:
+        raise ValueError("La clave de Vigenère no puede estar vacía")
+    periodo = len(desplazamientos)
+    for i, desplazamiento in enumerate(desplazamientos[:len(letras)]):
+        cifradas[i::periodo] = letras[i::periodo].translate(tablas[desplazamiento])
+    return cifradas
+
+
+def _vigenere_unicode(texto, desplazamientos):
+    """Vigenère para textos fuera de latin-1, con tablas str ampliadas"""
+    caracteres = set(texto)
+    no_letras = [c for c in caracteres if not c.isalpha()]
+
+    # Tramos de letras en posiciones pares y de no letras en impares
+    if no_letras:
+        trozos = re.split("([" + "".join(map(re.escape, no_letras)) + "]+)", texto)
+    else:
+        trozos = [texto]
+    letras = "".join(trozos[0::2])
+    if not letras:
+        return texto
+
+    tablas = [_tabla_cesar(d, caracteres) for d in range(26)]
+    cifradas = "".join(_cifrar_columnas(letras, list(letras), desplazamientos, tablas))
 
-        return resultado
\ No newline at end of file
+    inicio = 0
+    for i in range(0, len(trozos), 2):
+        fin = inicio + len(trozos[i])
+        trozos[i] = cifradas[inicio:fin]
+        inicio = fin
+    return "".join(trozos)
@@ -0,0 +1,238 @@
+"""
+Ejecución de los ataques por lotes, sin Streamlit ni gráficas.
+
+Lee peticiones JSONL de la entrada estándar y escribe un resultado JSONL por petición:
+
+    python -m consola cesar < cifrados.jsonl > resultados.jsonl
+    python -m consola auditar --lineas < contraseñas.txt
+    python -m consola kasiski mensaje1.txt mensaje2.txt
+
+Con --lineas cada línea es el campo principal de la petición (texto o contraseña) y con
+ficheros como argumentos cada fichero es el texto de una petición. Campos de cada operación,
+además de un "id" opcional que se copia en la respuesta:
+
+    cifrar       texto, cifrado ("cesar", "vigenere" o "sustitucion"), clave
+    descifrar    texto, cifrado ("cesar" o "vigenere"), clave
+    cesar        texto, top (5)
+    frecuencias  texto
+    kasiski      texto, longitud_max (20)
+    auditar      contraseña
+    reglas       contraseña, palabras (diccionario común)
+    crackear     hashes, metodo ("md5"), mascara o palabras (diccionario común), reglas (false),
+                 procesos (1)
+
+Una petición que falla produce {"id": ..., "error": "..."} y el lote continúa. Los números no
+finitos (p. ej. los segundos de una contraseña imposible de romper) se escriben como null. `auditar --lineas`
+va por AuditoriaContraseñas, que calcula el resultado una vez por combinación de longitud y
+clases de caracteres: millones de contraseñas por minuto en un solo proceso.
+"""
+import argparse
+import itertools
+import json
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from ataques import encontrar_repeticiones, estimar_longitud_clave, estimar_longitud_clave_ic, \
+    obtener_longitudes_mas_probables, ranking_claves_cesar, recuperar_clave_vigenere, AtaqueFrecuencias
+from ataques_modernos import AtaqueDiccionarioReglas, AtaqueFuerzaBruta, AuditoriaContraseñas, Mascara
+from cifrados import Cifrados
+
+# Peticiones que se reparten juntas entre los procesos
+TAMAÑO_LOTE = 256
+
+
+def _clave_vigenere_inversa(clave):
+    return "".join(chr((26 - (ord(c) - 97)) % 26 + 97) for c in clave.lower())
+
+
+def _cifrar(peticion):
+    cifrado, texto = peticion.get("cifrado", "cesar"), peticion["texto"]
+    if cifrado == "cesar":
+        return {"resultado": Cifrados.cifrado_cesar(texto, int(peticion.get("clave", 3)))}
+    if cifrado == "vigenere":
+        return {"resultado": Cifrados.cifrado_vigenere(texto, peticion["clave"])}
+    if cifrado == "sustitucion":
+        resultado, clave = Cifrados.cifrado_sustitucion(texto, peticion.get("clave"))
+        return {"resultado": resultado, "clave": clave}
+    raise ValueError(f"Cifrado desconocido: {cifrado}")
+
+
+def _descifrar(peticion):
+    cifrado, texto = peticion.get("cifrado", "cesar"), peticion["texto"]
+    if cifrado == "cesar":
+        return {"resultado": Cifrados.cifrado_cesar(texto, -int(peticion["clave"]))}
+    if cifrado == "vigenere":
+        return {"resultado": Cifrados.cifrado_vigenere(texto, _clave_vigenere_inversa(peticion["clave"]))}
+    raise ValueError(f"Cifrado desconocido: {cifrado}")
+
+
+def _cesar(peticion):
+    return {"ranking": ranking_claves_cesar(peticion["texto"], top_k=int(peticion.get("top", 5)), procesos=1)}
+
+
+def _frecuencias(peticion):
+    return {"frecuencias": AtaqueFrecuencias.calcular_frecuencias(peticion["texto"], procesos=1)}
+
+
+def _kasiski(peticion):
+    texto = peticion["texto"]
+    longitud_max = int(peticion.get("longitud_max", 20))
+    longitudes_kasiski = obtener_longitudes_mas_probables(
+        estimar_longitud_clave(encontrar_repeticiones(texto, procesos=1)))
+    longitudes_ic = obtener_longitudes_mas_probables(estimar_longitud_clave_ic(texto, longitud_max))
+    claves = recuperar_clave_vigenere(texto, set(longitudes_kasiski) | set(longitudes_ic))
+    return {
+        "longitudes_kasiski": longitudes_kasiski,
+        "longitudes_ic": longitudes_ic,
+        "claves": [{"longitud": c["Longitud"], "clave": c["Clave"], "chi2": c["Chi²"]} for c in claves],
+        "texto_descifrado": claves[0]["Texto descifrado"] if claves else None,
+    }
+
+
+def _auditar(peticion):
+    return AtaqueFuerzaBruta.analizar_seguridad_contraseña(peticion["contraseña"])
+
+
+def _reglas(peticion):
+    palabras = peticion.get("palabras") or AtaqueFuerzaBruta.generar_diccionario_comun()
+    return AtaqueDiccionarioReglas.simular_ataque(peticion["contraseña"], palabras)
+
+
+def _crackear(peticion):
+    if "mascara" in peticion:
+        candidatos = Mascara(peticion["mascara"])
+    else:
+        palabras = peticion.get("palabras") or AtaqueFuerzaBruta.generar_diccionario_comun()
+        candidatos = AtaqueFuerzaBruta.candidatos_reglas(palabras) if peticion.get("reglas") else palabras
+    return AtaqueFuerzaBruta.crackear(peticion["hashes"], candidatos, peticion.get("metodo", "md5"),
+                                      procesos=int(peticion.get("procesos", 1)))
+
+
+OPERACIONES = {
+    "cifrar": _cifrar,
+    "descifrar": _descifrar,
+    "cesar": _cesar,
+    "frecuencias": _frecuencias,
+    "kasiski": _kasiski,
+    "auditar": _auditar,
+    "reglas": _reglas,
+    "crackear": _crackear,
+}
+
+# Campo que rellena cada línea con --lineas
+_CAMPO_PRINCIPAL = {"auditar": "contraseña", "reglas": "contraseña", "crackear": "hashes"}
+
+
+def _finitos(valor):
+    """El valor con los float no finitos (inf, nan) cambiados por None, que JSON sí admite"""
+    if isinstance(valor, float):
+        return valor if math.isfinite(valor) else None
+    if isinstance(valor, dict):
+        return {clave: _finitos(v) for clave, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_finitos(v) for v in valor]
+    return valor
+
+
+def _a_json(resultado):
+    """Una línea JSON válida del resultado"""
+    return json.dumps(_finitos(resultado), ensure_ascii=False, default=str, allow_nan=False)
+
+
+def procesar(operacion, linea):
+    """Resultado (una línea JSON) de una petición; los errores se devuelven, no se lanzan"""
+    peticion = {}
+    try:
+        peticion = json.loads(linea) if isinstance(linea, str) else linea
+        resultado = OPERACIONES[operacion](peticion)
+        if "id" in peticion:
+            resultado = {"id": peticion["id"], **resultado}
+    except Exception as e:  # Una petición mala no debe parar el lote
+        resultado = {"id": peticion.get("id") if isinstance(peticion, dict) else None,
+                     "error": f"{type(e).__name__}: {e}"}
+    return _a_json(resultado)
+
+
+def auditar_lineas(entrada, salida):
+    """
+    auditar --lineas sin pasar por procesar(): escribe lo mismo, pero cada resultado se
+    serializa una vez por clave de AuditoriaContraseñas y no una vez por contraseña
+    """
+    auditoria = AuditoriaContraseñas()
+    colas = {}
+    lineas = ((numero, linea.rstrip("\r\n")) for numero, linea in enumerate(entrada, 1))
+    lineas = ((numero, linea) for numero, linea in lineas if linea.strip())
+    while lote := list(itertools.islice(lineas, AuditoriaContraseñas.TAMAÑO_LOTE)):
+        numeros, contraseñas = zip(*lote)
+        partes = []
+        for numero, clave in zip(numeros, auditoria.claves(contraseñas)):
+            cola = colas.get(clave)
+            if cola is None:
+                # '{"longitud": ...}' sin la llave inicial, para ponerle delante el id
+                cola = colas[clave] = _a_json(auditoria.resultado(clave))[1:]
+            partes.append(f'{{"id": {numero}, {cola}\n')
+        salida.write("".join(partes))
+    salida.flush()
+
+
+def _procesar_lote(argumentos):
+    operacion, lote = argumentos
+    return [procesar(operacion, linea) for linea in lote]
+
+
+def peticiones(operacion, entrada, lineas=False, ficheros=()):
+    """Peticiones a partir de ficheros, de líneas sueltas o de JSONL"""
+    if ficheros:
+        for ruta in ficheros:
+            with open(ruta, encoding="utf-8", errors="replace") as f:
+                yield {"id": ruta, "texto": f.read()}
+        return
+    campo = _CAMPO_PRINCIPAL.get(operacion, "texto")
+    for numero, linea in enumerate(entrada, 1):
+        linea = linea.rstrip("\r\n")
+        if not linea.strip():
+            continue
+        if lineas:
+            yield {"id": numero, campo: [linea] if campo == "hashes" else linea}
+        else:
+            yield linea
+
+
+def ejecutar(operacion, entrada, salida, lineas=False, ficheros=(), procesos=1):
+    """Procesa todas las peticiones y escribe los resultados en orden según van saliendo"""
+    if operacion == "auditar" and lineas and not ficheros:
+        auditar_lineas(entrada, salida)
+        return
+    pendientes = peticiones(operacion, entrada, lineas, ficheros)
+    if procesos == 1:
+        for peticion in pendientes:
+            salida.write(procesar(operacion, peticion) + "\n")
+            salida.flush()
+        return
+    lotes = iter(lambda: list(itertools.islice(pendientes, TAMAÑO_LOTE)), [])
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        # Unos pocos lotes por delante de la escritura, para no leer toda la entrada
+        en_vuelo = []
+        for lote in lotes:
+            en_vuelo.append(ejecutor.submit(_procesar_lote, (operacion, lote)))
+            if len(en_vuelo) > 2 * procesos:
+                salida.write("\n".join(en_vuelo.pop(0).result()) + "\n")
+                salida.flush()
+        for futuro in en_vuelo:
+            salida.write("\n".join(futuro.result()) + "\n")
+        salida.flush()
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(prog="python -m consola", description="Ataques por lotes (JSONL)")
+    parser.add_argument("operacion", choices=sorted(OPERACIONES))
+    parser.add_argument("ficheros", nargs="*", help="ficheros de texto, uno por petición (en lugar de stdin)")
+    parser.add_argument("--lineas", action="store_true", help="cada línea de stdin es el campo principal")
+    parser.add_argument("--procesos", type=int, default=1, help="procesos que reparten las peticiones")
+    args = parser.parse_args(argumentos)
+    ejecutar(args.operacion, sys.stdin, sys.stdout, args.lineas, args.ficheros, args.procesos)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Importación diferida de las dependencias pesadas.
+
+Los módulos de cálculo (cifrados, ataques, ataques_modernos) deben poder importarse solo con
+la biblioteca estándar: un proceso del pool o la consola que no llega a usar numpy no paga
+su carga. Con importar_diferido el módulo se registra ya en sys.modules, pero su código no
+se ejecuta hasta que se accede al primer atributo (np.array, np.uint8...).
+
+No se usa importlib.util.LazyLoader porque hasta Python 3.12 no es seguro entre hilos: las
+sesiones de Streamlit son hilos y la segunda en llegar veía el módulo a medio ejecutar.
+"""
+import importlib.util
+import sys
+import threading
+import types
+
+_bloqueo = threading.RLock()
+
+
+class _ModuloDiferido(types.ModuleType):
+    """Módulo que ejecuta su código en el primer acceso a un atributo, una sola vez"""
+
+    def __getattribute__(self, atributo):
+        with _bloqueo:
+            estado = types.ModuleType.__getattribute__(self, "__dict__")
+            # Mientras se ejecuta, los accesos del propio módulo (y de sus submódulos) pasan
+            if type(self) is _ModuloDiferido and not estado.get("__cargando__"):
+                estado["__cargando__"] = True
+                try:
+                    estado["__spec__"].loader.exec_module(self)
+                    self.__class__ = types.ModuleType
+                finally:
+                    del estado["__cargando__"]
+        return types.ModuleType.__getattribute__(self, atributo)
+
+
+def importar_diferido(nombre):
+    """Módulo que se carga de verdad en el primer acceso a uno de sus atributos"""
+    if nombre in sys.modules:
+        return sys.modules[nombre]
+    spec = importlib.util.find_spec(nombre)
+    if spec is None:
+        raise ModuleNotFoundError(f"No se encuentra el módulo {nombre}", name=nombre)
+    modulo = importlib.util.module_from_spec(spec)
+    modulo.__class__ = _ModuloDiferido
+    sys.modules[nombre] = modulo
+    return modulo
@@ -0,0 +1,161 @@
+"""
+Gráficas de matplotlib de la interfaz.
+
+Es el único módulo que importa matplotlib y solo se carga al dibujar la primera gráfica.
+El backend Agg se fija aquí de forma explícita: las figuras se pintan en memoria para
+Streamlit y no hace falta ninguna ventana (ni un servidor gráfico en la máquina).
+"""
+import io
+import math
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402  (después de fijar el backend)
+
+# Segundos por unidad para convertir los tiempos legibles ("3.2 horas") a la escala de la gráfica
+_SEGUNDOS_UNIDAD = (("segundos", 1), ("minutos", 60), ("horas", 3600), ("días", 86400))
+# Altura de la barra de un tiempo infinito: la escala logarítmica no admite inf
+_SEGUNDOS_TOPE = 1e300
+
+
+def cerrar(fig=None):
+    """Libera la figura una vez enviada a Streamlit (todas si no se indica)"""
+    plt.close(fig if fig is not None else 'all')
+
+
+def a_png(fig):
+    """PNG de la figura con las mismas opciones que st.pyplot; la figura se cierra"""
+    salida = io.BytesIO()
+    fig.savefig(salida, format="png", dpi=200, bbox_inches="tight")
+    cerrar(fig)
+    return salida.getvalue()
+
+
+def frecuencias(frec_cifrado, frecuencias_espanol):
+    """Las 10 letras más frecuentes del texto cifrado junto a las del español"""
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 5))
+
+    # Gráfica 1: Frecuencias en texto cifrado
+    letras_cifrado = list(frec_cifrado.keys())[:10]
+    frecs_cifrado = list(frec_cifrado.values())[:10]
+
+    ax1.bar(letras_cifrado, frecs_cifrado, color='skyblue', edgecolor='navy')
+    ax1.set_title('Frecuencias en Texto Cifrado', fontsize=14, fontweight='bold')
+    ax1.set_xlabel('Letras')
+    ax1.set_ylabel('Frecuencia (%)')
+    ax1.grid(axis='y', alpha=0.3)
+
+    # Gráfica 2: Frecuencias en español
+    letras_espanol = list(frecuencias_espanol.keys())[:10]
+    frecs_espanol = [frecuencias_espanol[l] for l in letras_espanol]
+
+    ax2.bar(letras_espanol, frecs_espanol, color='lightcoral', edgecolor='darkred')
+    ax2.set_title('Frecuencias en Español', fontsize=14, fontweight='bold')
+    ax2.set_xlabel('Letras')
+    ax2.set_ylabel('Frecuencia (%)')
+    ax2.grid(axis='y', alpha=0.3)
+
+    plt.tight_layout()
+    return fig
+
+
+def comparativa_tiempos(analisis):
+    """
+    Tiempos estimados de cada escenario en escala logarítmica.
+    Devuelve None si la figura no se puede generar
+    """
+    try:
+        fig, ax = plt.subplots(figsize=(10, 5))
+
+        escenarios = list(analisis["tiempos"].keys())
+        # Convertir tiempos a valores numéricos para la gráfica
+        tiempos_num = []
+        tiempos_str_limpios = []
+
+        for escenario in escenarios:
+            tiempo_str = analisis["tiempos"][escenario]
+            tiempos_str_limpios.append(tiempo_str)
+
+            if math.isinf(analisis["segundos"][escenario]):
+                tiempos_num.append(_SEGUNDOS_TOPE)
+                continue
+            try:
+                factor = next((s for unidad, s in _SEGUNDOS_UNIDAD if unidad in tiempo_str), 31536000)  # años
+                tiempos_num.append(float(tiempo_str.split()[0]) * factor)
+            except (ValueError, IndexError):
+                # Si hay error al parsear, asignamos un valor por defecto
+                tiempos_num.append(3600)  # 1 hora como valor por defecto
+
+        # Usar escala logarítmica
+        colors = ['red' if t < 3600 else 'orange' if t < 86400 else 'green' for t in tiempos_num]
+        bars = ax.bar(escenarios, tiempos_num, color=colors, edgecolor='black')
+        ax.set_yscale('log')
+        ax.set_ylabel('Tiempo (segundos, escala logarítmica)')
+        ax.set_title('Tiempo estimado para romper la contraseña')
+
+        # Añadir etiquetas con el tiempo en formato legible
+        for bar, tiempo_str in zip(bars, tiempos_str_limpios):
+            ax.text(bar.get_x() + bar.get_width() / 2, bar.get_height() * 1.1,
+                    tiempo_str, ha='center', va='bottom', rotation=45, fontsize=8)
+
+        plt.tight_layout()
+        return fig
+
+    except Exception as e:
+        # Si hay cualquier error en la gráfica, devolvemos None
+        cerrar()  # Cerrar todas las figuras para liberar memoria
+        print(f"Error al generar gráfica: {e}")  # Log del error
+        return None
+
+
+def variaciones_por_palabra(reglas_aplicadas):
+    """Número de variaciones generadas para las 10 primeras palabras base"""
+    fig, ax = plt.subplots(figsize=(10, 5))
+
+    palabras = list(reglas_aplicadas.keys())[:10]  # Top 10
+    num_variaciones = list(reglas_aplicadas.values())[:10]
+
+    ax.bar(palabras, num_variaciones, color='lightcoral', edgecolor='darkred')
+    ax.set_xlabel('Palabra base')
+    ax.set_ylabel('Número de variaciones')
+    ax.set_title('Variaciones generadas por palabra base')
+    ax.tick_params(axis='x', rotation=45)
+
+    plt.tight_layout()
+    return fig
+
+
+def longitudes_clave(longitudes, frecuencias_longitud):
+    """Barras con las longitudes de clave de Vigenère más votadas por Kasiski"""
+    fig, ax = plt.subplots(figsize=(10, 4))
+    ax.bar([str(l) for l in longitudes], frecuencias_longitud, color='lightgreen', edgecolor='darkgreen')
+    ax.set_xlabel('Longitud de clave')
+    ax.set_ylabel('Frecuencia')
+    ax.set_title('Posibles longitudes de clave')
+    ax.grid(axis='y', alpha=0.3)
+    return fig
+
+
+def crecimiento_tiempo(longitudes, tiempos, longitud):
+    """Tiempo de fuerza bruta según la longitud, marcando la de la contraseña"""
+    fig, ax = plt.subplots(figsize=(10, 5))
+
+    ax.plot(longitudes, tiempos, 'b-o', linewidth=2, markersize=6, label='Tiempo estimado')
+    ax.axvline(x=longitud, color='red', linestyle='--', alpha=0.7, linewidth=2,
+               label=f'Tu contraseña ({longitud} chars)')
+    ax.set_yscale('log')
+    ax.set_xlabel('Longitud de la contraseña', fontsize=12)
+    ax.set_ylabel('Tiempo (segundos, escala logarítmica)', fontsize=12)
+    ax.set_title('⏰ Crecimiento exponencial del tiempo con la longitud', fontsize=14, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+
+    # Añadir anotaciones para puntos clave
+    for l, t in zip(longitudes, tiempos):
+        if l in [8, 12, 16]:  # Solo anotar algunas longitudes
+            ax.annotate(f'{t:.0e}s', (l, t), textcoords="offset points",
+                        xytext=(0, 10), ha='center', fontsize=8)
+
+    plt.tight_layout()
+    return fig
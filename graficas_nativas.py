@@ -0,0 +1,116 @@
+"""
+Las mismas gráficas que graficas.py, como datos para los gráficos nativos de Streamlit.
+
+Cada función recibe los mismos argumentos que su equivalente de matplotlib y devuelve
+(DataFrame, especificación vega-lite) para st.vega_lite_chart. La gráfica la dibuja el
+navegador, así que el servidor no rasteriza ningún PNG en cada ejecución del script.
+"""
+import pandas as pd
+
+_ANCHO = "container"
+# Altura de la barra de un tiempo infinito: la escala logarítmica no admite inf
+_SEGUNDOS_TOPE = 1e300
+
+
+def frecuencias(frec_cifrado, frecuencias_espanol):
+    """Las 10 letras más frecuentes del texto cifrado junto a las del español"""
+    filas = [("Texto cifrado", letra, frecuencia) for letra, frecuencia in list(frec_cifrado.items())[:10]]
+    filas += [("Español", letra, frecuencia) for letra, frecuencia in list(frecuencias_espanol.items())[:10]]
+    datos = pd.DataFrame(filas, columns=["Origen", "Letra", "Frecuencia (%)"])
+    especificacion = {
+        "mark": {"type": "bar", "stroke": "black", "strokeWidth": 0.5},
+        "encoding": {
+            "column": {"field": "Origen", "type": "nominal", "sort": ["Texto cifrado", "Español"], "title": None},
+            "x": {"field": "Letra", "type": "nominal", "sort": None, "title": "Letras"},
+            "y": {"field": "Frecuencia (%)", "type": "quantitative"},
+            "color": {"field": "Origen", "type": "nominal", "legend": None,
+                      "scale": {"domain": ["Texto cifrado", "Español"], "range": ["skyblue", "lightcoral"]}},
+            "tooltip": [{"field": "Letra"}, {"field": "Frecuencia (%)", "format": ".2f"}],
+        },
+        "resolve": {"scale": {"x": "independent"}},
+    }
+    return datos, especificacion
+
+
+def comparativa_tiempos(analisis):
+    """Tiempos estimados de cada escenario en escala logarítmica"""
+    datos = pd.DataFrame({
+        "Escenario": list(analisis["tiempos"]),
+        "Segundos": [min(analisis["segundos"][escenario], _SEGUNDOS_TOPE) for escenario in analisis["tiempos"]],
+        "Tiempo": list(analisis["tiempos"].values()),
+    })
+    datos["Nivel"] = pd.cut(datos["Segundos"], [-1, 3600, 86400, float("inf")], right=False,
+                            labels=["Menos de 1 hora", "Menos de 1 día", "Más de 1 día"])
+    especificacion = {
+        "width": _ANCHO,
+        "title": "Tiempo estimado para romper la contraseña",
+        "mark": {"type": "bar", "stroke": "black"},
+        "encoding": {
+            "x": {"field": "Escenario", "type": "nominal", "sort": None, "axis": {"labelAngle": 0}},
+            "y": {"field": "Segundos", "type": "quantitative", "scale": {"type": "log"},
+                  "title": "Tiempo (segundos, escala logarítmica)"},
+            "color": {"field": "Nivel", "type": "nominal",
+                      "scale": {"domain": ["Menos de 1 hora", "Menos de 1 día", "Más de 1 día"],
+                                "range": ["red", "orange", "green"]}},
+            "tooltip": [{"field": "Escenario"}, {"field": "Tiempo"}],
+        },
+    }
+    return datos, especificacion
+
+
+def variaciones_por_palabra(reglas_aplicadas):
+    """Número de variaciones generadas para las 10 primeras palabras base"""
+    datos = pd.DataFrame(list(reglas_aplicadas.items())[:10], columns=["Palabra base", "Variaciones"])
+    especificacion = {
+        "width": _ANCHO,
+        "title": "Variaciones generadas por palabra base",
+        "mark": {"type": "bar", "color": "lightcoral", "stroke": "darkred"},
+        "encoding": {
+            "x": {"field": "Palabra base", "type": "nominal", "sort": None, "axis": {"labelAngle": -45}},
+            "y": {"field": "Variaciones", "type": "quantitative", "title": "Número de variaciones"},
+        },
+    }
+    return datos, especificacion
+
+
+def longitudes_clave(longitudes, frecuencias_longitud):
+    """Barras con las longitudes de clave de Vigenère más votadas por Kasiski"""
+    datos = pd.DataFrame({"Longitud": [str(l) for l in longitudes], "Frecuencia": list(frecuencias_longitud)})
+    especificacion = {
+        "width": _ANCHO,
+        "title": "Posibles longitudes de clave",
+        "mark": {"type": "bar", "color": "lightgreen", "stroke": "darkgreen"},
+        "encoding": {
+            "x": {"field": "Longitud", "type": "nominal", "sort": None, "title": "Longitud de clave",
+                  "axis": {"labelAngle": 0}},
+            "y": {"field": "Frecuencia", "type": "quantitative"},
+        },
+    }
+    return datos, especificacion
+
+
+def crecimiento_tiempo(longitudes, tiempos, longitud):
+    """Tiempo de fuerza bruta según la longitud, marcando la de la contraseña"""
+    datos = pd.DataFrame({"Longitud": list(longitudes), "Segundos": list(tiempos)})
+    especificacion = {
+        "width": _ANCHO,
+        "title": "Crecimiento exponencial del tiempo con la longitud",
+        "layer": [
+            {
+                "mark": {"type": "line", "point": True, "color": "blue"},
+                "encoding": {
+                    "x": {"field": "Longitud", "type": "quantitative", "title": "Longitud de la contraseña"},
+                    "y": {"field": "Segundos", "type": "quantitative", "scale": {"type": "log"},
+                          "title": "Tiempo (segundos, escala logarítmica)"},
+                    "tooltip": [{"field": "Longitud"}, {"field": "Segundos", "format": ".1e"}],
+                },
+            },
+            {
+                # Línea vertical en la longitud de la contraseña
+                "data": {"values": [{"Longitud": longitud}]},
+                "mark": {"type": "rule", "color": "red", "strokeDash": [6, 4], "strokeWidth": 2},
+                "encoding": {"x": {"field": "Longitud", "type": "quantitative"}},
+            },
+        ],
+    }
+    return datos, especificacion
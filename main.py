@@ -1,12 +1,189 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
+import hashlib
+import random
 import time
+import uuid
 
-from ataques import fuerza_bruta, estimar_longitud_clave, encontrar_repeticiones, AtaqueFrecuencias, \
-    obtener_longitudes_mas_probables
-from ataques_modernos import AtaqueFuerzaBruta, AtaqueDiccionarioReglas
+from ataques import fuerza_bruta_columnas, estimar_longitud_clave, encontrar_repeticiones, AtaqueFrecuencias, \
+    obtener_longitudes_mas_probables, ranking_claves_cesar, estimar_longitud_clave_ic, \
+    estimar_longitud_clave_autocorrelacion, recuperar_clave_vigenere, AtaqueSustitucion
+from ataques_modernos import AtaqueFuerzaBruta, AtaqueDiccionarioReglas, Mascara, TablaArcoiris
 from cifrados import Cifrados
+from dependencias import importar_diferido
+import graficas_nativas
+import perfilado
+import trabajos
+
+# matplotlib (con el backend Agg) solo se carga si se elige dibujar con él
+graficas = importar_diferido("graficas")
+
+# Streamlit vuelve a ejecutar todo el script con cada interacción: los cálculos de la página
+# se memorizan por sus entradas, con un número máximo de resultados y caducidad, y los ataques
+# largos van a un pool en segundo plano (trabajos.py) que reutiliza los resultados repetidos.
+# Los datos estáticos (el diccionario con reglas, las frecuencias del español) se comparten
+# entre todas las sesiones como recursos para que varios usuarios a la vez no multipliquen el coste
+MAX_RESULTADOS_CACHE = 64
+CADUCIDAD_CACHE = "1h"
+
+# Las gráficas nativas (vega-lite) las dibuja el navegador; con matplotlib se envía un PNG
+MODOS_GRAFICAS = ["Nativas", "Imagen (matplotlib)"]
+
+# Cada cuánto consulta la página el progreso de un ataque en segundo plano
+INTERVALO_SONDEO = 0.5
+
+# Etapas medidas (perfilado.py) que enseña el panel de rendimiento de cada página
+MAX_MEDIDAS_PANEL = 30
+
+
+@st.cache_data(max_entries=MAX_RESULTADOS_CACHE, ttl=CADUCIDAD_CACHE, show_spinner=False)
+@perfilado.medir("Frecuencias")
+def _frecuencias(texto):
+    return AtaqueFrecuencias.calcular_frecuencias(texto)
+
+
+@st.cache_data(max_entries=MAX_RESULTADOS_CACHE, ttl=CADUCIDAD_CACHE, show_spinner=False)
+def _png_grafica(nombre, *datos):
+    """PNG de una gráfica de matplotlib: se rasteriza una vez por cada combinación de datos"""
+    with perfilado.medir(f"Figura matplotlib: {nombre}"):
+        fig = getattr(graficas, nombre)(*datos)
+    if fig is None:
+        return None
+    with perfilado.medir(f"PNG: {nombre}"):
+        return graficas.a_png(fig)
+
+
+@st.cache_resource
+def _frecuencias_espanol():
+    """Frecuencias del español de la más a la menos frecuente"""
+    return sorted(AtaqueFrecuencias.FRECUENCIAS_ESPANOL.items(), key=lambda x: x[1], reverse=True)
+
+
+@st.cache_resource(show_spinner="Generando el diccionario con reglas...")
+@perfilado.medir("Diccionario con reglas")
+def _diccionario_reglas(palabras_base):
+    return AtaqueDiccionarioReglas.generar_diccionario_con_reglas(list(palabras_base))
+
+
+@st.cache_resource(show_spinner=False)
+@perfilado.medir("Índice del diccionario")
+def _indice_reglas(palabras_base):
+    return AtaqueDiccionarioReglas.indexar(list(palabras_base))
+
+
+
+@st.cache_resource
+def _gestor_trabajos():
+    """Pool de ataques en segundo plano compartido por todas las sesiones"""
+    return trabajos.GestorTrabajos()
+
+
+def _usuario():
+    """Identificador de la sesión para los trabajos y las medidas de rendimiento"""
+    return st.session_state.setdefault('usuario', uuid.uuid4().hex)
+
+
+def _huella(texto):
+    """Clave corta de un texto para reconocer trabajos repetidos sin guardar el texto"""
+    return hashlib.sha256(texto.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+
+# --- Ataques que se ejecutan como trabajos: reciben el Trabajo para informar del progreso ---
+
+@perfilado.medir("Ataque César (segundo plano)")
+def _trabajo_cesar(trabajo, texto):
+    """Primero el ranking por chi-cuadrado (resultado parcial) y después las 25 claves"""
+    trabajo.progreso(0, 25)
+    ranking = ranking_claves_cesar(texto, top_k=3)
+    trabajo.progreso(0, 25, parcial=ranking)
+    resultados = fuerza_bruta_columnas(texto, progreso=trabajo.informar, cancelacion=trabajo.cancelacion)
+    return resultados, ranking
+
+
+@perfilado.medir("Ataque Kasiski (segundo plano)")
+def _trabajo_kasiski(trabajo, texto, longitud_max):
+    """Repeticiones, estimaciones de longitud y claves recuperadas, etapa a etapa"""
+    analisis = {}
+    trabajo.progreso(0, 5)
+    # La búsqueda de repeticiones es la etapa larga: se puede cancelar a mitad
+    analisis["repeticiones"] = encontrar_repeticiones(texto, longitud_max=longitud_max,
+                                                      cancelacion=trabajo.cancelacion)
+    trabajo.progreso(1, 5, parcial=dict(analisis))
+    analisis["sugerencias"] = estimar_longitud_clave(analisis["repeticiones"]) if analisis["repeticiones"] else []
+    analisis["longitudes_probables"] = (obtener_longitudes_mas_probables(analisis["sugerencias"])
+                                        if analisis["sugerencias"] else [])
+    trabajo.progreso(2, 5, parcial=dict(analisis))
+    analisis["sugerencias_ic"] = estimar_longitud_clave_ic(texto)
+    analisis["longitudes_ic"] = obtener_longitudes_mas_probables(analisis["sugerencias_ic"])
+    trabajo.progreso(3, 5, parcial=dict(analisis))
+    analisis["sugerencias_auto"] = estimar_longitud_clave_autocorrelacion(texto)
+    trabajo.progreso(4, 5, parcial=dict(analisis))
+    analisis["recuperadas"] = recuperar_clave_vigenere(
+        texto, set(analisis["longitudes_probables"]) | set(analisis["longitudes_ic"]))
+    trabajo.progreso(5, 5)
+    return analisis
+
+
+@perfilado.medir("Simulación del ataque con reglas (segundo plano)")
+def _trabajo_reglas(trabajo, objetivo, palabras_base, indice):
+    return AtaqueDiccionarioReglas.simular_ataque(objetivo, palabras_base, indice,
+                                                  progreso=trabajo.informar, cancelacion=trabajo.cancelacion)
+
+
+def lanzar_trabajo(nombre, funcion, *args, clave=None):
+    """
+    Envía un ataque al pool y guarda el id del trabajo en la sesión con el nombre de la página.
+    Devuelve False (y lo avisa) si el usuario ya tiene demasiados ataques en marcha
+    """
+    try:
+        trabajo = _gestor_trabajos().enviar(_usuario(), funcion, *args, clave=clave)
+    except trabajos.LimiteTrabajos as e:
+        st.warning(str(e))
+        return False
+    st.session_state[f'trabajo_{nombre}'] = trabajo.id
+    return True
+
+
+def seguir_trabajo(nombre, al_terminar, mostrar_parcial=None):
+    """
+    Muestra el progreso del trabajo de la página mientras está en marcha. Cuando termina le pasa
+    el resultado a al_terminar (que lo guarda en la sesión) y devuelve True
+    """
+    id_trabajo = st.session_state.get(f'trabajo_{nombre}')
+    trabajo = _gestor_trabajos().obtener(id_trabajo) if id_trabajo else None
+    if trabajo is None:
+        st.session_state.pop(f'trabajo_{nombre}', None)
+        return False
+    if trabajo.activo:
+        _panel_trabajo(nombre, mostrar_parcial)
+        return False
+
+    del st.session_state[f'trabajo_{nombre}']
+    if trabajo.estado == "terminado":
+        al_terminar(trabajo.resultado)
+        return True
+    if trabajo.estado == "error":
+        st.error(f"El ataque falló: {trabajo.error}")
+    else:
+        st.info("Ataque cancelado.")
+    return False
+
+
+@st.fragment(run_every=INTERVALO_SONDEO)
+def _panel_trabajo(nombre, mostrar_parcial):
+    """Se vuelve a ejecutar solo (sin el resto de la página) hasta que el trabajo termina"""
+    trabajo = _gestor_trabajos().obtener(st.session_state.get(f'trabajo_{nombre}'))
+    if trabajo is None or not trabajo.activo:
+        st.rerun()  # La página completa recoge el resultado
+    texto = "En cola..." if trabajo.estado == "pendiente" else \
+        f"Atacando... {trabajo.hechos} de {trabajo.total or '?'} ({trabajo.segundos:.1f} s)"
+    if trabajo.por_segundo:
+        texto += f" · {trabajo.por_segundo:,.0f} por segundo"
+    st.progress(trabajo.fraccion, text=texto)
+    if st.button("Cancelar", key=f"cancelar_{nombre}"):
+        trabajo.cancelar()
+    if trabajo.parcial is not None and mostrar_parcial is not None:
+        mostrar_parcial(trabajo.parcial)
 
 st.set_page_config(
     page_title="Simulador de Ataques Criptográficos",
@@ -14,6 +191,47 @@ st.set_page_config(
     layout="wide"
 )
 
+def mostrar_grafica(nombre, *datos):
+    """
+    Dibuja la gráfica `nombre` (una función con ese nombre en graficas_nativas y en graficas)
+    en el modo elegido en la barra lateral. Devuelve False si no se pudo generar
+    """
+    with perfilado.medir(f"Gráfica: {nombre}"):
+        if st.session_state.get('modo_graficas', MODOS_GRAFICAS[0]) == MODOS_GRAFICAS[0]:
+            datos_grafica, especificacion = getattr(graficas_nativas, nombre)(*datos)
+            st.vega_lite_chart(datos_grafica, especificacion, width="stretch")
+            return True
+        png = _png_grafica(nombre, *datos)
+        if png is None:
+            return False
+        st.image(png, width="stretch")
+        return True
+
+
+def mostrar_rendimiento():
+    """Panel plegable con las últimas etapas medidas en esta sesión, de la más reciente a la más antigua"""
+    with st.expander("Rendimiento"):
+        medidas = perfilado.medidas(_usuario(), ultimas=MAX_MEDIDAS_PANEL)
+        if not medidas:
+            st.caption("Todavía no hay medidas en esta sesión.")
+            return
+        filas = [{
+            "Etapa": m.etapa,
+            "Real (ms)": m.segundos * 1000,
+            "CPU (ms)": m.cpu * 1000,
+            "Asignada (KB)": m.asignada / 1024 if m.asignada is not None else None,
+            "Pico (KB)": m.pico / 1024 if m.pico is not None else None,
+            "Dónde": "Segundo plano" if m.hilo.startswith("trabajo") else "Página",
+            "Hora": time.strftime("%H:%M:%S", time.localtime(m.inicio)),
+        } for m in reversed(medidas)]
+        st.dataframe(pd.DataFrame(filas), width="stretch", hide_index=True,
+                     column_config={c: st.column_config.NumberColumn(format="%.1f")
+                                    for c in ["Real (ms)", "CPU (ms)", "Asignada (KB)", "Pico (KB)"]})
+        st.caption("El tiempo de CPU es el del hilo que ejecuta la etapa. La memoria solo se mide "
+                   "arrancando con SIMULADOR_PERFIL=tracemalloc, que además guarda un snapshot por "
+                   "ejecución; con SIMULADOR_PERFIL=cprofile se guarda un perfil .pstats.")
+
+
 def main():
     st.title("Simulador de Ataques Criptográficos")
     st.markdown(
@@ -28,6 +246,13 @@ def main():
         "Selecciona un ataque:",
         ["Inicio", "Ataque a César", "Análisis de Frecuencias", "Ataque Kasiski", "Ataque por fuerza bruta", "Ataque diccionario con reglas"]
     )
+    st.sidebar.radio(
+        "Gráficas:",
+        MODOS_GRAFICAS,
+        key="modo_graficas",
+        horizontal=True,
+        help="Las nativas las dibuja el navegador; las de matplotlib se generan como imagen en el servidor"
+    )
 
     st.sidebar.markdown("---")
     st.sidebar.markdown("""
@@ -39,18 +264,22 @@ def main():
     - <a href="https://es.wikipedia.org/wiki/Ataque_de_diccionario" target="_blank">Ataque de diccionario</a>
     """, unsafe_allow_html=True)
 
-    if opcion == "Inicio":
-        mostrar_inicio()
-    elif opcion == "Ataque a César":
-        mostrar_ataque_cesar()
-    elif opcion == "Análisis de Frecuencias":
-        mostrar_analisis_frecuencias()
-    elif opcion == "Ataque Kasiski":
-        mostrar_ataque_kasiski()
-    elif opcion == "Ataque por fuerza bruta":
-        mostrar_ataque_fuerza_bruta()
-    elif opcion == "Ataque diccionario con reglas":
-        mostrar_ataque_diccionario_reglas()
+    # Toda la página cuenta como una etapa y las suyas se ven después en el panel de rendimiento
+    with perfilado.peticion(f"Página: {opcion}", sesion=_usuario()):
+        if opcion == "Inicio":
+            mostrar_inicio()
+        elif opcion == "Ataque a César":
+            mostrar_ataque_cesar()
+        elif opcion == "Análisis de Frecuencias":
+            mostrar_analisis_frecuencias()
+        elif opcion == "Ataque Kasiski":
+            mostrar_ataque_kasiski()
+        elif opcion == "Ataque por fuerza bruta":
+            mostrar_ataque_fuerza_bruta()
+        elif opcion == "Ataque diccionario con reglas":
+            mostrar_ataque_diccionario_reglas()
+    st.markdown("---")
+    mostrar_rendimiento()
 
 def mostrar_inicio():
     st.header("Bienvenido al Simulador")
@@ -101,6 +330,16 @@ def mostrar_inicio():
     """)
 
 
+def _guardar_cesar(resultado):
+    st.session_state['resultados_cesar'], st.session_state['ranking_cesar'] = resultado
+    st.session_state['ataque_ejecutado'] = True
+
+
+def _mostrar_parcial_cesar(ranking):
+    st.markdown("### Claves más probables (probando aún las 25)")
+    st.dataframe(pd.DataFrame(ranking), use_container_width=True, hide_index=True)
+
+
 def mostrar_ataque_cesar():
     st.header("Ataque de Fuerza Bruta a César")
 
@@ -154,12 +393,10 @@ def mostrar_ataque_cesar():
             texto_para_ataque = Cifrados.cifrado_cesar(texto_entrada, clave_cifrado)
 
         if st.button("Ejecutar ataque", type="primary"):
-            with st.spinner("Atacando el cifrado..."):
-                time.sleep(1)  # Simular procesamiento
-                resultados = fuerza_bruta(texto_para_ataque)
-
-                st.session_state['resultados_cesar'] = resultados
-                st.session_state['ataque_ejecutado'] = True
+            if lanzar_trabajo('cesar', _trabajo_cesar, texto_para_ataque,
+                              clave=("cesar", _huella(texto_para_ataque))):
+                # Los resultados llegan cuando termina el trabajo
+                st.session_state['ataque_ejecutado'] = False
                 st.session_state['texto_original'] = texto_entrada
                 st.session_state['texto_cifrado'] = texto_para_ataque
                 st.session_state['aplico_cifrado'] = aplicar_cesar
@@ -169,6 +406,8 @@ def mostrar_ataque_cesar():
                     del st.session_state['clave_usada']
 
     with col2:
+        seguir_trabajo('cesar', _guardar_cesar, _mostrar_parcial_cesar)
+
         # MOSTRAR EL TEXTO CIFRADO SI SE APLICÓ
         if 'texto_cifrado' in st.session_state and st.session_state['aplico_cifrado']:
             st.markdown("### Texto cifrado generado")
@@ -182,8 +421,9 @@ def mostrar_ataque_cesar():
         if 'ataque_ejecutado' in st.session_state and st.session_state['ataque_ejecutado']:
             resultados = st.session_state['resultados_cesar']
 
-            # Convertir a DataFrame para mejor visualización
-            df = pd.DataFrame(resultados)
+            # Convertir a DataFrame para mejor visualización (columnas, sin un dict por fila)
+            with perfilado.medir("Tabla de las 25 claves"):
+                df = pd.DataFrame(resultados)
 
             # Mostrar tabla con estilo
             st.markdown("### Resultados del ataque (25 claves probadas)")
@@ -220,6 +460,17 @@ def mostrar_ataque_cesar():
             else:
                 st.info("Dado que no se conoce el texto correcto, comprueba cuál tiene más sentido.")
 
+            # Claves ordenadas por parecido con las frecuencias del español
+            ranking = st.session_state.get('ranking_cesar', [])
+            if ranking:
+                st.markdown("### Claves más probables (chi-cuadrado)")
+                st.caption("Cuanto menor es χ², más se parecen las frecuencias del texto a las del español.")
+                st.dataframe(
+                    pd.DataFrame(ranking),
+                    use_container_width=True,
+                    hide_index=True
+                )
+
 
 def mostrar_analisis_frecuencias():
     st.header("Análisis de Frecuencias")
@@ -252,18 +503,28 @@ def mostrar_analisis_frecuencias():
             with st.spinner("Calculando frecuencias..."):
                 st.session_state['frec_analizado'] = texto_cifrado
 
+        st.markdown("""
+        ### Ataque automático
+        Busca la clave completa puntuando cada candidata con estadísticas
+        de grupos de cuatro letras del español. Necesita textos de varias frases.
+        """)
+        tiempo_max = st.slider("Tiempo máximo de búsqueda (s):", 1, 30, 10)
+
+        if st.button("Romper sustitución"):
+            with st.spinner("Buscando la clave..."), perfilado.medir("Ataque a la sustitución"):
+                st.session_state['sustitucion_resuelta'] = AtaqueSustitucion.resolver(
+                    texto_cifrado, tiempo_max=tiempo_max)
+
     with col2:
         if 'frec_analizado' in st.session_state:
             texto = st.session_state['frec_analizado']
 
             # Calcular frecuencias
-            frecuencias = AtaqueFrecuencias.calcular_frecuencias(texto)
+            frecuencias = _frecuencias(texto)
 
             # Mostrar visualización
             st.markdown("### Comparativa de frecuencias")
-            fig = AtaqueFrecuencias.visualizar(texto)
-            st.pyplot(fig)
-            plt.close()
+            mostrar_grafica("frecuencias", frecuencias, AtaqueFrecuencias.FRECUENCIAS_ESPANOL)
 
             # Mostrar tabla de frecuencias
             st.markdown("### Frecuencias detalladas")
@@ -280,11 +541,7 @@ def mostrar_analisis_frecuencias():
 
             with col_b:
                 st.markdown("**En español (estándar):**")
-                frec_esp = sorted(
-                    AtaqueFrecuencias.FRECUENCIAS_ESPANOL.items(),
-                    key=lambda x: x[1],
-                    reverse=True
-                )[:10]
+                frec_esp = _frecuencias_espanol()[:10]
                 df_esp = pd.DataFrame(frec_esp, columns=['Letra', 'Frecuencia (%)'])
                 st.dataframe(df_esp, hide_index=True, use_container_width=True)
 
@@ -292,11 +549,7 @@ def mostrar_analisis_frecuencias():
             st.markdown("### Hipótesis de sustitución")
 
             letras_cifrado = list(frecuencias.keys())
-            letras_espanol = list(dict(sorted(
-                AtaqueFrecuencias.FRECUENCIAS_ESPANOL.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )).keys())
+            letras_espanol = [letra for letra, _ in _frecuencias_espanol()]
 
             hipotesis = []
             for i in range(min(5, len(letras_cifrado), len(letras_espanol))):
@@ -308,6 +561,30 @@ def mostrar_analisis_frecuencias():
             df_hip = pd.DataFrame(hipotesis)
             st.dataframe(df_hip, hide_index=True, use_container_width=True)
 
+        if st.session_state.get('sustitucion_resuelta'):
+            resultado = st.session_state['sustitucion_resuelta']
+
+            st.markdown("### Clave encontrada automáticamente")
+            st.text(f"Texto descifrado: {resultado['texto_descifrado'][:500]}")
+            st.dataframe(
+                pd.DataFrame(sorted(resultado['clave'].items()), columns=['Letra original', 'Letra cifrada']).T,
+                use_container_width=True
+            )
+            st.caption(f"{resultado['reinicios']} reinicios en {resultado['tiempo']} s · "
+                       f"puntuación media por letra {resultado['puntuacion']}")
+
+
+def _guardar_kasiski(analisis):
+    st.session_state['analisis_kasiski'] = analisis
+
+
+def _mostrar_parcial_kasiski(analisis):
+    st.caption(f"{len(analisis['repeticiones'])} secuencias repetidas encontradas")
+    if analisis.get('longitudes_probables'):
+        st.success(f"**Según Kasiski: {', '.join(map(str, analisis['longitudes_probables']))}**")
+    if analisis.get('longitudes_ic'):
+        st.success(f"**Según el IC: {', '.join(map(str, analisis['longitudes_ic']))}**")
+
 
 def mostrar_ataque_kasiski():
     st.header("Ataque de Kasiski a Vigenère")
@@ -347,27 +624,35 @@ def mostrar_ataque_kasiski():
         if aplicar_vigenere:
             clave_vigenere = st.text_input("Clave para cifrar:", value="clave")
 
+        longitud_max = st.slider("Longitud máxima de las secuencias:", 3, 10, 5)
+
         if st.button("Analizar con Kasiski", type="primary"):
-            with st.spinner("Analizando repeticiones..."):
-                # Aplicar Vigenère si se seleccionó
-                if aplicar_vigenere and clave_vigenere:
-                    texto_para_analizar = Cifrados.cifrado_vigenere(texto_cifrado_con_clave, clave_vigenere)
-                    st.info(f"Texto cifrado con clave '{clave_vigenere}' (longitud {len(clave_vigenere)})")
-                else:
-                    texto_para_analizar = texto_cifrado_con_clave
+            # Aplicar Vigenère si se seleccionó
+            if aplicar_vigenere and clave_vigenere:
+                texto_para_analizar = Cifrados.cifrado_vigenere(texto_cifrado_con_clave, clave_vigenere)
+                st.info(f"Texto cifrado con clave '{clave_vigenere}' (longitud {len(clave_vigenere)})")
+            else:
+                texto_para_analizar = texto_cifrado_con_clave
 
+            if lanzar_trabajo('kasiski', _trabajo_kasiski, texto_para_analizar, longitud_max,
+                              clave=("kasiski", _huella(texto_para_analizar), longitud_max)):
+                st.session_state.pop('analisis_kasiski', None)
                 st.session_state['texto_kasiski'] = texto_para_analizar
+                st.session_state['longitud_max_kasiski'] = longitud_max
                 st.session_state['clave_usada'] = clave_vigenere if aplicar_vigenere else "desconocida"
 
     with col2:
-        if 'texto_kasiski' in st.session_state:
+        seguir_trabajo('kasiski', _guardar_kasiski, _mostrar_parcial_kasiski)
+
+        if 'analisis_kasiski' in st.session_state:
             texto = st.session_state['texto_kasiski']
 
             st.markdown("### Análisis de repeticiones")
             st.text(f"Texto a analizar: {texto[:100]}...")
 
-            # Encontrar repeticiones
-            repeticiones = encontrar_repeticiones(texto)
+            # Repeticiones (y el resto del análisis) calculadas por el trabajo en segundo plano
+            analisis = st.session_state['analisis_kasiski']
+            repeticiones = analisis['repeticiones']
 
             if repeticiones:
                 # Mostrar repeticiones encontradas
@@ -380,11 +665,12 @@ def mostrar_ataque_kasiski():
                     })
 
                 st.markdown("#### Secuencias repetidas:")
-                df_rep = pd.DataFrame(datos_rep)
+                with perfilado.medir("Tabla de repeticiones"):
+                    df_rep = pd.DataFrame(datos_rep)
                 st.dataframe(df_rep, hide_index=True, use_container_width=True)
 
                 # Estimar longitud de clave
-                sugerencias = estimar_longitud_clave(repeticiones)
+                sugerencias = analisis['sugerencias']
 
                 if sugerencias:
                     st.markdown("#### Estimación de longitud de clave:")
@@ -395,17 +681,9 @@ def mostrar_ataque_kasiski():
                     )
 
                     # Crear gráfico de barras
-                    fig, ax = plt.subplots(figsize=(10, 4))
-                    ax.bar(df_sug['Longitud'].astype(str), df_sug['Frecuencia'],
-                           color='lightgreen', edgecolor='darkgreen')
-                    ax.set_xlabel('Longitud de clave')
-                    ax.set_ylabel('Frecuencia')
-                    ax.set_title('Posibles longitudes de clave')
-                    ax.grid(axis='y', alpha=0.3)
-                    st.pyplot(fig)
-                    plt.close()
-
-                    longitudes_probables = obtener_longitudes_mas_probables(sugerencias)
+                    mostrar_grafica("longitudes_clave", df_sug['Longitud'].tolist(), df_sug['Frecuencia'].tolist())
+
+                    longitudes_probables = analisis['longitudes_probables']
 
                     if longitudes_probables:
                         longitudes_str = ", ".join(map(str, longitudes_probables))
@@ -423,6 +701,41 @@ def mostrar_ataque_kasiski():
             else:
                 st.warning("No se encontraron secuencias repetidas significativas.")
 
+            # Estimaciones estadísticas: no dependen de que haya trigramas repetidos
+            st.markdown("#### Estimación por índice de coincidencia y autocorrelación:")
+            st.caption("Funcionan mejor con textos largos (varios cientos de letras).")
+
+            sugerencias_ic = analisis['sugerencias_ic']
+            sugerencias_auto = analisis['sugerencias_auto']
+
+            col_ic, col_auto = st.columns(2)
+            with col_ic:
+                st.dataframe(pd.DataFrame(sugerencias_ic[:5], columns=['Longitud', 'IC medio (%)']),
+                             hide_index=True, use_container_width=True)
+                longitudes_ic = analisis['longitudes_ic']
+                if longitudes_ic:
+                    st.success(f"**Según el IC: {', '.join(map(str, longitudes_ic))}**")
+            with col_auto:
+                st.dataframe(pd.DataFrame(sugerencias_auto[:5], columns=['Desplazamiento', 'Coincidencias (%)']),
+                             hide_index=True, use_container_width=True)
+                longitudes_auto = obtener_longitudes_mas_probables(sugerencias_auto)
+                if longitudes_auto:
+                    st.success(f"**Según la autocorrelación: {', '.join(map(str, longitudes_auto))}**")
+
+            # Clave recuperada con cada longitud candidata
+            recuperadas = analisis['recuperadas']
+            if recuperadas:
+                st.markdown("#### Recuperación de la clave:")
+                mejor = recuperadas[0]
+                st.success(f"**Clave más probable: '{mejor['Clave']}'** (longitud {mejor['Longitud']})")
+                st.text(f"Texto descifrado: {mejor['Texto descifrado'][:300]}")
+                st.dataframe(
+                    pd.DataFrame(recuperadas)[['Longitud', 'Clave', 'Chi²', 'Tiempo clave (ms)',
+                                               'Tiempo descifrado (ms)']],
+                    hide_index=True,
+                    use_container_width=True
+                )
+
 
 def mostrar_ataque_fuerza_bruta():
     st.header("Ataque Moderno: Fuerza Bruta a Hashes")
@@ -451,7 +764,9 @@ def mostrar_ataque_fuerza_bruta():
             "Selecciona el tipo de análisis:",
             ["Analizar seguridad de una contraseña",
              "Comparar tiempos de ataque",
-             "Ver diccionario de contraseñas comunes"],
+             "Ver diccionario de contraseñas comunes",
+             "Crackear hashes",
+             "Tabla arcoíris"],
             key="tipo_ataque_selector"  # Añadir key para identificarlo
         )
 
@@ -460,7 +775,7 @@ def mostrar_ataque_fuerza_bruta():
             st.session_state['tipo_anterior'] = tipo
         elif st.session_state['tipo_anterior'] != tipo:
             # Si cambió el tipo, limpiar los estados
-            keys_to_clear = ['analisis_contraseña', 'contraseña_analizada', 'tiempo_calculado']
+            keys_to_clear = ['analisis_contraseña', 'contraseña_analizada', 'tiempo_calculado', 'crackeo', 'arcoiris']
             for key in keys_to_clear:
                 if key in st.session_state:
                     del st.session_state[key]
@@ -474,7 +789,8 @@ def mostrar_ataque_fuerza_bruta():
             )
 
             if st.button("Analizar seguridad", type="primary"):
-                with st.spinner("Analizando..."):
+                with st.spinner("Analizando (la primera vez se mide la velocidad de este equipo)..."), \
+                        perfilado.medir("Análisis de la contraseña"):
                     analisis = AtaqueFuerzaBruta.analizar_seguridad_contraseña(contraseña)
                     st.session_state['analisis_contraseña'] = analisis
                     st.session_state['contraseña_analizada'] = contraseña
@@ -499,13 +815,15 @@ def mostrar_ataque_fuerza_bruta():
 
             with col_b:
                 simbolos = st.checkbox("Incluye símbolos", False)
+                with st.spinner("Midiendo la velocidad de este equipo..."):
+                    escenarios = AtaqueFuerzaBruta.velocidades_escenarios()
                 escenario = st.selectbox(
                     "Poder del atacante:",
-                    ["PC doméstico", "GPU dedicada", "Botnet/Cloud"]
+                    list(escenarios.keys())
                 )
 
             if st.button("Calcular tiempos", type="primary"):
-                velocidad = AtaqueFuerzaBruta.VELOCIDADES[escenario]
+                velocidad = escenarios[escenario]
                 tiempo_str, segundos = AtaqueFuerzaBruta.calcular_tiempo_estimado(
                     longitud, mayus, numeros, simbolos, velocidad
                 )
@@ -515,6 +833,7 @@ def mostrar_ataque_fuerza_bruta():
                     "segundos": segundos,
                     "longitud": longitud,
                     "escenario": escenario,
+                    "velocidad": velocidad,
                     "mayus": mayus,
                     "numeros": numeros,
                     "simbolos": simbolos
@@ -523,6 +842,101 @@ def mostrar_ataque_fuerza_bruta():
                 if 'analisis_contraseña' in st.session_state:
                     del st.session_state['analisis_contraseña']
 
+        elif tipo == "Crackear hashes":
+            st.markdown("""
+            ### Crackeo de hashes
+            Prueba candidatos de un diccionario, con reglas o de una máscara
+            (`?l` minúsculas, `?u` mayúsculas, `?d` dígitos, `?s` símbolos)
+            contra una lista de hashes, midiendo la velocidad real de este equipo.
+            """)
+
+            metodo = st.selectbox("Algoritmo:", list(AtaqueFuerzaBruta.ALGORITMOS.keys()))
+            ejemplo = "\n".join(AtaqueFuerzaBruta.hash_password(p, metodo) for p in ["hola123", "admin!", "4321"])
+            hashes_texto = st.text_area("Hashes objetivo (uno por línea):", value=ejemplo, height=100)
+
+            fuente = st.radio("Candidatos:", ["Diccionario común", "Diccionario con reglas", "Máscara",
+                                              "Índice precalculado"],
+                              help="El índice guarda los hashes del diccionario con reglas, ordenados en disco")
+            mascara = "?d?d?d?d"
+            inicio = 0
+            if fuente == "Máscara":
+                mascara = st.text_input("Máscara:", value=mascara)
+                inicio = st.number_input("Reanudar desde el índice:", min_value=0, value=0, step=1,
+                                         help="Índice de la máscara donde terminó un ataque anterior")
+
+            if st.button("Crackear", type="primary"):
+                diccionario = AtaqueFuerzaBruta.generar_diccionario_comun()
+                try:
+                    if fuente == "Diccionario común":
+                        candidatos = AtaqueFuerzaBruta.candidatos_diccionario(diccionario)
+                    elif fuente == "Diccionario con reglas":
+                        candidatos = AtaqueFuerzaBruta.candidatos_reglas(diccionario + ["admin", "hola"])
+                    elif fuente == "Máscara":
+                        candidatos = Mascara(mascara)
+
+                    with st.spinner("Crackeando..."), perfilado.medir(f"Crackeo: {fuente}"):
+                        hashes = [h for h in hashes_texto.splitlines() if h.strip()]
+                        if fuente == "Índice precalculado":
+                            st.session_state['crackeo'] = AtaqueFuerzaBruta.buscar_en_indice(hashes, metodo)
+                        else:
+                            st.session_state['crackeo'] = AtaqueFuerzaBruta.crackear(hashes, candidatos, metodo,
+                                                                                     inicio=int(inicio))
+                        st.session_state['crackeo']['objetivos'] = len(hashes)
+                except ValueError as e:
+                    st.error(f"Entrada no válida: {e}")
+
+        elif tipo == "Tabla arcoíris":
+            st.markdown("""
+            ### Tabla arcoíris
+            Compromiso tiempo-memoria: se precalculan cadenas de hashes y reducciones y solo se
+            guardan sus extremos. Después, invertir un hash cuesta unos pocos miles de hashes
+            en lugar de recorrer todo el espacio.
+            """)
+
+            col_a, col_b = st.columns(2)
+            with col_a:
+                metodo = st.selectbox("Algoritmo:", ["md5", "sha1"], key="metodo_arcoiris")
+                longitud_min, longitud_max = st.slider("Longitud de las contraseñas:", 1, 6, (1, 4))
+                mayus = st.checkbox("Incluye mayúsculas", False, key="mayus_arcoiris")
+                numeros = st.checkbox("Incluye números", False, key="numeros_arcoiris")
+                simbolos = st.checkbox("Incluye símbolos", False, key="simbolos_arcoiris")
+            with col_b:
+                longitud_cadena = st.slider("Longitud de cada cadena:", 10, 1000, 100, step=10)
+                num_cadenas = st.number_input("Número de cadenas:", min_value=100, max_value=1_000_000,
+                                              value=15_000, step=1_000)
+                reduccion = st.selectbox("Función de reducción:", TablaArcoiris.REDUCCIONES)
+
+            if st.button("Generar tabla", type="primary"):
+                caracteres = AtaqueFuerzaBruta.conjunto_caracteres(mayus, numeros, simbolos)
+                try:
+                    tabla = TablaArcoiris(metodo, caracteres, longitud_min, longitud_max,
+                                          longitud_cadena, reduccion)
+                except ValueError as e:
+                    st.error(f"Configuración no válida: {e}")
+                else:
+                    with st.spinner("Generando cadenas..."), perfilado.medir("Tabla arcoíris"):
+                        tabla.generar(int(num_cadenas))
+
+                    # Cobertura y latencia con contraseñas al azar del mismo espacio
+                    with st.spinner("Probando búsquedas..."):
+                        algoritmo = AtaqueFuerzaBruta.ALGORITMOS[metodo]
+                        muestras = [tabla.texto(random.randrange(tabla.espacio)) for _ in range(20)]
+                        inicio = time.perf_counter()
+                        encontradas = [tabla.buscar(algoritmo(m).hexdigest()) for m in muestras]
+                        latencia = (time.perf_counter() - inicio) / len(muestras)
+
+                    velocidad = AtaqueFuerzaBruta.velocidades_escenarios(metodo)["Este equipo (1 núcleo)"]
+                    st.session_state['arcoiris'] = {
+                        "espacio": tabla.espacio,
+                        "cadenas": len(tabla.finales),
+                        "estadisticas": tabla.estadisticas,
+                        "tamaño": tabla.tamaño_bytes,
+                        "latencia": latencia,
+                        "cobertura": sum(e is not None for e in encontradas) / len(muestras),
+                        "velocidad": velocidad,
+                        "ejemplos": [(m.decode("latin-1"), e) for m, e in zip(muestras, encontradas)][:5],
+                    }
+
         else:  # Ver diccionario
             st.markdown("### Diccionario de contraseñas comunes")
             diccionario = AtaqueFuerzaBruta.generar_diccionario_comun()
@@ -534,7 +948,7 @@ def mostrar_ataque_fuerza_bruta():
 
             st.markdown(f"**Total:** {len(diccionario)} contraseñas comunes")
             # Limpiar estados al ver diccionario
-            keys_to_clear = ['analisis_contraseña', 'contraseña_analizada', 'tiempo_calculado']
+            keys_to_clear = ['analisis_contraseña', 'contraseña_analizada', 'tiempo_calculado', 'crackeo', 'arcoiris']
             for key in keys_to_clear:
                 if key in st.session_state:
                     del st.session_state[key]
@@ -571,17 +985,85 @@ def mostrar_ataque_fuerza_bruta():
 
             # Intentar visualizar, pero manejar error
             try:
-                fig = AtaqueFuerzaBruta.visualizar_comparativa_tiempos(analisis)
-                if fig is not None:
-                    st.pyplot(fig)
-                    plt.close(fig)
-                else:
+                if not mostrar_grafica("comparativa_tiempos", analisis):
                     st.info("No se pudo generar la gráfica, pero se muestran los datos.")
             except Exception as e:
                 st.info("Visualización gráfica no disponible, mostrando solo datos numéricos.")
                 # Opcional: log del error para debugging
                 print(f"Error en visualización: {e}")
 
+        elif 'crackeo' in st.session_state:
+            crackeo = st.session_state['crackeo']
+
+            st.markdown("### Resultado del crackeo")
+            st.metric("Hashes rotos", f"{len(crackeo['encontradas'])} / {crackeo['objetivos']}")
+
+            if crackeo['encontradas']:
+                st.dataframe(
+                    pd.DataFrame(list(crackeo['encontradas'].items()), columns=['Hash', 'Contraseña']),
+                    hide_index=True,
+                    use_container_width=True
+                )
+
+            col_x, col_y = st.columns(2)
+            with col_x:
+                st.metric("Candidatos probados", f"{crackeo['intentos']:,}")
+                st.metric("Tiempo", f"{crackeo['segundos']:.2f} s")
+            with col_y:
+                st.metric("Velocidad medida", f"{crackeo['hashes_por_segundo']:,.0f} hashes/s")
+                st.metric("Procesos", crackeo['procesos'])
+
+            if 'indice_siguiente' in crackeo:
+                st.caption(
+                    f"Espacio de la máscara: {crackeo['espacio']:,} candidatos. "
+                    f"Para continuar el ataque, reanuda desde el índice {crackeo['indice_siguiente']}."
+                )
+            if 'tamaño_indice' in crackeo:
+                st.caption(
+                    f"Búsqueda binaria en un índice de {crackeo['tamaño_indice']:,} hashes precalculados: "
+                    f"cada hash cuesta unas pocas lecturas del fichero en lugar de probar candidatos."
+                )
+            else:
+                st.caption(
+                    f"La tabla fija de escenarios supone {AtaqueFuerzaBruta.VELOCIDADES['PC doméstico']:,} intentos/s "
+                    f"para un PC doméstico; este equipo ha medido {crackeo['hashes_por_segundo']:,.0f}."
+                )
+
+        elif 'arcoiris' in st.session_state:
+            arcoiris = st.session_state['arcoiris']
+            estadisticas = arcoiris['estadisticas']
+
+            st.markdown("### Tabla arcoíris frente a fuerza bruta")
+            st.metric("Espacio de contraseñas", f"{arcoiris['espacio']:,}")
+            st.dataframe(pd.DataFrame([
+                {
+                    "Método": "Tabla arcoíris",
+                    "Precálculo (hashes)": f"{estadisticas['hashes_calculados']:,}",
+                    "Precálculo (s)": f"{estadisticas['segundos']:.2f}",
+                    "Tamaño": f"{arcoiris['tamaño'] / 1024:,.1f} KB",
+                    "Tiempo por hash (s)": f"{arcoiris['latencia']:.4f}",
+                    "Éxito": f"{arcoiris['cobertura']:.0%}",
+                },
+                {
+                    "Método": "Fuerza bruta",
+                    "Precálculo (hashes)": "0",
+                    "Precálculo (s)": "0.00",
+                    "Tamaño": "0.0 KB",
+                    # En promedio se recorre la mitad del espacio
+                    "Tiempo por hash (s)": f"{arcoiris['espacio'] / 2 / arcoiris['velocidad']:.4f}",
+                    "Éxito": "100%",
+                },
+            ]), hide_index=True, use_container_width=True)
+
+            st.caption(
+                f"{arcoiris['cadenas']:,} cadenas guardadas ({estadisticas['cadenas_fusionadas']:,} fusionadas y "
+                f"descartadas), generadas con {estadisticas['procesos']} procesos. La fuerza bruta usa la "
+                f"velocidad medida de un núcleo: {arcoiris['velocidad']:,.0f} hashes/s."
+            )
+            st.markdown("**Ejemplos de búsqueda:**")
+            for contraseña, encontrada in arcoiris['ejemplos']:
+                st.markdown(f"- `{contraseña}` → {'`' + encontrada + '`' if encontrada else 'no está en la tabla'}")
+
         elif 'tiempo_calculado' in st.session_state:
             calc = st.session_state['tiempo_calculado']
 
@@ -598,13 +1080,11 @@ def mostrar_ataque_fuerza_bruta():
                 - **Números:** {'✅' if calc.get('numeros', True) else '❌'}
                 - **Símbolos:** {'✅' if calc.get('simbolos', False) else '❌'}
                 - **Escenario:** {calc['escenario']} 
-                - **Velocidad:** {AtaqueFuerzaBruta.VELOCIDADES[calc['escenario']]:.0e} intentos/s
+                - **Velocidad:** {calc['velocidad']:.1e} intentos/s
                 """)
 
             # Intentar generar gráfico explicativo
             try:
-                fig, ax = plt.subplots(figsize=(10, 5))
-
                 # Calcular tiempos para diferentes longitudes
                 longitudes = range(4, 17)
                 tiempos = []
@@ -614,35 +1094,21 @@ def mostrar_ataque_fuerza_bruta():
                         calc.get('mayus', True),
                         calc.get('numeros', True),
                         calc.get('simbolos', False),
-                        AtaqueFuerzaBruta.VELOCIDADES[calc['escenario']]
+                        calc['velocidad']
                     )
                     tiempos.append(seg)
 
-                ax.plot(longitudes, tiempos, 'b-o', linewidth=2, markersize=6, label='Tiempo estimado')
-                ax.axvline(x=calc['longitud'], color='red', linestyle='--', alpha=0.7, linewidth=2,
-                           label=f'Tu contraseña ({calc["longitud"]} chars)')
-                ax.set_yscale('log')
-                ax.set_xlabel('Longitud de la contraseña', fontsize=12)
-                ax.set_ylabel('Tiempo (segundos, escala logarítmica)', fontsize=12)
-                ax.set_title('⏰ Crecimiento exponencial del tiempo con la longitud', fontsize=14, fontweight='bold')
-                ax.grid(True, alpha=0.3)
-                ax.legend()
-
-                # Añadir anotaciones para puntos clave
-                for i, (l, t) in enumerate(zip(longitudes, tiempos)):
-                    if l in [8, 12, 16]:  # Solo anotar algunas longitudes
-                        ax.annotate(f'{t:.0e}s', (l, t), textcoords="offset points",
-                                    xytext=(0, 10), ha='center', fontsize=8)
-
-                plt.tight_layout()
-                st.pyplot(fig)
-                plt.close(fig)
+                mostrar_grafica("crecimiento_tiempo", list(longitudes), tiempos, calc['longitud'])
 
             except Exception as e:
                 st.info("ℹ️ No se pudo generar la gráfica comparativa, mostrando solo el resultado numérico.")
                 print(f"Error en gráfico comparativo: {e}")
 
 
+def _guardar_reglas(resultado):
+    st.session_state['resultado_reglas'] = resultado
+
+
 def mostrar_ataque_diccionario_reglas():
     st.header("Ataque Moderno: Diccionario con Reglas")
 
@@ -718,14 +1184,12 @@ def mostrar_ataque_diccionario_reglas():
                 )
 
             if st.button("Simular ataque", type="primary"):
-                with st.spinner("Aplicando reglas y buscando..."):
-                    resultado = AtaqueDiccionarioReglas.simular_ataque(objetivo, palabras_base)
-
-                    # Generar estadísticas
-                    dicc_completo, reglas_aplicadas = AtaqueDiccionarioReglas.generar_diccionario_con_reglas(
-                        palabras_base)
-
-                    st.session_state['resultado_reglas'] = resultado
+                # El diccionario y su índice se comparten entre sesiones; el ataque va al pool
+                dicc_completo, reglas_aplicadas = _diccionario_reglas(tuple(palabras_base))
+                indice = _indice_reglas(tuple(palabras_base))
+                if lanzar_trabajo('reglas', _trabajo_reglas, objetivo, palabras_base, indice,
+                                  clave=("reglas", objetivo, tuple(palabras_base))):
+                    st.session_state.pop('resultado_reglas', None)
                     st.session_state['dicc_completo'] = dicc_completo
                     st.session_state['reglas_aplicadas'] = reglas_aplicadas
                     st.session_state['objetivo'] = objetivo
@@ -736,6 +1200,8 @@ def mostrar_ataque_diccionario_reglas():
                             del st.session_state[key]
 
     with col2:
+        seguir_trabajo('reglas', _guardar_reglas)
+
         if 'variaciones' in st.session_state:
             st.markdown(f"### Variaciones de '{st.session_state['palabra_base']}'")
 
@@ -750,17 +1216,8 @@ def mostrar_ataque_diccionario_reglas():
 
             # Explicación de reglas
             with st.expander("Ver reglas aplicadas"):
-                st.markdown("""
-                **Reglas comunes:**
-                - Palabra original
-                - Capitalizar primera letra
-                - TODO MAYÚSCULAS
-                - Añadir números (123, 2024, etc.)
-                - Duplicar palabra
-                - Invertir palabra
-                - Leet speak (a→4, e→3, i→1, o→0, s→5)
-                - Añadir símbolos (!, @, #, etc.)
-                """)
+                st.markdown("**Reglas comunes** (entre paréntesis, en notación de hashcat):")
+                st.markdown("\n".join(f"- {nombre} (`{regla}`)" for nombre, regla in AtaqueDiccionarioReglas.REGLAS))
 
         elif 'resultado_reglas' in st.session_state:
             resultado = st.session_state['resultado_reglas']
@@ -777,10 +1234,11 @@ def mostrar_ataque_diccionario_reglas():
                 - **Palabra base:** `{resultado['palabra_base']}`
                 - **Regla aplicada:** {resultado['regla']}
                 - **Intentos necesarios:** {resultado['intentos']:,}
+                - **Búsquedas en el índice:** {resultado['comprobaciones']:,}
                 """)
 
                 # Mostrar eficiencia
-                eficiencia = (resultado['intentos'] / len(dicc_completo)) * 100
+                eficiencia = min((resultado['intentos'] / len(dicc_completo)) * 100, 100)
                 st.progress(eficiencia / 100)
                 st.caption(f"Recorrido el {eficiencia:.1f}% del diccionario")
 
@@ -799,9 +1257,7 @@ def mostrar_ataque_diccionario_reglas():
             # Visualizar estadísticas
             if 'reglas_aplicadas' in st.session_state:
                 st.markdown("### Estadísticas del diccionario")
-                fig = AtaqueDiccionarioReglas.visualizar_estadisticas(st.session_state['reglas_aplicadas'])
-                st.pyplot(fig)
-                plt.close()
+                mostrar_grafica("variaciones_por_palabra", st.session_state['reglas_aplicadas'])
 
                 total_variaciones = sum(st.session_state['reglas_aplicadas'].values())
                 st.metric("Total variaciones generadas", f"{total_variaciones:,}")
@@ -0,0 +1,159 @@
+"""
+Ejecución por trozos en un pool de procesos para los ataques clásicos sobre textos grandes.
+
+El texto puede ser un str o la ruta (pathlib.Path u otro os.PathLike) de un fichero. Se parte
+en trozos que se procesan por separado y los resultados parciales vuelven en orden para que
+cada ataque los combine (sumar histogramas, unir mapas de repeticiones...). Cada trozo recibe
+además las letras siguientes que pida el ataque, para no perder los n-gramas que cruzan el
+corte; las posiciones globales (y con ellas el índice de la clave de Vigenère, que avanza una
+vez por letra) se recuperan sumando las letras de los trozos anteriores.
+"""
+import codecs
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+TAMAÑO_TROZO = 16 << 20
+# Por debajo de este tamaño no compensa arrancar procesos: todo se hace en este
+UMBRAL_PARALELO = 32 << 20
+# Codificaciones en las que se puede cortar un fichero por bytes sin romper caracteres
+_CODIFICACIONES_ALINEABLES = {"utf-8", "iso8859-1", "ascii", "cp1252"}
+
+
+def es_fichero(origen):
+    return isinstance(origen, os.PathLike)
+
+
+def longitud(origen):
+    """Caracteres de un str o bytes de un fichero"""
+    return os.path.getsize(origen) if es_fichero(origen) else len(origen)
+
+
+def leer(origen, inicio, fin, codificacion="utf-8"):
+    """Texto entre dos posiciones (caracteres en un str, bytes alineados en un fichero)"""
+    if not es_fichero(origen):
+        return origen[inicio:fin]
+    with open(origen, "rb") as f:
+        f.seek(inicio)
+        return f.read(fin - inicio).decode(codificacion, errors="replace")
+
+
+def _alinear(ruta, posicion, codificacion):
+    """Adelanta la posición hasta el inicio de un carácter (en UTF-8 se saltan los bytes 10xxxxxx)"""
+    if codecs.lookup(codificacion).name != "utf-8":
+        return posicion
+    with open(ruta, "rb") as f:
+        f.seek(posicion)
+        for byte in f.read(4):
+            if byte & 0xC0 != 0x80:
+                break
+            posicion += 1
+    return posicion
+
+
+def trozos(origen, tamaño_trozo=None, codificacion="utf-8"):
+    """Lista de (inicio, fin) que cubre todo el origen sin cortar caracteres"""
+    tamaño_trozo = tamaño_trozo or TAMAÑO_TROZO
+    total = longitud(origen)
+    cortes = [0]
+    for posicion in range(tamaño_trozo, total, tamaño_trozo):
+        posicion = _alinear(origen, posicion, codificacion) if es_fichero(origen) else posicion
+        if cortes[-1] < posicion < total:
+            cortes.append(posicion)
+    cortes.append(total)
+    return [(a, b) for a, b in zip(cortes, cortes[1:]) if b > a]
+
+
+def _letras_siguientes(origen, fin, letras, codificacion):
+    """Texto a partir de `fin` con al menos `letras` letras (o hasta el final)"""
+    total = longitud(origen)
+    partes = []
+    encontradas = 0
+    paso = max(64, 4 * letras)
+    while encontradas < letras and fin < total:
+        siguiente = min(fin + paso, total)
+        if es_fichero(origen):
+            siguiente = _alinear(origen, siguiente, codificacion)
+        texto = leer(origen, fin, siguiente, codificacion)
+        partes.append(texto)
+        encontradas += sum(c.isalpha() for c in texto)
+        fin, paso = siguiente, 2 * paso
+    return "".join(partes)
+
+
+def _procesar_trozo(argumentos):
+    funcion, origen, inicio, fin, letras_solape, codificacion = argumentos
+    if es_fichero(origen):
+        trozo = leer(origen, inicio, fin, codificacion)
+        siguiente = _letras_siguientes(origen, fin, letras_solape, codificacion) if letras_solape else ""
+    else:
+        # Un str ya viene cortado desde el proceso principal: solo se envía el trozo
+        trozo, siguiente = origen
+    return funcion(trozo, siguiente, inicio)
+
+
+def mapear_trozos(origen, funcion, letras_solape=0, procesos=None, tamaño_trozo=None, codificacion="utf-8",
+                  seguimiento=None):
+    """
+    Aplica funcion(trozo, siguiente, inicio) a cada trozo y devuelve los resultados en orden.
+    `siguiente` trae al menos `letras_solape` letras posteriores al trozo e `inicio` es su
+    posición en el origen. La función debe estar definida a nivel de módulo (se envía a otros
+    procesos); los ficheros los lee cada proceso por su cuenta. Con un progreso.Seguimiento,
+    los trozos se suman a su total y cada trozo terminado cuenta como un paso
+    """
+    if es_fichero(origen) and codecs.lookup(codificacion).name not in _CODIFICACIONES_ALINEABLES:
+        raise ValueError(f"No se puede partir un fichero en {codificacion} por bytes")
+    procesos = procesos or os.cpu_count() or 1
+    cortes = trozos(origen, tamaño_trozo, codificacion)
+    if seguimiento is not None:
+        seguimiento.total = (seguimiento.total or 0) + len(cortes)
+
+    def tareas():
+        for inicio, fin in cortes:
+            if es_fichero(origen):
+                yield funcion, origen, inicio, fin, letras_solape, codificacion
+            else:
+                siguiente = _letras_siguientes(origen, fin, letras_solape, codificacion) if letras_solape else ""
+                yield funcion, (origen[inicio:fin], siguiente), inicio, fin, letras_solape, codificacion
+
+    def terminado(resultado):
+        if seguimiento is not None:
+            seguimiento.avanzar()
+        return resultado
+
+    if procesos == 1 or longitud(origen) <= UMBRAL_PARALELO:
+        return [terminado(_procesar_trozo(tarea)) for tarea in tareas()]
+
+    resultados = {}
+    pendientes = {}
+    # Con seguimiento se espera a ratos, para ver la cancelación sin que acabe ningún trozo
+    espera = seguimiento.intervalo if seguimiento is not None else None
+
+    def recoger(minimo):
+        while len(pendientes) > minimo:
+            hechos, _ = wait(pendientes, timeout=espera, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                resultados[pendientes.pop(futuro)] = terminado(futuro.result())
+            if not hechos:
+                seguimiento.comprobar()
+
+    ejecutor = ProcessPoolExecutor(max_workers=procesos)
+    try:
+        # Pocos trozos en vuelo a la vez, para no duplicar en memoria un str enorme
+        for numero, tarea in enumerate(tareas()):
+            pendientes[ejecutor.submit(_procesar_trozo, tarea)] = numero
+            recoger(2 * procesos - 1)
+        recoger(0)
+    except BaseException:
+        # Cancelado (o un error): se vuelve ya, sin esperar a los trozos en curso
+        ejecutor.shutdown(wait=False, cancel_futures=True)
+        raise
+    ejecutor.shutdown()
+    return [resultados[i] for i in range(len(resultados))]
+
+
+def desplazamientos(cuentas):
+    """Posición global del primer elemento de cada trozo a partir de cuántos tiene cada uno"""
+    posiciones = [0] if cuentas else []
+    for cuenta in cuentas[:-1]:
+        posiciones.append(posiciones[-1] + cuenta)
+    return posiciones
@@ -0,0 +1,115 @@
+"""
+Tiempos por etapa de las páginas y perfiles para analizar fuera de línea.
+
+`medir(nombre)` sirve como decorador y como gestor de contexto. Cada etapa guarda su tiempo
+real, su tiempo de CPU (del hilo que la ejecuta, así que no cuenta otras sesiones ni los
+procesos del pool) y, si tracemalloc está activo, la memoria que deja asignada y el pico que
+alcanza. Las medidas van a REGISTRO, un buffer circular de MAX_MEDIDAS compartido por todo el
+servidor; cada una lleva la sesión que la produjo para que la página muestre solo las suyas.
+
+Con la variable de entorno SIMULADOR_PERFIL se guarda un fichero por cada ejecución de
+`peticion` en SIMULADOR_PERFIL_DIR:
+
+    SIMULADOR_PERFIL=cprofile     .pstats (python -m pstats fichero.pstats)
+    SIMULADOR_PERFIL=tracemalloc  .snapshot (tracemalloc.Snapshot.load); activa además la
+                                  memoria por etapa
+
+Se pueden pedir los dos separados por comas.
+"""
+import contextvars
+import cProfile
+import itertools
+import os
+import re
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+MAX_MEDIDAS = 1000
+
+PERFILES = {p.strip() for p in os.environ.get("SIMULADOR_PERFIL", "").lower().split(",") if p.strip()}
+DIRECTORIO_PERFILES = os.environ.get("SIMULADOR_PERFIL_DIR",
+                                     os.path.join(tempfile.gettempdir(), "simulador_perfiles"))
+
+# Bytes en memoria: None si tracemalloc no estaba activo durante la etapa
+Medida = namedtuple("Medida", ["etapa", "sesion", "hilo", "inicio", "segundos", "cpu", "asignada", "pico"])
+
+REGISTRO = deque(maxlen=MAX_MEDIDAS)
+
+_sesion = contextvars.ContextVar("sesion", default=None)
+_numero_perfil = itertools.count(1)
+# Etapas abiertas en cada hilo, para repartir el pico de memoria entre las anidadas
+_abiertas = threading.local()
+
+if "tracemalloc" in PERFILES and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+@contextmanager
+def medir(nombre):
+    """Mide el bloque (o cada llamada a la función decorada) como la etapa `nombre`"""
+    pila = _abiertas.__dict__.setdefault("pila", [])
+    memoria = tracemalloc.is_tracing()
+    etapa = {"pico": 0}
+    if memoria:
+        actual, pico = tracemalloc.get_traced_memory()
+        # reset_peak es global: las etapas de fuera se quedan con el pico que llevaban
+        for abierta in pila:
+            abierta["pico"] = max(abierta["pico"], pico - abierta["actual"])
+        tracemalloc.reset_peak()
+        etapa["actual"] = actual
+    pila.append(etapa)
+    inicio, inicio_cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        segundos, cpu = time.perf_counter() - inicio, time.thread_time() - inicio_cpu
+        pila.pop()
+        asignada = pico = None
+        if memoria and tracemalloc.is_tracing():
+            actual, pico_global = tracemalloc.get_traced_memory()
+            asignada = actual - etapa["actual"]
+            pico = max(etapa["pico"], pico_global - etapa["actual"])
+        REGISTRO.append(Medida(nombre, _sesion.get(), threading.current_thread().name,
+                               time.time() - segundos, segundos, cpu, asignada, pico))
+
+
+@contextmanager
+def peticion(nombre, sesion=None):
+    """
+    Una ejecución completa (p. ej. de una página): sus etapas se asocian a `sesion`, el total se
+    mide como la etapa `nombre` y, con SIMULADOR_PERFIL, se guardan sus perfiles
+    """
+    token = _sesion.set(sesion)
+    perfil = cProfile.Profile() if "cprofile" in PERFILES else None
+    try:
+        if perfil is not None:
+            try:
+                perfil.enable()
+            except ValueError:  # Otro perfilador activo en este hilo
+                perfil = None
+        with medir(nombre):
+            yield
+    finally:
+        if perfil is not None:
+            perfil.disable()
+            perfil.dump_stats(_ruta_perfil(nombre, "pstats"))
+        if "tracemalloc" in PERFILES and tracemalloc.is_tracing():
+            tracemalloc.take_snapshot().dump(_ruta_perfil(nombre, "snapshot"))
+        _sesion.reset(token)
+
+
+def _ruta_perfil(nombre, extension):
+    os.makedirs(DIRECTORIO_PERFILES, exist_ok=True)
+    limpio = re.sub(r"\W+", "_", nombre).strip("_") or "peticion"
+    nombre_fichero = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_numero_perfil):05d}-{limpio}"
+    return os.path.join(DIRECTORIO_PERFILES, f"{nombre_fichero}.{extension}")
+
+
+def medidas(sesion=None, ultimas=None):
+    """Medidas del registro (solo las de `sesion` si se indica), de la más antigua a la más reciente"""
+    seleccion = [m for m in list(REGISTRO) if sesion is None or m.sesion == sesion]
+    return seleccion[-ultimas:] if ultimas else seleccion
@@ -0,0 +1,65 @@
+"""
+Progreso y cancelación de los ataques largos.
+
+Los ataques que pueden tardar (fuerza_bruta, encontrar_repeticiones, simular_ataque) aceptan
+dos argumentos opcionales:
+
+- progreso: función que recibe un Avance con los intentos hechos, el total (None si no se
+  conoce) y los intentos por segundo.
+- cancelacion: cualquier objeto con is_set(), como un threading.Event. Cuando está activo el
+  ataque se detiene en su siguiente comprobación lanzando Cancelado.
+
+Cada ataque comprueba una vez por clave, por regla o por trozo, nunca por candidato, y el aviso
+a `progreso` se limita a uno cada INTERVALO segundos, así que sin ellos no cuestan nada.
+"""
+import time
+from collections import namedtuple
+
+INTERVALO = 0.2
+
+Avance = namedtuple("Avance", ["hechos", "total", "por_segundo"])
+
+
+class Cancelado(Exception):
+    """Se pidió cancelar el ataque"""
+
+
+class Seguimiento:
+    """Cuenta los intentos de un ataque, avisa a `progreso` y comprueba la cancelación"""
+
+    def __init__(self, total=None, progreso=None, cancelacion=None, intervalo=INTERVALO):
+        self.total = total
+        self.hechos = 0
+        self.progreso = progreso
+        self.cancelacion = cancelacion
+        self.intervalo = intervalo
+        self.inicio = time.perf_counter()
+        self._ultimo_aviso = None
+
+    @property
+    def por_segundo(self):
+        segundos = time.perf_counter() - self.inicio
+        return self.hechos / segundos if segundos > 0 else 0.0
+
+    @property
+    def avance(self):
+        return Avance(self.hechos, self.total, self.por_segundo)
+
+    def avanzar(self, intentos=1):
+        """Suma intentos; lanza Cancelado si se pidió parar"""
+        self.hechos += intentos
+        self.comprobar()
+
+    def comprobar(self, forzar=False):
+        if self.cancelacion is not None and self.cancelacion.is_set():
+            raise Cancelado()
+        if self.progreso is None:
+            return
+        ahora = time.perf_counter()
+        if forzar or self._ultimo_aviso is None or ahora - self._ultimo_aviso >= self.intervalo:
+            self._ultimo_aviso = ahora
+            self.progreso(self.avance)
+
+    def terminar(self):
+        """Último aviso, con el recuento final"""
+        self.comprobar(forzar=True)
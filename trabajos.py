@@ -0,0 +1,156 @@
+"""
+Trabajos en segundo plano para la interfaz.
+
+Los ataques largos no se ejecutan dentro del script de Streamlit, que quedaría bloqueado y
+los repetiría en cada interacción, sino en un pool de hilos compartido por todas las
+sesiones. La función del trabajo recibe como primer argumento su Trabajo, con el que informa
+del progreso (hechos / total y un resultado parcial) y se entera de si se ha pedido
+cancelarlo; a los ataques se les pasan trabajo.informar y trabajo.cancelacion como `progreso`
+y `cancelacion` (ver progreso.py) para que avisen y se detengan desde dentro de sus bucles.
+Cada usuario tiene como mucho MAX_TRABAJOS_USUARIO trabajos activos a la vez, para que nadie
+acapare el pool, y un trabajo idéntico a otro ya terminado (misma clave) reutiliza su
+resultado mientras no caduque.
+"""
+import contextvars
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from progreso import Cancelado
+
+MAX_TRABAJOS_USUARIO = 2
+# Trabajos terminados que se conservan para consultarlos o reutilizar su resultado
+MAX_TRABAJOS_GUARDADOS = 256
+CADUCIDAD = 3600
+
+
+class LimiteTrabajos(RuntimeError):
+    """El usuario ya tiene el máximo de trabajos activos"""
+
+
+class Trabajo:
+    """Estado de un ataque en segundo plano, compartido entre el hilo que lo ejecuta y la interfaz"""
+
+    def __init__(self, usuario, funcion, args, clave=None):
+        self.id = uuid.uuid4().hex
+        self.usuario = usuario
+        self.clave = clave
+        self.estado = "pendiente"  # pendiente, en curso, terminado, cancelado o error
+        self.hechos = 0
+        self.total = None
+        self.por_segundo = None
+        self.parcial = None
+        self.resultado = None
+        self.error = None
+        self.inicio = None
+        self.fin = None
+        self._funcion = funcion
+        self._args = args
+        self.cancelacion = threading.Event()
+
+    @property
+    def activo(self):
+        return self.estado in ("pendiente", "en curso")
+
+    @property
+    def cancelado(self):
+        return self.cancelacion.is_set()
+
+    def cancelar(self):
+        """Pide parar; el trabajo lo ve en su siguiente llamada a progreso o comprobación del ataque"""
+        self.cancelacion.set()
+
+    def progreso(self, hechos, total=None, parcial=None):
+        """Lo llama el propio trabajo para informar; lanza Cancelado si se pidió parar"""
+        self.hechos = hechos
+        if total is not None:
+            self.total = total
+        if parcial is not None:
+            self.parcial = parcial
+        if self.cancelado:
+            raise Cancelado()
+
+    def informar(self, avance):
+        """Función `progreso` para los ataques: recibe su progreso.Avance"""
+        self.hechos, self.total, self.por_segundo = avance
+
+    @property
+    def fraccion(self):
+        return min(self.hechos / self.total, 1.0) if self.total else 0.0
+
+    @property
+    def segundos(self):
+        if self.inicio is None:
+            return 0.0
+        return (self.fin or time.time()) - self.inicio
+
+    def _ejecutar(self):
+        if self.cancelado:
+            self.estado = "cancelado"
+            self.fin = time.time()
+            return
+        self.estado = "en curso"
+        self.inicio = time.time()
+        try:
+            self.resultado = self._funcion(self, *self._args)
+            self.estado = "terminado"
+        except Cancelado:
+            self.estado = "cancelado"
+        except Exception as e:  # El error se muestra en la página que lanzó el trabajo
+            self.error = f"{type(e).__name__}: {e}"
+            self.estado = "error"
+        finally:
+            self.fin = time.time()
+            self._args = ()  # No retener textos grandes mientras el trabajo se conserva
+
+
+class GestorTrabajos:
+    """Pool compartido con el límite por usuario y el registro de los trabajos"""
+
+    def __init__(self, hilos=None, max_por_usuario=MAX_TRABAJOS_USUARIO, caducidad=CADUCIDAD,
+                 max_guardados=MAX_TRABAJOS_GUARDADOS):
+        self.max_por_usuario = max_por_usuario
+        self.caducidad = caducidad
+        self.max_guardados = max_guardados
+        self._pool = ThreadPoolExecutor(max_workers=hilos or max(2, os.cpu_count() or 1),
+                                        thread_name_prefix="trabajo")
+        self._trabajos = OrderedDict()
+        self._cerrojo = threading.Lock()
+
+    def enviar(self, usuario, funcion, *args, clave=None):
+        """
+        Lanza funcion(trabajo, *args) en el pool y devuelve el Trabajo. Con `clave`, si ya hay un
+        trabajo terminado con la misma clave se devuelve ese en lugar de repetir el cálculo
+        """
+        with self._cerrojo:
+            self._purgar()
+            if clave is not None:
+                for trabajo in reversed(self._trabajos.values()):
+                    if trabajo.clave == clave and trabajo.estado == "terminado":
+                        return trabajo
+            activos = self.activos(usuario)
+            if len(activos) >= self.max_por_usuario:
+                raise LimiteTrabajos(f"Ya tienes {len(activos)} ataques en marcha: espera a que "
+                                     f"terminen o cancela alguno")
+            trabajo = Trabajo(usuario, funcion, args, clave)
+            self._trabajos[trabajo.id] = trabajo
+        # El trabajo hereda el contexto de quien lo lanza (p. ej. la sesión en perfilado.py)
+        self._pool.submit(contextvars.copy_context().run, trabajo._ejecutar)
+        return trabajo
+
+    def obtener(self, id_trabajo):
+        return self._trabajos.get(id_trabajo)
+
+    def activos(self, usuario):
+        return [t for t in list(self._trabajos.values()) if t.usuario == usuario and t.activo]
+
+    def _purgar(self):
+        """Olvida los trabajos terminados caducados y los más antiguos si sobran"""
+        ahora = time.time()
+        terminados = [t for t in self._trabajos.values() if not t.activo]
+        for posicion, trabajo in enumerate(terminados):
+            if (trabajo.fin or ahora) < ahora - self.caducidad or posicion < len(terminados) - self.max_guardados:
+                del self._trabajos[trabajo.id]